@@ -4,23 +4,27 @@ Debug script to see what keys are recorded in a session.
 Helps diagnose key parsing issues.
 """
 
-import json
+import heapq
+import re
 import sys
 from pathlib import Path
-from collections import Counter
+from collections import defaultdict
+
+from src.event_log import has_event_log, load_events
+
+# Control characters (other than tab/newline/carriage return) that should
+# never appear in a recorded key
+NON_PRINTABLE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
 
 def analyze_session(session_path):
     """Analyze keys in a session."""
-    inputs_file = Path(session_path) / "inputs.json"
+    session_dir = Path(session_path)
 
-    if not inputs_file.exists():
-        print(f"Error: {inputs_file} not found")
+    if not has_event_log(session_dir):
+        print(f"Error: no input events found in {session_dir}")
         return
 
-    with open(inputs_file, 'r') as f:
-        data = json.load(f)
-
-    events = data.get('events', [])
+    events = load_events(session_dir)
 
     print("=" * 60)
     print(f"Session Analysis: {session_path}")
@@ -28,33 +32,39 @@ def analyze_session(session_path):
     print(f"Total events: {len(events)}")
     print()
 
-    # Count event types
-    event_types = Counter(e['type'] for e in events)
-    print("Event types:")
-    for event_type, count in event_types.items():
-        print(f"  {event_type}: {count}")
-    print()
-
-    # Extract all unique keys
-    keys_pressed = set()
-    keys_released = set()
+    # Single pass: count event types and collect unique keys, classifying
+    # each key the first time it is seen
+    event_types = defaultdict(int)
+    all_keys = set()
+    quoted_keys = []
+    non_printable = []
 
     for event in events:
-        if event['type'] == 'key_press':
-            key = event['data']['key_id']
-            keys_pressed.add(key)
-        elif event['type'] == 'key_release':
+        event_type = event['type']
+        event_types[event_type] += 1
+
+        if event_type == 'key_press' or event_type == 'key_release':
             key = event['data']['key_id']
-            keys_released.add(key)
+            if key in all_keys:
+                continue
+            all_keys.add(key)
 
-    all_keys = keys_pressed | keys_released
+            if key.startswith("'") and key.endswith("'"):
+                quoted_keys.append(key)
+            if NON_PRINTABLE.search(key):
+                non_printable.append(key)
+
+    print("Event types:")
+    for event_type, count in event_types.items():
+        print(f"  {event_type}: {count}")
+    print()
 
     print(f"Unique keys used: {len(all_keys)}")
     print()
 
     # Show first 20 keys with their representation
     print("Sample keys (first 20):")
-    for i, key in enumerate(sorted(all_keys)[:20], 1):
+    for i, key in enumerate(heapq.nsmallest(20, all_keys), 1):
         # Show the key, its length, and hex representation
         hex_repr = ' '.join(f'{ord(c):02x}' for c in key)
         print(f"  {i:2d}. '{key}' (len={len(key)}, hex={hex_repr})")
@@ -68,7 +78,6 @@ def analyze_session(session_path):
     print("Checking for potential issues:")
 
     # Keys with quotes
-    quoted_keys = [k for k in all_keys if k.startswith("'") and k.endswith("'")]
     if quoted_keys:
         print(f"  ⚠ Found {len(quoted_keys)} keys with quotes:")
         for key in quoted_keys[:5]:
@@ -79,7 +88,6 @@ def analyze_session(session_path):
         print("  ✓ No keys with extra quotes")
 
     # Non-printable characters
-    non_printable = [k for k in all_keys if any(ord(c) < 32 and c not in '\t\n\r' for c in k)]
     if non_printable:
         print(f"  ⚠ Found {len(non_printable)} keys with non-printable characters:")
         for key in non_printable[:5]:
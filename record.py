@@ -17,6 +17,7 @@ Press Ctrl+C to stop recording.
 import argparse
 import signal
 import sys
+import threading
 import time
 from pathlib import Path
 
@@ -24,14 +25,23 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.data_recorder import DataRecorder
+from src.video_encoder import HWACCEL_CHOICES
+
+
+# Set by Ctrl+C; the main loop then stops the recorder exactly once
+stop_event = threading.Event()
+
+# Status print interval, and how often the main loop checks for Ctrl+C.
+# Waits are kept short because on Windows the signal handler only runs
+# once Event.wait() returns.
+STATUS_INTERVAL = 10.0
+STOP_POLL_INTERVAL = 0.25
 
 
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully."""
     print("\n[Main] Interrupt received, stopping recording...")
-    if recorder and recorder.recording:
-        recorder.stop()
-    sys.exit(0)
+    stop_event.set()
 
 
 def parse_args():
@@ -89,7 +99,15 @@ Examples:
         '--codec',
         type=str,
         default='libx264',
-        help='Video codec (default: libx264)'
+        help='Video codec when no hardware encoder is used (default: libx264)'
+    )
+
+    parser.add_argument(
+        '--hwaccel',
+        type=str,
+        default='auto',
+        choices=HWACCEL_CHOICES,
+        help='Hardware video encoder: "auto" detects NVENC/QSV/AMF/VAAPI, "none" forces --codec (default: auto)'
     )
 
     parser.add_argument(
@@ -99,13 +117,30 @@ Examples:
         help='Monitor number to capture (default: 1 = primary)'
     )
 
+    parser.add_argument(
+        '--legacy-json',
+        action='store_true',
+        help='Also write all input events to a single inputs.json file '
+             '(inputs.json.zst when zstandard is installed)'
+    )
+
+    parser.add_argument(
+        '--no-aligned-json',
+        action='store_true',
+        help='Only write frame-aligned inputs as inputs_frame_aligned.npz (skip the JSON copy)'
+    )
+
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='Indent the JSON output files for debugging (default: compact)'
+    )
+
     return parser.parse_args()
 
 
 def main():
     """Main function."""
-    global recorder
-
     args = parse_args()
 
     # Setup signal handler for graceful shutdown
@@ -124,7 +159,11 @@ def main():
         output_dir=args.output,
         fps=args.fps,
         resolution=resolution,
-        video_codec=args.codec
+        video_codec=args.codec,
+        hwaccel=args.hwaccel,
+        legacy_json=args.legacy_json,
+        aligned_json=not args.no_aligned_json,
+        pretty=args.pretty
     )
 
     # Start recording
@@ -145,24 +184,17 @@ def main():
     print()
     recorder.start(session_name=args.name)
 
-    # Main loop - print status updates
-    try:
-        last_status_time = time.time()
-        while True:
-            time.sleep(1)
-
-            # Print status every 10 seconds
-            current_time = time.time()
-            if current_time - last_status_time >= 10:
-                status = recorder.get_status()
-                if status['recording']:
-                    print(f"\n[Status] Duration: {status['duration']:.1f}s | "
-                          f"Frames: {status['screen_stats']['frame_count']} | "
-                          f"Inputs: {status['input_stats']['total_events']}")
-                last_status_time = current_time
-
-    except KeyboardInterrupt:
-        pass
+    # Main loop - print status updates until Ctrl+C
+    next_status_time = time.monotonic() + STATUS_INTERVAL
+    while not stop_event.wait(STOP_POLL_INTERVAL):
+        current_time = time.monotonic()
+        if current_time >= next_status_time:
+            status = recorder.get_status()
+            if status['recording']:
+                print(f"\n[Status] Duration: {status['duration']:.1f}s | "
+                      f"Frames: {status['screen_stats']['frame_count']} | "
+                      f"Inputs: {status['input_stats']['total_events']}")
+            next_status_time = current_time + STATUS_INTERVAL
 
     # Stop recording
     recorder.stop()
@@ -177,11 +209,13 @@ def main():
     status = recorder.get_status()
     if 'output_dir' in status:
         print(f"  - Video: {status['output_dir']}/gameplay.mp4")
-        print(f"  - Inputs: {status['output_dir']}/inputs.json")
-        print(f"  - Frame-aligned inputs: {status['output_dir']}/inputs_frame_aligned.json")
+        print(f"  - Inputs: {status['output_dir']}/inputs.jsonl")
+        print(f"  - Frame-aligned inputs: {status['output_dir']}/inputs_frame_aligned.npz")
+        if status.get('frame_aligned_json'):
+            print(f"  - Frame-aligned inputs (JSON): "
+                  f"{status['output_dir']}/{status['frame_aligned_json']}")
         print(f"  - Metadata: {status['output_dir']}/metadata.json")
 
 
 if __name__ == '__main__':
-    recorder = None
     main()
@@ -21,6 +21,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.session_replay import SessionReplay
+from src.event_log import has_event_log, load_input_summary
 
 
 def list_sessions(recordings_dir: str = "recordings"):
@@ -33,10 +34,8 @@ def list_sessions(recordings_dir: str = "recordings"):
 
     sessions = []
     for session_dir in sorted(recordings_path.iterdir()):
-        if session_dir.is_dir():
-            inputs_file = session_dir / "inputs.json"
-            if inputs_file.exists():
-                sessions.append(session_dir)
+        if session_dir.is_dir() and has_event_log(session_dir):
+            sessions.append(session_dir)
 
     return sessions
 
@@ -83,6 +82,28 @@ Examples:
         help='Delay in seconds before starting replay (default: 3)'
     )
 
+    parser.add_argument(
+        '--coalesce-ms',
+        type=float,
+        default=8.0,
+        help='Replay consecutive mouse moves within this window as one move '
+             '(default: 8, 0 = no coalescing)'
+    )
+
+    parser.add_argument(
+        '--start',
+        type=float,
+        default=0.0,
+        help='Start replay this many seconds into the recording (default: 0)'
+    )
+
+    parser.add_argument(
+        '--low-cpu',
+        action='store_true',
+        help='Sleep until each event instead of spinning the last 2 ms '
+             '(less precise timing, no busy CPU core)'
+    )
+
     parser.add_argument(
         '--list', '-l',
         action='store_true',
@@ -123,9 +144,12 @@ def main():
 
             # Load and show info
             try:
-                # Default to native for listing to avoid loading human input class here
-                replayer = SessionReplay(str(session), input_method='native')
-                info = replayer.get_info()
+                info = load_input_summary(session)
+                if info is None:
+                    # Older session without a cached summary: parse the event log.
+                    # Default to native for listing to avoid loading human input class here
+                    replayer = SessionReplay(str(session), input_method='native')
+                    info = replayer.get_info()
 
                 print(f"   Duration: {info['duration']:.1f}s")
                 print(f"   Events: {info['total_events']}")
@@ -179,12 +203,17 @@ def main():
             print()
 
         # Replay
-        replayer.play(speed=args.speed, start_delay=args.delay)
+        try:
+            replayer.play(speed=args.speed, start_delay=args.delay,
+                          coalesce_ms=args.coalesce_ms, start_offset_s=args.start,
+                          precise=not args.low_cpu)
+        finally:
+            replayer.close()
 
     except FileNotFoundError as e:
         print(f"Error: {e}")
         print()
-        print("Make sure the session directory contains an 'inputs.json' file.")
+        print("Make sure the session directory contains an 'inputs.jsonl' (or legacy 'inputs.json') file.")
         sys.exit(1)
 
     except Exception as e:
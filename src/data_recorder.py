@@ -5,16 +5,66 @@ Saves data in formats suitable for machine learning training.
 
 import os
 import time
-import json
 import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple
 import numpy as np
-import imageio
+import orjson
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 from .screen_recorder import ScreenRecorder
 from .input_recorder import InputRecorder
+from .event_log import (INPUTS_JSONL, INPUTS_META, INPUTS_JSON, INPUTS_JSON_ZST,
+                        SESSION_METADATA, encode_event, save_event_columns)
+from .video_encoder import FFmpegWriter, select_encoder, is_hardware_codec
+
+# Serialization options shared by every JSON file written for a session.
+# Output is compact; OPT_INDENT_2 is added when the recorder runs with pretty=True.
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Layout of inputs_frame_aligned.npz, also recorded in metadata.json.
+# Bitmaps are unpacked with np.unpackbits(arr, axis=1, count=len(names)).
+FRAME_ALIGNED_FORMAT = {
+    'version': 1,
+    'timestamps': 'float64 (frames,) seconds since start',
+    'keys': 'str (num_keys,) key_id of each bit in pressed',
+    'pressed': 'uint8 (frames, ceil(num_keys / 8)) np.packbits(axis=1) key bitmap',
+    'mouse_xy': 'int16 (frames, 2) cursor position',
+    'buttons': 'str (num_buttons,) button name of each bit in mouse_buttons',
+    'mouse_buttons': 'uint8 (frames, ceil(num_buttons / 8)) np.packbits(axis=1) button bitmap'
+}
+
+# Event log commits: flush+fsync newly recorded events every interval
+EVENT_FLUSH_INTERVAL = 0.2
+
+
+def _transitions_to_state(transitions: dict, names: list, applied: np.ndarray) -> np.ndarray:
+    """
+    Evaluate press/release transitions at every frame.
+
+    Args:
+        transitions: name -> list of (event_index, pressed) in event order
+        names: Ordered names, one output column each
+        applied: Number of events applied at each frame
+
+    Returns:
+        uint8 array of shape (num_frames, len(names)), 1 = held down
+    """
+    state = np.zeros((len(applied), len(names)), dtype=np.uint8)
+
+    for col, name in enumerate(names):
+        idx, values = zip(*transitions[name])
+        # Index of the last transition before each frame's cutoff (0 = none yet)
+        last = np.searchsorted(np.asarray(idx, dtype=np.int64), applied, side='left')
+        state[:, col] = np.concatenate(([0], np.asarray(values, dtype=np.uint8)))[last]
+
+    return state
 
 
 class DataRecorder:
@@ -23,7 +73,11 @@ class DataRecorder:
     def __init__(self, output_dir: str = "recordings",
                  fps: int = 30,
                  resolution: Optional[Tuple[int, int]] = (1280, 720),
-                 video_codec: str = 'libx264'):
+                 video_codec: str = 'libx264',
+                 hwaccel: str = 'auto',
+                 legacy_json: bool = False,
+                 aligned_json: bool = True,
+                 pretty: bool = False):
         """
         Initialize the data recorder.
 
@@ -31,12 +85,22 @@ class DataRecorder:
             output_dir: Directory to save recordings
             fps: Frames per second for video capture
             resolution: Video resolution (width, height). None = native
-            video_codec: Video codec for encoding
+            video_codec: Video codec for encoding (used when no hardware encoder is selected)
+            hwaccel: Hardware encoder to use ('auto', 'nvenc', 'qsv', 'amf', 'vaapi', 'none')
+            legacy_json: Also write all events to a single inputs.json at stop
+                (inputs.json.zst when zstandard is installed)
+            aligned_json: Also write frame-aligned inputs as JSON (the .npz is always written)
+            pretty: Indent JSON outputs for reading (compact by default)
         """
         self.output_dir = Path(output_dir)
         self.fps = fps
         self.resolution = resolution
         self.video_codec = video_codec
+        self.hwaccel = hwaccel
+        self._encoder_params = None
+        self.legacy_json = legacy_json
+        self.aligned_json = aligned_json
+        self._json_options = JSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
 
         self.screen_recorder = ScreenRecorder(
             monitor=1,
@@ -47,8 +111,14 @@ class DataRecorder:
 
         self.recording = False
         self._save_thread = None
+        self._event_log_thread = None
         self._session_dir = None
         self._video_writer = None
+        self._events_fp = None
+        self._events_logged = 0
+        self._flush_requested = threading.Event()
+        self._input_summary = None
+        self._aligned_json_file = None
         self._start_time = None
 
     def start(self, session_name: Optional[str] = None):
@@ -72,6 +142,16 @@ class DataRecorder:
         print(f"[DataRecorder] Starting recording session: {session_name}")
         print(f"[DataRecorder] Output directory: {self._session_dir}")
 
+        # Pick the video encoder before capture starts (probing spawns ffmpeg)
+        self.video_codec, self._encoder_params = select_encoder(self.hwaccel, self.video_codec)
+        print(f"[DataRecorder] Video codec: {self.video_codec}")
+
+        # Open the event log, streamed to disk while recording
+        self._events_fp = open(self._session_dir / INPUTS_JSONL, 'wb')
+        self._events_logged = 0
+        self._flush_requested.clear()
+        self._aligned_json_file = None
+
         # Start recorders
         self._start_time = time.time()
         self.screen_recorder.start()
@@ -83,6 +163,10 @@ class DataRecorder:
         self._save_thread = threading.Thread(target=self._save_loop, daemon=True)
         self._save_thread.start()
 
+        # Start event log flush thread
+        self._event_log_thread = threading.Thread(target=self._event_flush_loop, daemon=True)
+        self._event_log_thread.start()
+
         print("[DataRecorder] Recording started. Press Ctrl+C or call stop() to finish.")
 
     def stop(self):
@@ -101,6 +185,14 @@ class DataRecorder:
         if self._save_thread:
             self._save_thread.join(timeout=5.0)
 
+        # Flush remaining events and close the event log
+        self._flush_requested.set()
+        if self._event_log_thread:
+            self._event_log_thread.join(timeout=5.0)
+        self._flush_events()
+        self._events_fp.close()
+        self._events_fp = None
+
         # Close video writer
         if self._video_writer:
             self._video_writer.close()
@@ -118,60 +210,100 @@ class DataRecorder:
         """Main loop for saving frames to video."""
         video_path = self._session_dir / "gameplay.mp4"
 
-        # Initialize video writer with first frame
-        first_frame = None
-        while self.recording and first_frame is None:
-            frame_data = self.screen_recorder.get_frame(timeout=0.1)
-            if frame_data:
-                _, first_frame = frame_data
+        # Wait for the first frame before creating the video file
+        while not self.screen_recorder.wait_for_frames(timeout=0.1):
+            if not self.recording:
+                print("[DataRecorder] Failed to capture initial frame!")
+                return
 
-        if first_frame is None:
-            print("[DataRecorder] Failed to capture initial frame!")
-            return
-
-        # Create video writer
-        self._video_writer = imageio.get_writer(
-            str(video_path),
+        # Create video writer (ffmpeg subprocess fed through a pipe)
+        self._video_writer = FFmpegWriter(
+            video_path,
             fps=self.fps,
             codec=self.video_codec,
-            quality=8,
-            pixelformat='yuv420p',
-            macro_block_size=1
+            output_params=self._encoder_params,
+            # Hardware encoders are rate-controlled through output_params
+            quality=None if is_hardware_codec(self.video_codec) else 8
         )
 
-        # Write first frame
-        self._video_writer.append_data(first_frame)
-        frame_count = 1
-
-        # Continue writing frames
-        while self.recording:
-            frame_data = self.screen_recorder.get_frame(timeout=0.1)
-            if frame_data:
-                timestamp, frame = frame_data
-                self._video_writer.append_data(frame)
+        # Bind hot-path attributes once, this loop runs for every frame
+        drain_frames = self.screen_recorder.drain_frames
+        wait_for_frames = self.screen_recorder.wait_for_frames
+        append = self._video_writer.append_data
+        print_interval = self.fps * 5  # Print progress every 5 seconds
+        next_print = print_interval
+        frame_count = 0
+
+        # Drain every frame buffered since the last wake-up, then wait for more.
+        # One last drain runs after recording stops so buffered frames are kept.
+        while True:
+            recording = self.recording
+
+            for timestamp, frame in drain_frames():
+                append(frame)
                 frame_count += 1
 
-                # Print progress every 5 seconds
-                if frame_count % (self.fps * 5) == 0:
+                if frame_count >= next_print:
+                    next_print += print_interval
                     duration = frame_count / self.fps
                     print(f"[DataRecorder] Recorded {duration:.1f}s "
                           f"({frame_count} frames)")
 
+            if not recording:
+                break
+            wait_for_frames(timeout=0.1)
+
+    def _event_flush_loop(self):
+        """Commit recorded events to the event log in batches."""
+        while self.recording:
+            self._flush_requested.wait(EVENT_FLUSH_INTERVAL)
+            self._flush_requested.clear()
+            self._flush_events()
+
+    def _flush_events(self):
+        """Write, flush and fsync all events recorded since the last commit as one batch."""
+        # Events are serialized here rather than in the listener callbacks,
+        # which only append to the input recorder's columns
+        events = self.input_recorder.get_events_since(self._events_logged)
+        if not events:
+            return
+        self._events_logged += len(events)
+
+        self._events_fp.write(b''.join(map(encode_event, events)))
+        self._events_fp.flush()
+        os.fsync(self._events_fp.fileno())
+
     def _save_input_data(self):
-        """Save input events to JSON file."""
-        events = self.input_recorder.get_events()
+        """Save the input log header and columns (and optionally the legacy inputs.json)."""
+        # Columnar copy of the event log, loaded instead of the JSON by replay
+        save_event_columns(self._session_dir, self.input_recorder.get_columns())
 
-        input_path = self._session_dir / "inputs.json"
+        events = self.input_recorder.get_events()
 
-        # Convert events to serializable format
-        events_data = {
-            'events': events,
+        header = {
             'total_events': len(events),
             'duration': events[-1]['timestamp'] if events else 0
         }
 
-        with open(input_path, 'w') as f:
-            json.dump(events_data, f, indent=2)
+        meta_path = self._session_dir / INPUTS_META
+        meta_path.write_bytes(orjson.dumps(header, option=self._json_options))
+
+        # Summary cached in metadata.json so sessions can be listed without
+        # parsing the event log
+        self._input_summary = {
+            **header,
+            'event_counts': self.input_recorder.get_stats()['event_counts']
+        }
+
+        if self.legacy_json:
+            data = orjson.dumps({'events': events, **header}, option=self._json_options)
+            if ZSTD_AVAILABLE:
+                # Key ids and coordinates repeat a lot, zstd shrinks the log several times
+                input_path = self._session_dir / INPUTS_JSON_ZST
+                data = zstandard.ZstdCompressor(level=3, threads=-1).compress(data)
+            else:
+                input_path = self._session_dir / INPUTS_JSON
+            input_path.write_bytes(data)
 
         print(f"[DataRecorder] Saved {len(events)} input events")
 
@@ -186,26 +318,78 @@ class DataRecorder:
         # Create frame-aligned input states
         duration = events[-1]['timestamp'] if events else 0
         num_frames = int(duration * self.fps) + 1
+        frame_times = np.arange(num_frames) / self.fps
+
+        # Number of events applied at each frame (events with timestamp <= frame time)
+        timestamps = np.fromiter((e['timestamp'] for e in events),
+                                 dtype=np.float64, count=len(events))
+        applied = np.searchsorted(timestamps, frame_times, side='right')
+
+        # Collect state transitions per key / button and the mouse path
+        key_transitions = {}
+        button_transitions = {}
+        move_idx, move_x, move_y = [], [], []
+
+        for i, event in enumerate(events):
+            event_type = event['type']
+            data = event['data']
+            if event_type == 'key_press' or event_type == 'key_release':
+                key_transitions.setdefault(data['key_id'], []).append(
+                    (i, event_type == 'key_press'))
+            elif event_type == 'mouse_press' or event_type == 'mouse_release':
+                button_transitions.setdefault(data['button'], []).append(
+                    (i, event_type == 'mouse_press'))
+            elif event_type == 'mouse_move':
+                move_idx.append(i)
+                move_x.append(data['x'])
+                move_y.append(data['y'])
+
+        keys = sorted(key_transitions)
+        buttons = sorted(button_transitions)
+        pressed = _transitions_to_state(key_transitions, keys, applied)
+        mouse_buttons = _transitions_to_state(button_transitions, buttons, applied)
+
+        # Last mouse position at each frame, (0, 0) before the first move
+        last_move = np.searchsorted(np.asarray(move_idx, dtype=np.int64), applied, side='left')
+        mouse_xy = np.zeros((len(move_idx) + 1, 2), dtype=np.int16)
+        mouse_xy[1:, 0] = move_x
+        mouse_xy[1:, 1] = move_y
+        mouse_xy = mouse_xy[last_move]
+
+        aligned_path = self._session_dir / "inputs_frame_aligned.npz"
+        np.savez_compressed(
+            aligned_path,
+            timestamps=frame_times,
+            keys=np.array(keys, dtype=str),
+            pressed=np.packbits(pressed, axis=1),
+            mouse_xy=mouse_xy,
+            buttons=np.array(buttons, dtype=str),
+            mouse_buttons=np.packbits(mouse_buttons, axis=1)
+        )
 
-        # Initialize arrays for frame-aligned data
-        frames_data = []
-
-        for frame_idx in range(num_frames):
-            timestamp = frame_idx / self.fps
-            state = self.input_recorder.get_state_at_time(timestamp)
-
-            frames_data.append({
-                'timestamp': timestamp,
-                'pressed_keys': list(state['pressed_keys']),
-                'mouse_x': state['mouse_position'][0],
-                'mouse_y': state['mouse_position'][1],
-                'mouse_buttons': list(state['mouse_buttons'])
-            })
-
-        # Save as JSON for readability
-        aligned_path = self._session_dir / "inputs_frame_aligned.json"
-        with open(aligned_path, 'w') as f:
-            json.dump(frames_data, f, indent=2)
+        # Also save as JSON for readability
+        if self.aligned_json:
+            frames_data = [
+                {
+                    'timestamp': timestamp,
+                    'pressed_keys': [keys[k] for k in np.flatnonzero(key_row)],
+                    'mouse_x': x,
+                    'mouse_y': y,
+                    'mouse_buttons': [buttons[b] for b in np.flatnonzero(button_row)]
+                }
+                for timestamp, key_row, (x, y), button_row in zip(
+                    frame_times.tolist(), pressed, mouse_xy.tolist(), mouse_buttons)
+            ]
+
+            data = orjson.dumps(frames_data, option=self._json_options)
+            if ZSTD_AVAILABLE:
+                # Highly repetitive between frames, zstd shrinks it several times
+                json_path = self._session_dir / "inputs_frame_aligned.json.zst"
+                data = zstandard.ZstdCompressor(level=3, threads=-1).compress(data)
+            else:
+                json_path = self._session_dir / "inputs_frame_aligned.json"
+            json_path.write_bytes(data)
+            self._aligned_json_file = json_path.name
 
         print(f"[DataRecorder] Saved frame-aligned inputs ({num_frames} frames)")
 
@@ -215,25 +399,39 @@ class DataRecorder:
         input_stats = self.input_recorder.get_stats()
 
         metadata = {
-            'session_start': datetime.fromtimestamp(self._start_time).isoformat(),
+            # orjson writes datetimes (and numpy values in the stats) natively
+            'session_start': datetime.fromtimestamp(self._start_time),
             'fps': self.fps,
             'resolution': self.resolution,
             'video_codec': self.video_codec,
             'screen_stats': screen_stats,
             'input_stats': input_stats,
+            'input_summary': self._input_summary,
+            'frame_aligned_format': FRAME_ALIGNED_FORMAT,
+            'frame_aligned_json': self._aligned_json_file,
             'duration': time.time() - self._start_time
         }
 
-        metadata_path = self._session_dir / "metadata.json"
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        metadata_path = self._session_dir / SESSION_METADATA
+        metadata_path.write_bytes(orjson.dumps(metadata, option=self._json_options))
 
         print(f"[DataRecorder] Session duration: {metadata['duration']:.1f}s")
 
     def get_status(self) -> dict:
-        """Get current recording status."""
+        """
+        Get current recording status.
+
+        Once stopped, the status still names the directory and frame-aligned
+        JSON file (None if not written) of the last session.
+        """
         if not self.recording:
-            return {'recording': False}
+            if self._session_dir is None:
+                return {'recording': False}
+            return {
+                'recording': False,
+                'output_dir': str(self._session_dir),
+                'frame_aligned_json': self._aligned_json_file
+            }
 
         return {
             'recording': True,
@@ -0,0 +1,440 @@
+"""
+Input event log file formats.
+Events are streamed to a line-delimited JSON file while recording and saved
+as NumPy columns when recording stops; older sessions store them in a single
+inputs.json document.
+"""
+
+import mmap
+import os
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import orjson
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# One JSON-encoded event per line, appended while recording
+INPUTS_JSONL = "inputs.jsonl"
+# Columnar copy of all events, written at stop time (see save_event_columns)
+INPUTS_NPZ = "inputs.npz"
+# Small header written at stop time (total_events, duration)
+INPUTS_META = "inputs_meta.json"
+# Legacy single-document format ({'events': [...], ...})
+INPUTS_JSON = "inputs.json"
+# Legacy format compressed with zstd, written instead when zstandard is installed
+INPUTS_JSON_ZST = "inputs.json.zst"
+# Columns parsed from a JSON event log, reused while the log is unchanged
+INPUTS_CACHE = "inputs.cache.npz"
+# Bumped when the cached column layout changes, older caches are rebuilt
+CACHE_VERSION = 1
+# Session metadata, with an 'input_summary' of the event log
+SESSION_METADATA = "metadata.json"
+
+# Event type codes stored in the type column, indexes into EVENT_TYPES
+KEY_PRESS = 0
+KEY_RELEASE = 1
+MOUSE_MOVE = 2
+MOUSE_PRESS = 3
+MOUSE_RELEASE = 4
+MOUSE_SCROLL = 5
+
+EVENT_TYPES = ('key_press', 'key_release', 'mouse_move',
+               'mouse_press', 'mouse_release', 'mouse_scroll')
+
+# Integer arguments stored per event: x, y, a, b
+#   key events:    0, 0, key index, 0
+#   mouse move:    x, y, 0, 0
+#   press/release: x, y, button index, 0
+#   scroll:        x, y, dx, dy
+ARGS_PER_EVENT = 4
+
+
+def has_event_log(session_dir: Path) -> bool:
+    """Check whether a session directory contains recorded input events."""
+    session_dir = Path(session_dir)
+    return any((session_dir / name).exists()
+               for name in (INPUTS_NPZ, INPUTS_JSONL, INPUTS_JSON, INPUTS_JSON_ZST))
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Serialize a single event as one NDJSON line."""
+    return orjson.dumps(event) + b'\n'
+
+
+def make_event(timestamp: float, event_type: str, x: int, y: int, a: int, b: int,
+               keys: List[Tuple[Optional[str], str]], buttons: List[str]) -> Dict[str, Any]:
+    """
+    Build the event dictionary for one row of event columns.
+
+    Args:
+        timestamp: Seconds since recording started
+        event_type: Event type name
+        x, y, a, b: Integer arguments of the row (see save_event_columns)
+        keys: Interned (key, key_id) pairs indexed by `a` in key events
+        buttons: Interned button names indexed by `a` in click events
+
+    Returns:
+        Event dictionary as stored in the JSON event logs
+    """
+    if event_type == 'mouse_move':
+        data = {'x': x, 'y': y}
+    elif event_type == 'key_press' or event_type == 'key_release':
+        key_char, key_id = keys[a]
+        data = {'key': key_char, 'key_id': key_id}
+    elif event_type == 'mouse_scroll':
+        data = {'x': x, 'y': y, 'dx': a, 'dy': b}
+    else:
+        data = {'x': x, 'y': y, 'button': buttons[a]}
+
+    return {
+        'timestamp': timestamp,
+        'type': event_type,
+        'data': data
+    }
+
+
+def _column_arrays(columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Convert recorder-style event columns to the NumPy arrays stored in inputs.npz."""
+    keys = columns['keys']
+    return {
+        'timestamps': np.frombuffer(columns['timestamps'], dtype=np.float64),
+        'types': np.frombuffer(columns['types'], dtype=np.uint8),
+        'args': np.frombuffer(columns['args'], dtype=np.int32).reshape(-1, ARGS_PER_EVENT),
+        'event_types': np.array(columns['event_types'], dtype=str),
+        # Keys without a character are stored with an empty one
+        'key_chars': np.array([key_char or '' for key_char, _ in keys], dtype=str),
+        'key_ids': np.array([key_id for _, key_id in keys], dtype=str),
+        'buttons': np.array(columns['buttons'], dtype=str)
+    }
+
+
+def save_event_columns(session_dir: Path, columns: Dict[str, Any]):
+    """
+    Save recorded event columns to inputs.npz.
+
+    Args:
+        session_dir: Path to recorded session directory
+        columns: Event columns as returned by InputRecorder.get_columns().
+            Each event row has a timestamp, a type code indexing
+            'event_types', and ARGS_PER_EVENT integer arguments (see above)
+    """
+    np.savez_compressed(Path(session_dir) / INPUTS_NPZ, **_column_arrays(columns))
+
+
+def events_to_columns(events: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Pack event dictionaries into event columns, one event at a time.
+
+    Events of unknown types, or missing the fields of their type, are
+    skipped.
+
+    Args:
+        events: Event dictionaries, e.g. from iter_events()
+
+    Returns:
+        Column arrays in the inputs.npz layout, with EVENT_TYPES codes
+    """
+    codes = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+    timestamps = array('d')
+    types = array('B')
+    args = array('i')
+    key_index = {}
+    button_index = {}
+    skipped = 0
+
+    for event in events:
+        try:
+            code = codes.get(event['type'])
+            if code is None:
+                skipped += 1
+                continue
+
+            data = event['data']
+            if code == MOUSE_MOVE:
+                row = (int(data['x']), int(data['y']), 0, 0)
+            elif code == KEY_PRESS or code == KEY_RELEASE:
+                key = (data.get('key'), str(data['key_id']))
+                row = (0, 0, key_index.setdefault(key, len(key_index)), 0)
+            elif code == MOUSE_SCROLL:
+                row = (int(data['x']), int(data['y']), int(data['dx']), int(data['dy']))
+            else:
+                button = button_index.setdefault(str(data['button']), len(button_index))
+                row = (int(data['x']), int(data['y']), button, 0)
+            timestamp = float(event['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+
+        timestamps.append(timestamp)
+        types.append(code)
+        args.extend(row)
+
+    if skipped:
+        print(f"[EventLog] Skipped {skipped} malformed events")
+
+    # Dicts keep insertion order, which is the index order
+    return _column_arrays({
+        'timestamps': timestamps,
+        'types': types,
+        'args': args,
+        'event_types': EVENT_TYPES,
+        'keys': list(key_index),
+        'buttons': list(button_index)
+    })
+
+
+def load_event_columns(session_dir: Path) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Load the event columns saved by save_event_columns.
+
+    Args:
+        session_dir: Path to recorded session directory
+
+    Returns:
+        Dictionary of column arrays, or None if the session has no inputs.npz
+    """
+    npz_path = Path(session_dir) / INPUTS_NPZ
+    if not npz_path.exists():
+        return None
+
+    with np.load(npz_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def iter_events_from_columns(columns: Dict[str, np.ndarray]) -> Iterator[Dict[str, Any]]:
+    """Build event dictionaries from loaded event columns, one at a time."""
+    event_types = columns['event_types'].tolist()
+    keys = [(key_char or None, key_id) for key_char, key_id
+            in zip(columns['key_chars'].tolist(), columns['key_ids'].tolist())]
+    buttons = columns['buttons'].tolist()
+
+    for timestamp, code, row in zip(columns['timestamps'].tolist(),
+                                    columns['types'].tolist(),
+                                    columns['args'].tolist()):
+        yield make_event(timestamp, event_types[code], *row, keys, buttons)
+
+
+@contextmanager
+def _map_file(path: Path):
+    """Map a file read-only so it is parsed from the page cache without a copy."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _iter_lines(buf) -> Iterator[Dict[str, Any]]:
+    """
+    Parse the non-empty lines of an NDJSON buffer one at a time.
+
+    A last line that does not decode is dropped with a warning: it is the
+    event being written when a recording was interrupted.
+    """
+    size = len(buf)
+    view = memoryview(buf)
+    try:
+        start = 0
+        while start < size:
+            stop = buf.find(b'\n', start)
+            if stop < 0:
+                stop = size
+            if stop > start:
+                try:
+                    event = orjson.loads(view[start:stop])
+                except orjson.JSONDecodeError:
+                    if buf[stop:size].strip():
+                        raise
+                    print(f"[EventLog] Dropped truncated last event at byte {start}")
+                    return
+                yield event
+            start = stop + 1
+    finally:
+        # The map cannot be closed while a view is still exported
+        view.release()
+
+
+def iter_events(session_dir: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the input events of a session without holding them all.
+
+    The event log is read one event at a time: NDJSON line by line, and the
+    legacy inputs.json incrementally with ijson when it is installed
+    (inputs.json.zst is decompressed as a stream into it).
+
+    Args:
+        session_dir: Path to recorded session directory
+
+    Yields:
+        Event dictionaries with timestamps, in recording order
+
+    Raises:
+        FileNotFoundError: If the session has no event log (on first iteration)
+    """
+    session_dir = Path(session_dir)
+
+    columns = load_event_columns(session_dir)
+    if columns is not None:
+        yield from iter_events_from_columns(columns)
+        return
+
+    jsonl_path = session_dir / INPUTS_JSONL
+    if jsonl_path.exists():
+        with _map_file(jsonl_path) as buf:
+            yield from _iter_lines(buf)
+        return
+
+    json_path = session_dir / INPUTS_JSON
+    if json_path.exists():
+        if IJSON_AVAILABLE:
+            with open(json_path, 'rb') as f:
+                yield from ijson.items(f, 'events.item', use_float=True)
+        else:
+            with _map_file(json_path) as buf:
+                with memoryview(buf) as view:
+                    data = orjson.loads(view)
+            yield from data.get('events', [])
+        return
+
+    zst_path = session_dir / INPUTS_JSON_ZST
+    if zst_path.exists():
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstandard is required to read " + zst_path.name)
+        with open(zst_path, 'rb') as f:
+            if IJSON_AVAILABLE:
+                with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                    yield from ijson.items(reader, 'events.item', use_float=True)
+            else:
+                data = orjson.loads(zstandard.ZstdDecompressor().stream_reader(f).read())
+                yield from data.get('events', [])
+        return
+
+    raise FileNotFoundError(f"Inputs file not found: {jsonl_path}")
+
+
+def load_events(session_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Load all input events of a session.
+
+    Args:
+        session_dir: Path to recorded session directory
+
+    Returns:
+        List of event dictionaries with timestamps
+    """
+    return list(iter_events(session_dir))
+
+
+def _load_cached_columns(session_dir: Path) -> Dict[str, np.ndarray]:
+    """
+    Parse the JSON event log of a session into columns, through INPUTS_CACHE.
+
+    The cache is used when it is at least as recent as the event log and
+    has the current CACHE_VERSION, otherwise the log is parsed and the
+    cache rewritten.
+    """
+    session_dir = Path(session_dir)
+    cache_path = session_dir / INPUTS_CACHE
+    log_path = next((session_dir / name for name in (INPUTS_JSONL, INPUTS_JSON, INPUTS_JSON_ZST)
+                     if (session_dir / name).exists()), session_dir / INPUTS_JSONL)
+
+    if (cache_path.exists() and log_path.exists()
+            and cache_path.stat().st_mtime >= log_path.stat().st_mtime):
+        with np.load(cache_path) as data:
+            if 'version' in data.files and int(data['version']) == CACHE_VERSION:
+                return {name: data[name] for name in data.files if name != 'version'}
+
+    columns = events_to_columns(iter_events(session_dir))
+    try:
+        np.savez(cache_path, version=np.uint8(CACHE_VERSION), **columns)
+    except OSError as e:
+        print(f"[EventLog] Could not write {INPUTS_CACHE}: {e}")
+    return columns
+
+
+def read_event_columns(session_dir: Path) -> Dict[str, np.ndarray]:
+    """
+    Load the events of a session as columns, whatever format they were saved in.
+
+    Type codes are remapped to EVENT_TYPES order, so callers can compare
+    them against KEY_PRESS, MOUSE_MOVE, etc. Sessions without inputs.npz
+    are parsed once and cached in inputs.cache.npz.
+
+    Args:
+        session_dir: Path to recorded session directory
+
+    Returns:
+        Column arrays in the inputs.npz layout
+    """
+    columns = load_event_columns(session_dir)
+    if columns is None:
+        return _load_cached_columns(session_dir)
+
+    # Code lookup from the file's type names to EVENT_TYPES, unknown names
+    # map past the end and are dropped below
+    remap = np.array([EVENT_TYPES.index(name) if name in EVENT_TYPES else len(EVENT_TYPES)
+                      for name in columns['event_types'].tolist()], dtype=np.uint8)
+    types = columns['types']
+    valid = types < len(remap)
+    columns['types'] = np.full(len(types), len(EVENT_TYPES), dtype=np.uint8)
+    columns['types'][valid] = remap[types[valid]]
+    columns['event_types'] = np.array(EVENT_TYPES, dtype=str)
+    return _drop_invalid_rows(columns)
+
+
+def _drop_invalid_rows(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Drop event rows whose type code or key/button index is out of range.
+
+    Replay dispatches rows without checking them, so bad rows are
+    rejected once here.
+    """
+    types = columns['types']
+    index = columns['args'][:, 2] if len(types) else np.empty(0, dtype=np.int32)
+    is_key = (types == KEY_PRESS) | (types == KEY_RELEASE)
+    is_click = (types == MOUSE_PRESS) | (types == MOUSE_RELEASE)
+
+    valid = types < len(EVENT_TYPES)
+    valid &= ~is_key | ((index >= 0) & (index < len(columns['key_ids'])))
+    valid &= ~is_click | ((index >= 0) & (index < len(columns['buttons'])))
+    if valid.all():
+        return columns
+
+    print(f"[EventLog] Skipped {int((~valid).sum())} malformed events")
+    for name in ('timestamps', 'types', 'args'):
+        columns[name] = columns[name][valid]
+    return columns
+
+
+def load_input_summary(session_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the cached event log summary from the session metadata.
+
+    Args:
+        session_dir: Path to recorded session directory
+
+    Returns:
+        Dictionary with total_events, duration and event_counts, or None
+        if the session was recorded without a summary
+    """
+    metadata_path = Path(session_dir) / SESSION_METADATA
+    if not metadata_path.exists():
+        return None
+
+    return orjson.loads(metadata_path.read_bytes()).get('input_summary')
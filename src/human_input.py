@@ -8,18 +8,36 @@ down mouse movements into smaller steps.
 
 import ctypes
 import time
-import random
 import math
+import numpy as np
 from src.windows_input import WindowsInput
+from src.precise_timing import high_resolution_sleep, wait_until
+
+# Movements whose pauses add up to less than one frame are sent as a
+# single SendInput batch: the game cannot observe the intermediate steps
+BATCH_MAX_DURATION = 1 / 60
+
+# Humanized moves are split into one step per STEP_LENGTH pixels, at most MAX_STEPS
+STEP_LENGTH = 15
+MAX_STEPS = 20
+
+# Reaction-time pauses are drawn in blocks of this many values
+JITTER_BUFFER_SIZE = 1024
 
 class HumanizedWindowsInput(WindowsInput):
     """
     Handles keyboard and mouse input using Windows SendInput API with a touch of humanity.
     """
 
+    __slots__ = ('_rng', '_jitter', '_jitter_index')
+
     def __init__(self):
         """Initialize the humanized Windows input handler."""
         super().__init__()
+        # Private generator: no shared global RNG state on the input path
+        self._rng = np.random.default_rng()
+        self._jitter = []
+        self._jitter_index = 0
 
     def key_down(self, key_str: str):
         """
@@ -59,38 +77,62 @@ class HumanizedWindowsInput(WindowsInput):
         if dx == 0 and dy == 0:
             return
 
-        total_distance = math.sqrt(dx**2 + dy**2)
-        
-        # Determine the number of steps based on the distance
-        # For very short distances, a single step is fine. For longer, more steps.
-        num_steps = max(1, min(20, int(total_distance / 15)))
-
-        if num_steps == 1:
+        # For very short distances, a single step is fine. Compare squared
+        # lengths so the common small nudge skips the sqrt and step logic.
+        if dx * dx + dy * dy < (2 * STEP_LENGTH) ** 2:
             super().mouse_move_relative(dx, dy)
             self._human_pause()
             return
 
-        step_dx = dx / num_steps
-        step_dy = dy / num_steps
-        
-        for i in range(num_steps):
-            # Add some randomness to each step to make the path less linear
-            noise_x = random.uniform(-1.5, 1.5)
-            noise_y = random.uniform(-1.5, 1.5)
-
-            # Move one step
-            super().mouse_move_relative(step_dx + noise_x, step_dy + noise_y)
-
-            # The duration of the pause can depend on the number of steps
-            # to keep the total movement time somewhat consistent.
-            # A longer movement should take a bit longer.
-            sleep_duration = random.uniform(0.001, 0.005) * (total_distance / 100)
-            sleep_duration = min(0.01, sleep_duration) # cap sleep time
-            if sleep_duration > 0.001:
-                time.sleep(sleep_duration)
+        total_distance = math.sqrt(dx**2 + dy**2)
+
+        # Determine the number of steps based on the distance: longer, more steps.
+        num_steps = min(MAX_STEPS, int(total_distance / STEP_LENGTH))
+
+        # Noisy path to the target, drawn in one go. Rounding the cumulative
+        # positions (rather than each step) keeps the integer deltas summing
+        # exactly to (dx, dy).
+        steps = self._rng.uniform(-1.5, 1.5, (num_steps, 2)) + (dx / num_steps, dy / num_steps)
+        path = np.cumsum(steps, axis=0)
+        path[-1] = (dx, dy)
+        deltas = np.diff(np.rint(path).astype(np.int64), axis=0, prepend=0).tolist()
+
+        # The duration of the pause can depend on the number of steps
+        # to keep the total movement time somewhat consistent.
+        # A longer movement should take a bit longer.
+        pauses = self._rng.uniform(0.001, 0.005, num_steps) * (total_distance / 100)
+        pauses = np.minimum(pauses, 0.01)  # cap sleep time
+        pauses[pauses <= 0.001] = 0.0
+        pauses_ns = (pauses * 1e9).astype(np.int64)
+
+        total_pause = float(pauses.sum())
+        if total_pause < BATCH_MAX_DURATION:
+            if total_pause:
+                wait_until(time.perf_counter_ns() + int(pauses_ns.sum()))
+            with self.batch():
+                for step_x, step_y in deltas:
+                    super().mouse_move_relative(step_x, step_y)
+            return
+
+        # One high-resolution timer for all the pauses of the movement
+        with high_resolution_sleep() as sleep:
+            deadline = time.perf_counter_ns()
+            for (step_x, step_y), pause in zip(deltas, pauses_ns.tolist()):
+                # Move one step
+                super().mouse_move_relative(step_x, step_y)
+
+                if pause:
+                    deadline = max(deadline, time.perf_counter_ns()) + pause
+                    wait_until(deadline, sleep=sleep)
 
     def _human_pause(self):
         """
         A short, random pause to simulate human reaction time.
         """
-        time.sleep(random.uniform(0.01, 0.04))
+        if self._jitter_index >= len(self._jitter):
+            self._jitter = self._rng.uniform(0.01, 0.04, JITTER_BUFFER_SIZE).tolist()
+            self._jitter_index = 0
+
+        pause = self._jitter[self._jitter_index]
+        self._jitter_index += 1
+        time.sleep(pause)
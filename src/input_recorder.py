@@ -5,36 +5,97 @@ Captures all keyboard and mouse inputs with precise timestamps.
 
 import time
 import threading
-from queue import Queue
-from typing import Optional, List, Dict, Any
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Optional, Tuple
 from pynput import keyboard, mouse
 
+from .event_log import (KEY_PRESS, KEY_RELEASE, MOUSE_MOVE, MOUSE_PRESS, MOUSE_RELEASE,
+                        MOUSE_SCROLL, EVENT_TYPES, ARGS_PER_EVENT, make_event)
+from .thread_priority import boost_thread
+
+# Names of the common mouse buttons, other buttons fall back to Button.name
+_BUTTON_NAMES = {
+    mouse.Button.left: 'left',
+    mouse.Button.right: 'right',
+    mouse.Button.middle: 'middle',
+}
+
+# Mouse moves closer than both thresholds to the last recorded move are
+# coalesced into the next one (seconds, pixels of Chebyshev distance)
+MOVE_MIN_INTERVAL = 1 / 240
+MOVE_MIN_DIST = 4
+
 
 class InputRecorder:
     """Records keyboard and mouse inputs with timestamps."""
 
-    def __init__(self):
-        """Initialize input recorder."""
+    def __init__(self, move_min_interval: float = MOVE_MIN_INTERVAL,
+                 move_min_dist: int = MOVE_MIN_DIST):
+        """
+        Initialize input recorder.
+
+        Args:
+            move_min_interval: Minimum time between recorded mouse moves (0 = record all)
+            move_min_dist: Distance in pixels that records a mouse move sooner
+        """
         self.recording = False
-        self.events_queue = Queue()
-        self.events_list = []  # Store all events chronologically
+        self.move_min_interval = move_min_interval
+        self.move_min_dist = move_min_dist
+        self._reset_events()
 
         self._keyboard_listener = None
         self._mouse_listener = None
         self._start_time = None
 
+        # Keyboard and mouse callbacks run on separate listener threads
+        self._lock = threading.Lock()
+
         # Track current state
         self._pressed_keys = set()
         self._mouse_position = (0, 0)
         self._mouse_buttons = set()
 
+    def _reset_events(self):
+        """
+        Clear the event store.
+
+        Events are kept as parallel columns (struct of arrays) rather than one
+        dict per event, so a listener callback only appends a few scalars.
+        Dicts are built on demand by get_events().
+        """
+        self._ts = array('d')
+        self._type = array('B')
+        self._args = array('i')
+        # Events recorded per type code
+        self._type_counts = [0] * len(EVENT_TYPES)
+        # Row index of every mouse move, for position lookups by time
+        self._move_rows = array('q')
+
+        # Interned pynput key objects, their (key, key_id) strings resolved
+        # lazily off the listener threads, and interned button names
+        self._keys = []
+        self._key_index = {}
+        self._key_names = []
+        self._button_names = []
+        self._button_index = {}
+
+        # Last recorded mouse move and the latest one coalesced into it
+        self._last_move_t = float('-inf')
+        self._last_move_xy = (0, 0)
+        self._pending_move = None
+
+    def __len__(self) -> int:
+        """Number of recorded events."""
+        return len(self._type)
+
     def start(self):
         """Start recording inputs."""
         if self.recording:
             return
 
         self.recording = True
-        self.events_list = []
+        self._reset_events()
         self._pressed_keys = set()
         self._mouse_buttons = set()
         self._start_time = time.time()
@@ -54,6 +115,11 @@ class InputRecorder:
         )
         self._mouse_listener.start()
 
+        # Listener callbacks run inside the OS input hooks, raise their
+        # priority so the game does not delay them
+        boost_thread(self._keyboard_listener.native_id)
+        boost_thread(self._mouse_listener.native_id)
+
         print("[InputRecorder] Started recording inputs")
 
     def stop(self):
@@ -72,60 +138,95 @@ class InputRecorder:
             self._mouse_listener.stop()
             self._mouse_listener = None
 
-        print(f"[InputRecorder] Stopped. Recorded {len(self.events_list)} events")
+        # Keep the final cursor position
+        with self._lock:
+            self._flush_pending_move()
+
+        print(f"[InputRecorder] Stopped. Recorded {len(self)} events")
 
     def _get_timestamp(self) -> float:
         """Get relative timestamp since recording started."""
         return time.time() - self._start_time
 
-    def _add_event(self, event_type: str, data: Dict[str, Any]):
-        """Add an event with timestamp."""
-        event = {
-            'timestamp': self._get_timestamp(),
-            'type': event_type,
-            'data': data
-        }
-        self.events_list.append(event)
-        self.events_queue.put(event)
+    def _append(self, timestamp: float, event_type: int, x: int, y: int, a: int, b: int):
+        """Append one event row to the columns. Caller holds the lock."""
+        if event_type == MOUSE_MOVE:
+            self._move_rows.append(len(self._type))
+        self._ts.append(timestamp)
+        self._type.append(event_type)
+        self._type_counts[event_type] += 1
+        self._args.extend((x, y, a, b))
+
+    def _flush_pending_move(self):
+        """Record the coalesced mouse move, if any. Caller holds the lock."""
+        pending = self._pending_move
+        if pending is not None:
+            self._pending_move = None
+            timestamp, x, y = pending
+            self._last_move_t = timestamp
+            self._last_move_xy = (x, y)
+            self._append(timestamp, MOUSE_MOVE, x, y, 0, 0)
+
+    def _add_event(self, event_type: int, x: int = 0, y: int = 0, a: int = 0, b: int = 0):
+        """Append an event with timestamp to the columns."""
+        timestamp = self._get_timestamp()
+        with self._lock:
+            # A coalesced move happened before this event, record it first
+            self._flush_pending_move()
+            self._append(timestamp, event_type, x, y, a, b)
+
+    def _intern_key(self, key) -> int:
+        """Get the index of a pynput key, adding it if new."""
+        index = self._key_index.get(key)
+        if index is None:
+            with self._lock:
+                index = self._key_index.setdefault(key, len(self._keys))
+                if index == len(self._keys):
+                    self._keys.append(key)
+        return index
+
+    def _resolve_key_names(self) -> List[Tuple[Optional[str], str]]:
+        """
+        Get the (key, key_id) strings of every interned key. Caller holds the lock.
+
+        Strings are only built here, once per key, so the listener
+        callbacks never format keys.
+        """
+        names = self._key_names
+        for key in self._keys[len(names):]:
+            # Character keys carry a char, special keys (Key.*) do not
+            key_char = key.char if isinstance(key, keyboard.KeyCode) else str(key)
+            names.append((key_char, str(key)))
+        return names
+
+    def _intern_button(self, button_name: str) -> int:
+        """Get the index of a mouse button name, adding it if new."""
+        index = self._button_index.get(button_name)
+        if index is None:
+            with self._lock:
+                index = self._button_index.setdefault(button_name, len(self._button_names))
+                if index == len(self._button_names):
+                    self._button_names.append(button_name)
+        return index
 
     def _on_key_press(self, key):
         """Callback for key press events."""
         if not self.recording:
             return
 
-        try:
-            # Try to get character
-            key_char = key.char if hasattr(key, 'char') else str(key)
-        except:
-            key_char = str(key)
-
-        key_id = str(key)
-
-        if key_id not in self._pressed_keys:
-            self._pressed_keys.add(key_id)
-            self._add_event('key_press', {
-                'key': key_char,
-                'key_id': key_id
-            })
+        # Key objects are hashable, held keys are tracked without formatting them
+        if key not in self._pressed_keys:
+            self._pressed_keys.add(key)
+            self._add_event(KEY_PRESS, a=self._intern_key(key))
 
     def _on_key_release(self, key):
         """Callback for key release events."""
         if not self.recording:
             return
 
-        try:
-            key_char = key.char if hasattr(key, 'char') else str(key)
-        except:
-            key_char = str(key)
-
-        key_id = str(key)
-
-        if key_id in self._pressed_keys:
-            self._pressed_keys.discard(key_id)
-            self._add_event('key_release', {
-                'key': key_char,
-                'key_id': key_id
-            })
+        if key in self._pressed_keys:
+            self._pressed_keys.discard(key)
+            self._add_event(KEY_RELEASE, a=self._intern_key(key))
 
     def _on_mouse_move(self, x, y):
         """Callback for mouse movement."""
@@ -133,44 +234,42 @@ class InputRecorder:
             return
 
         self._mouse_position = (x, y)
-        self._add_event('mouse_move', {
-            'x': x,
-            'y': y
-        })
+        x, y = int(x), int(y)
+        timestamp = self._get_timestamp()
+
+        with self._lock:
+            last_x, last_y = self._last_move_xy
+            if (timestamp - self._last_move_t < self.move_min_interval
+                    and max(abs(x - last_x), abs(y - last_y)) < self.move_min_dist):
+                # Too close to the last recorded move, only keep the latest position
+                self._pending_move = (timestamp, x, y)
+                return
+
+            self._pending_move = None
+            self._last_move_t = timestamp
+            self._last_move_xy = (x, y)
+            self._append(timestamp, MOUSE_MOVE, x, y, 0, 0)
 
     def _on_mouse_click(self, x, y, button, pressed):
         """Callback for mouse clicks."""
         if not self.recording:
             return
 
-        button_name = str(button).split('.')[-1]  # Extract button name
+        button_name = _BUTTON_NAMES.get(button) or button.name
 
         if pressed:
             self._mouse_buttons.add(button_name)
-            self._add_event('mouse_press', {
-                'x': x,
-                'y': y,
-                'button': button_name
-            })
+            self._add_event(MOUSE_PRESS, int(x), int(y), self._intern_button(button_name))
         else:
             self._mouse_buttons.discard(button_name)
-            self._add_event('mouse_release', {
-                'x': x,
-                'y': y,
-                'button': button_name
-            })
+            self._add_event(MOUSE_RELEASE, int(x), int(y), self._intern_button(button_name))
 
     def _on_mouse_scroll(self, x, y, dx, dy):
         """Callback for mouse scroll."""
         if not self.recording:
             return
 
-        self._add_event('mouse_scroll', {
-            'x': x,
-            'y': y,
-            'dx': dx,
-            'dy': dy
-        })
+        self._add_event(MOUSE_SCROLL, int(x), int(y), int(dx), int(dy))
 
     def get_events(self) -> List[Dict[str, Any]]:
         """
@@ -179,7 +278,48 @@ class InputRecorder:
         Returns:
             List of event dictionaries with timestamps
         """
-        return self.events_list.copy()
+        return self.get_events_since(0)
+
+    def get_events_since(self, start: int) -> List[Dict[str, Any]]:
+        """
+        Get events recorded after a given index.
+
+        Args:
+            start: Number of events already consumed by the caller
+
+        Returns:
+            List of event dictionaries from index `start` onwards
+        """
+        # Snapshot the columns so they stay aligned while listeners append
+        with self._lock:
+            ts = self._ts[start:]
+            types = self._type[start:]
+            args = self._args[start * ARGS_PER_EVENT:(start + len(types)) * ARGS_PER_EVENT]
+            keys = self._resolve_key_names()
+            buttons = self._button_names
+
+        rows = iter(args)
+        return [make_event(timestamp, EVENT_TYPES[event_type], *row, keys, buttons)
+                for timestamp, event_type, row in zip(ts, types, zip(rows, rows, rows, rows))]
+
+    def get_columns(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the event columns.
+
+        Returns:
+            Dictionary with the 'timestamps', 'types' and flat 'args' arrays,
+            the 'event_types' names of the type codes, and the interned
+            'keys' ((key, key_id) pairs) and 'buttons' names
+        """
+        with self._lock:
+            return {
+                'timestamps': self._ts[:],
+                'types': self._type[:],
+                'args': self._args[:],
+                'event_types': EVENT_TYPES,
+                'keys': list(self._resolve_key_names()),
+                'buttons': list(self._button_names)
+            }
 
     def get_state_at_time(self, timestamp: float) -> Dict[str, Any]:
         """
@@ -197,33 +337,45 @@ class InputRecorder:
             'mouse_buttons': set()
         }
 
-        # Replay events up to timestamp to reconstruct state
-        for event in self.events_list:
-            if event['timestamp'] > timestamp:
-                break
-
-            if event['type'] == 'key_press':
-                state['pressed_keys'].add(event['data']['key_id'])
-            elif event['type'] == 'key_release':
-                state['pressed_keys'].discard(event['data']['key_id'])
-            elif event['type'] == 'mouse_move':
-                state['mouse_position'] = (event['data']['x'], event['data']['y'])
-            elif event['type'] == 'mouse_press':
-                state['mouse_buttons'].add(event['data']['button'])
-            elif event['type'] == 'mouse_release':
-                state['mouse_buttons'].discard(event['data']['button'])
+        # Timestamps are recorded in order, so the events at or before
+        # `timestamp` are the first `end` rows
+        with self._lock:
+            end = bisect_right(self._ts, timestamp)
+            last_move = bisect_left(self._move_rows, end) - 1
+            key_names = self._resolve_key_names()
+
+        args = self._args
+        if last_move >= 0:
+            base = self._move_rows[last_move] * ARGS_PER_EVENT
+            state['mouse_position'] = (args[base], args[base + 1])
+
+        # Replay key and button events up to timestamp to reconstruct state
+        types = self._type
+        for i in range(end):
+            event_type = types[i]
+            if event_type == MOUSE_MOVE or event_type == MOUSE_SCROLL:
+                continue
+
+            index = args[i * ARGS_PER_EVENT + 2]
+            if event_type == KEY_PRESS:
+                state['pressed_keys'].add(key_names[index][1])
+            elif event_type == KEY_RELEASE:
+                state['pressed_keys'].discard(key_names[index][1])
+            elif event_type == MOUSE_PRESS:
+                state['mouse_buttons'].add(self._button_names[index])
+            elif event_type == MOUSE_RELEASE:
+                state['mouse_buttons'].discard(self._button_names[index])
 
         return state
 
     def get_stats(self) -> dict:
         """Get recording statistics."""
-        event_counts = {}
-        for event in self.events_list:
-            event_type = event['type']
-            event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        # Counted as events are appended, no scan of the type column
+        event_counts = {event_type: count
+                        for event_type, count in zip(EVENT_TYPES, self._type_counts) if count}
 
         return {
-            'total_events': len(self.events_list),
+            'total_events': len(self),
             'event_counts': event_counts,
             'currently_pressed_keys': len(self._pressed_keys),
             'currently_pressed_buttons': len(self._mouse_buttons)
@@ -0,0 +1,120 @@
+"""
+High-resolution sleeping on Windows.
+The default system timer tick is 15.6 ms, so a plain time.sleep can
+overshoot short waits by a whole tick. No-ops outside Windows.
+"""
+
+import ctypes
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+@contextmanager
+def timer_resolution(period_ms: int = 1):
+    """
+    Raise the Windows system timer resolution so short sleeps wake on time.
+
+    The default tick is 15.6 ms. The setting is process-global (system-wide
+    on older Windows), so it is only held around timing-sensitive work.
+    """
+    winmm = ctypes.windll.winmm if platform.system() == 'Windows' else None
+    if winmm:
+        winmm.timeBeginPeriod(period_ms)
+    try:
+        yield
+    finally:
+        if winmm:
+            winmm.timeEndPeriod(period_ms)
+
+
+def sleep_ns(duration_ns: int):
+    """Sleep for a duration in nanoseconds with time.sleep."""
+    time.sleep(duration_ns / 1e9)
+
+
+# CreateWaitableTimerExW flag (Windows 10 1803+) and access rights
+CREATE_WAITABLE_TIMER_HIGH_RESOLUTION = 0x00000002
+TIMER_ALL_ACCESS = 0x1F0003
+INFINITE = 0xFFFFFFFF
+
+
+@contextmanager
+def high_resolution_sleep() -> Iterator[Callable[[int], None]]:
+    """
+    Get a sleep function backed by a high-resolution waitable timer.
+
+    Such timers wake within ~0.5 ms regardless of the system timer tick.
+    Python 3.11+ already sleeps on one in time.sleep, older versions and
+    other platforms get plain time.sleep.
+
+    Yields:
+        Function sleeping for a duration in nanoseconds
+    """
+    if platform.system() != 'Windows' or sys.version_info >= (3, 11):
+        yield sleep_ns
+        return
+
+    kernel32 = ctypes.windll.kernel32
+    timer = kernel32.CreateWaitableTimerExW(None, None, CREATE_WAITABLE_TIMER_HIGH_RESOLUTION,
+                                            TIMER_ALL_ACCESS)
+    if not timer:
+        # Windows before 1803 has no high-resolution timers
+        yield sleep_ns
+        return
+
+    def sleep(duration_ns: int):
+        # Negative due time is relative, in 100 ns units
+        due = ctypes.c_longlong(-(duration_ns // 100))
+        if kernel32.SetWaitableTimer(timer, ctypes.byref(due), 0, None, None, False):
+            kernel32.WaitForSingleObject(timer, INFINITE)
+        else:
+            sleep_ns(duration_ns)
+
+    try:
+        yield sleep
+    finally:
+        kernel32.CloseHandle(timer)
+
+
+# Waits end with this long (ns) spinning on perf_counter_ns, shorter than
+# the timers above can reliably wake within
+SPIN_THRESHOLD_NS = 2_000_000
+
+# Waits longer than this (ns) block on the stop event until this much
+# before the deadline, so setting it ends them at once; the rest is slept
+# on the high-resolution timer
+STOP_WAIT_MARGIN_NS = 20_000_000
+
+
+def wait_until(deadline_ns: int, spin_ns: int = SPIN_THRESHOLD_NS,
+               sleep: Optional[Callable[[int], None]] = None,
+               stop: Optional[threading.Event] = None):
+    """
+    Sleep until shortly before a perf_counter_ns deadline, then spin to it.
+
+    Args:
+        deadline_ns: perf_counter_ns value to wait for
+        spin_ns: Final part of the wait (ns) spent spinning instead of sleeping,
+            0 sleeps the whole wait
+        sleep: Function from high_resolution_sleep(), for callers waiting in
+            a loop; None opens a timer for this wait only
+        stop: Event ending the wait early when set
+    """
+    remaining = deadline_ns - time.perf_counter_ns()
+    if stop is not None and remaining > STOP_WAIT_MARGIN_NS:
+        # Blocked in the kernel until the event is set or the timeout expires
+        if stop.wait((remaining - STOP_WAIT_MARGIN_NS) / 1e9):
+            return
+        remaining = deadline_ns - time.perf_counter_ns()
+    if remaining > spin_ns:
+        if sleep is not None:
+            sleep(remaining - spin_ns)
+        else:
+            with high_resolution_sleep() as timer_sleep:
+                timer_sleep(remaining - spin_ns)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
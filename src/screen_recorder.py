@@ -1,22 +1,181 @@
 """
 Screen capture module for recording Star Citizen gameplay.
-Uses MSS for fast screen capture on Windows.
+Uses DXGI Desktop Duplication through dxcam when available, MSS otherwise.
 """
 
 import time
 import threading
-from queue import Queue
-from typing import Optional, Tuple
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+import cv2
 import numpy as np
 from mss import mss
-from PIL import Image
+
+from .thread_priority import boost_thread, last_core
+
+try:
+    import dxcam
+    DXCAM_AVAILABLE = True
+except ImportError:
+    DXCAM_AVAILABLE = False
+
+# A grabber returns the current screen as a BGRA uint8 array (height, width, 4)
+Grabber = Callable[[], np.ndarray]
+
+
+@contextmanager
+def _mss_grabber(monitor: int) -> Iterator[Grabber]:
+    """Grab a monitor with MSS (GDI BitBlt on Windows)."""
+    with mss() as sct:
+        monitor_info = sct.monitors[monitor]
+
+        def grab() -> np.ndarray:
+            screenshot = sct.grab(monitor_info)
+            # View the BGRA pixels in place, no copy
+            bgra = np.frombuffer(screenshot.raw, dtype=np.uint8)
+            return bgra.reshape(screenshot.height, screenshot.width, 4)
+
+        yield grab
+
+
+@contextmanager
+def _dxcam_grabber(monitor: int, timeout: float = 1.0) -> Iterator[Grabber]:
+    """
+    Grab a monitor with dxcam (DXGI Desktop Duplication).
+
+    dxcam only returns a frame when the screen changed, the previous
+    frame is repeated otherwise.
+    """
+    camera = dxcam.create(output_idx=monitor - 1, output_color='BGRA')
+    if camera is None:
+        raise RuntimeError(f"dxcam cannot capture monitor {monitor}")
+
+    try:
+        # Wait for the first frame so grab() always has one to return
+        last = camera.grab()
+        deadline = time.perf_counter() + timeout
+        while last is None:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("dxcam returned no frame")
+            time.sleep(0.005)
+            last = camera.grab()
+
+        def grab() -> np.ndarray:
+            nonlocal last
+            frame = camera.grab()
+            if frame is not None:
+                last = frame
+            return last
+
+        yield grab
+    finally:
+        camera.release()
+
+
+class FrameRingBuffer:
+    """
+    Preallocated single-producer / single-consumer ring of frame slots.
+
+    The capture thread fills the slot at `head` and publishes it by advancing
+    `head`; the consumer reads slots in [tail, head) and advances `tail`.
+    Each counter has exactly one writer, so no lock is needed.
+
+    Overflow policy: the producer never waits. When the consumer falls
+    behind by more than `capacity - GUARD` frames, either the oldest frames
+    are dropped and the consumer skips to frames the producer cannot reach
+    yet ('drop_oldest'), or the producer discards new frames until the
+    consumer catches up ('drop_newest'). The slot at `tail` belongs to the
+    consumer until it advances `tail`, so with either policy the producer
+    discards new frames rather than overwrite a frame still being written
+    out (e.g. while the ffmpeg pipe is stalled).
+    """
+
+    # Slots kept between the producer and the frame being read
+    GUARD = 2
+
+    DROP_POLICIES = ('drop_oldest', 'drop_newest')
+
+    def __init__(self, capacity: int, frame_shape: Tuple[int, ...], dtype=np.uint8,
+                 drop_policy: str = 'drop_oldest'):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity: Number of frame slots
+            frame_shape: Shape of a single frame (height, width, channels)
+            dtype: Pixel data type
+            drop_policy: Frames to discard when full ('drop_oldest', 'drop_newest')
+        """
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.capacity = max(capacity, self.GUARD + 2)
+        self.frames = np.empty((self.capacity,) + tuple(frame_shape), dtype=dtype)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.drop_policy = drop_policy
+        self.head = 0  # Written by the producer only
+        self.tail = 0  # Written by the consumer only
+        self.dropped = 0  # Oldest frames skipped by the consumer
+        self.dropped_newest = 0  # New frames discarded by the producer
+
+    def next_slot(self) -> Optional[np.ndarray]:
+        """
+        Get the slot the producer should fill next.
+
+        Returns:
+            The slot, or None if the ring is full and new frames are dropped
+        """
+        behind = self.head - self.tail
+        if (behind >= self.capacity
+                or (self.drop_policy == 'drop_newest' and behind >= self.capacity - self.GUARD)):
+            # The next slot is still held by the consumer (or would be soon)
+            self.dropped_newest += 1
+            return None
+        return self.frames[self.head % self.capacity]
+
+    def publish(self, timestamp: float):
+        """Make the slot returned by next_slot() visible to the consumer."""
+        self.timestamps[self.head % self.capacity] = timestamp
+        self.head += 1
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    def drain(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Yield every published frame, oldest first.
+
+        Frames are views into the ring and are only valid until the next
+        iteration, when their slot is handed back to the producer; it is not
+        written to before then.
+        """
+        limit = self.capacity - self.GUARD
+        while self.tail < self.head:
+            index = self.tail
+            behind = self.head - index
+            if behind > limit:
+                # Drop the oldest frames, they are about to be overwritten
+                self.dropped += behind - limit
+                self.tail = index + behind - limit
+                continue
+
+            slot = index % self.capacity
+            yield float(self.timestamps[slot]), self.frames[slot]
+            self.tail = index + 1
+
+
+# Smallest ring buffer, so low frame rates still ride out encoder stalls
+MIN_BUFFER_FRAMES = 60
 
 
 class ScreenRecorder:
     """Records screen frames with timestamps."""
 
     def __init__(self, monitor: int = 1, target_fps: int = 30,
-                 resolution: Optional[Tuple[int, int]] = None):
+                 resolution: Optional[Tuple[int, int]] = None,
+                 buffer_seconds: float = 2.0,
+                 drop_policy: str = 'drop_oldest',
+                 backend: str = 'auto'):
         """
         Initialize screen recorder.
 
@@ -24,19 +183,30 @@ class ScreenRecorder:
             monitor: Monitor number to capture (1 = primary)
             target_fps: Target frames per second
             resolution: Optional (width, height) to resize frames. None = native resolution
+            buffer_seconds: Seconds of frames the ring buffer holds
+            drop_policy: Frames to discard when the saver falls behind
+                ('drop_oldest' keeps the latest frames, 'drop_newest' keeps the earliest)
+            backend: Capture API ('auto' = dxcam if installed, 'dxcam', 'mss')
         """
         self.monitor = monitor
         self.target_fps = target_fps
         self.resolution = resolution
         self.frame_interval = 1.0 / target_fps
+        self.buffer_frames = max(MIN_BUFFER_FRAMES, int(target_fps * buffer_seconds))
+        self.drop_policy = drop_policy
+        self.backend = backend
 
         self.recording = False
-        self.frames_queue = Queue(maxsize=300)  # Buffer ~10s at 30fps
+        self.ring: Optional[FrameRingBuffer] = None  # Allocated on the first frame
+        self._scratch: Optional[np.ndarray] = None  # Intermediate frame when resizing
+        self._upscale = False
+        self._interpolation = cv2.INTER_AREA
         self.frame_count = 0
         self.dropped_frames = 0
 
+        self._frame_ready = threading.Event()
+        self._wake = threading.Event()  # Set by stop() to interrupt the capture wait
         self._capture_thread = None
-        self._start_time = None
 
     def start(self):
         """Start recording frames."""
@@ -44,9 +214,12 @@ class ScreenRecorder:
             return
 
         self.recording = True
+        self.ring = None
+        self._scratch = None
         self.frame_count = 0
         self.dropped_frames = 0
-        self._start_time = time.time()
+        self._frame_ready.clear()
+        self._wake.clear()
 
         self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self._capture_thread.start()
@@ -59,84 +232,138 @@ class ScreenRecorder:
             return
 
         self.recording = False
+        self._wake.set()
         if self._capture_thread:
             self._capture_thread.join(timeout=2.0)
 
+        ring = self.ring
+        dropped = self.dropped_frames + (ring.dropped + ring.dropped_newest if ring else 0)
         print(f"[ScreenRecorder] Stopped. Captured {self.frame_count} frames, "
-              f"dropped {self.dropped_frames} frames")
+              f"dropped {dropped} frames")
+
+    def _open_grabber(self, stack: ExitStack) -> Grabber:
+        """Open the configured capture backend on a stack, falling back to MSS."""
+        if self.backend == 'dxcam' or (self.backend == 'auto' and DXCAM_AVAILABLE):
+            try:
+                grab = stack.enter_context(_dxcam_grabber(self.monitor))
+                print("[ScreenRecorder] Capturing with dxcam")
+                return grab
+            except Exception as e:
+                print(f"[ScreenRecorder] dxcam unavailable ({e}), using MSS")
+
+        return stack.enter_context(_mss_grabber(self.monitor))
 
     def _capture_loop(self):
         """Main capture loop running in separate thread."""
-        with mss() as sct:
-            # Get monitor info
-            monitor_info = sct.monitors[self.monitor]
+        # Keep the game from preempting captures, on a core of our own
+        boost_thread(core=last_core())
+
+        with ExitStack() as stack:
+            grab = self._open_grabber(stack)
 
-            next_capture_time = time.time()
+            # Frame n is due at start + n * frame_interval on the monotonic clock
+            start = time.perf_counter()
+            frame_index = 0
 
             while self.recording:
-                current_time = time.time()
+                deadline = start + frame_index * self.frame_interval
 
-                # Check if it's time to capture next frame
-                if current_time >= next_capture_time:
-                    try:
-                        # Capture screenshot
-                        screenshot = sct.grab(monitor_info)
+                # Sleep until the deadline, stop() wakes the wait early
+                delay = deadline - time.perf_counter()
+                if delay > 0 and self._wake.wait(delay):
+                    break
 
-                        # Convert to numpy array
-                        frame = np.array(screenshot)
+                current_time = time.perf_counter()
+                try:
+                    # Capture screenshot
+                    bgra = grab()
+                    height, width = bgra.shape[:2]
 
-                        # Convert BGRA to RGB
-                        frame = frame[:, :, :3]  # Drop alpha channel
-                        frame = frame[:, :, [2, 1, 0]]  # BGR to RGB
+                    # Calculate relative timestamp
+                    timestamp = current_time - start
 
-                        # Resize if needed
+                    if self.ring is None:
                         if self.resolution:
-                            img = Image.fromarray(frame)
-                            img = img.resize(self.resolution, Image.Resampling.LANCZOS)
-                            frame = np.array(img)
-
-                        # Calculate relative timestamp
-                        timestamp = current_time - self._start_time
+                            shape = (self.resolution[1], self.resolution[0], 3)
+                            # Area averaging to downscale, Lanczos to upscale
+                            self._upscale = (self.resolution[0] > width
+                                             or self.resolution[1] > height)
+                            if self._upscale:
+                                self._interpolation = cv2.INTER_LANCZOS4
+                                self._scratch = np.empty((height, width, 3), dtype=np.uint8)
+                            else:
+                                self._interpolation = cv2.INTER_AREA
+                                self._scratch = np.empty(shape[:2] + (4,), dtype=np.uint8)
+                        else:
+                            shape = (height, width, 3)
+                        self.ring = FrameRingBuffer(self.buffer_frames, shape,
+                                                    drop_policy=self.drop_policy)
 
-                        # Add to queue
-                        if not self.frames_queue.full():
-                            self.frames_queue.put((timestamp, frame))
-                            self.frame_count += 1
+                    # Convert BGRA to RGB straight into the ring slot
+                    slot = self.ring.next_slot()
+                    if slot is not None:
+                        if self.resolution and self._upscale:
+                            cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB, dst=self._scratch)
+                            cv2.resize(self._scratch, self.resolution, dst=slot,
+                                       interpolation=self._interpolation)
+                        elif self.resolution:
+                            # Downscale first so the channel swap touches the small frame
+                            cv2.resize(bgra, self.resolution, dst=self._scratch,
+                                       interpolation=self._interpolation)
+                            cv2.cvtColor(self._scratch, cv2.COLOR_BGRA2RGB, dst=slot)
                         else:
-                            self.dropped_frames += 1
+                            cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB, dst=slot)
+                        self.ring.publish(timestamp)
+                        self.frame_count += 1
+                        self._frame_ready.set()
 
-                        # Schedule next capture
-                        next_capture_time += self.frame_interval
+                except Exception as e:
+                    print(f"[ScreenRecorder] Error capturing frame: {e}")
 
-                    except Exception as e:
-                        print(f"[ScreenRecorder] Error capturing frame: {e}")
-                        next_capture_time = current_time + self.frame_interval
-                else:
-                    # Sleep briefly to avoid busy waiting
-                    sleep_time = min(0.001, next_capture_time - current_time)
-                    if sleep_time > 0:
-                        time.sleep(sleep_time)
+                # Schedule next capture. When more than a frame behind, skip
+                # the missed deadlines instead of capturing them back to back.
+                frame_index += 1
+                behind = time.perf_counter() - start - frame_index * self.frame_interval
+                if behind > self.frame_interval:
+                    skipped = int(behind / self.frame_interval)
+                    self.dropped_frames += skipped
+                    frame_index += skipped
 
-    def get_frame(self, timeout: float = 0.1) -> Optional[Tuple[float, np.ndarray]]:
+    def wait_for_frames(self, timeout: float = 0.1) -> bool:
         """
-        Get next frame from queue.
+        Wait until captured frames are available.
 
         Args:
-            timeout: Max time to wait for frame
+            timeout: Max time to wait for a frame
 
         Returns:
-            Tuple of (timestamp, frame) or None if queue is empty
+            True if at least one frame is buffered
         """
-        try:
-            return self.frames_queue.get(timeout=timeout)
-        except:
-            return None
+        self._frame_ready.wait(timeout)
+        self._frame_ready.clear()
+        return self.ring is not None and len(self.ring) > 0
+
+    def drain_frames(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Iterate over all buffered frames, oldest first.
+
+        Yields:
+            Tuple of (timestamp, frame). The frame is a view into the ring
+            buffer, valid until the next iteration.
+        """
+        if self.ring is None:
+            return iter(())
+        return self.ring.drain()
 
     def get_stats(self) -> dict:
         """Get recording statistics."""
+        ring = self.ring
         return {
             'frame_count': self.frame_count,
-            'dropped_frames': self.dropped_frames,
-            'queue_size': self.frames_queue.qsize(),
+            'dropped_frames': (self.dropped_frames
+                               + (ring.dropped + ring.dropped_newest if ring else 0)),
+            'dropped_oldest': ring.dropped if ring else 0,
+            'dropped_newest': ring.dropped_newest if ring else 0,
+            'queue_size': len(ring) if ring else 0,
             'fps': self.target_fps
         }
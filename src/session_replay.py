@@ -3,13 +3,16 @@ Session replay module to replay recorded keyboard and mouse inputs.
 Simulates the exact inputs from a recorded session.
 """
 
-import json
+import ctypes
+import functools
+import re
+import threading
 import time
 import platform
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from pynput import keyboard, mouse
-import pyautogui
+from typing import Callable, List, Dict, Optional
+import numpy as np
+from pynput import keyboard
 try:
     import pygetwindow as gw
 except ImportError:
@@ -17,18 +20,45 @@ except ImportError:
 
 # Import Windows native input for better game compatibility
 try:
-    from src.windows_input import WindowsInput
+    from src.windows_input import (WindowsInput, KEYEVENTF_KEYUP, make_key_input,
+                                   user32, INPUT_SIZE)
     from src.human_input import HumanizedWindowsInput
     WINDOWS_INPUT_AVAILABLE = True
 except ImportError:
     try:
-        from windows_input import WindowsInput
+        from windows_input import (WindowsInput, KEYEVENTF_KEYUP, make_key_input,
+                                   user32, INPUT_SIZE)
         from human_input import HumanizedWindowsInput
         WINDOWS_INPUT_AVAILABLE = True
     except ImportError:
         WINDOWS_INPUT_AVAILABLE = False
         WindowsInput = None
         HumanizedWindowsInput = None
+        user32 = None
+
+try:
+    from src.vk_codes import VK_BY_KEY_STR, parse_vk_code
+except ImportError:
+    from vk_codes import VK_BY_KEY_STR, parse_vk_code
+
+try:
+    from src.event_log import (read_event_columns, EVENT_TYPES, KEY_PRESS, KEY_RELEASE,
+                               MOUSE_MOVE, MOUSE_PRESS, MOUSE_RELEASE, MOUSE_SCROLL)
+except ImportError:
+    from event_log import (read_event_columns, EVENT_TYPES, KEY_PRESS, KEY_RELEASE,
+                           MOUSE_MOVE, MOUSE_PRESS, MOUSE_RELEASE, MOUSE_SCROLL)
+
+try:
+    from src.thread_priority import boost_thread, last_core, THREAD_PRIORITY_HIGHEST
+except ImportError:
+    from thread_priority import boost_thread, last_core, THREAD_PRIORITY_HIGHEST
+
+try:
+    from src.precise_timing import (timer_resolution, high_resolution_sleep, wait_until,
+                                    SPIN_THRESHOLD_NS)
+except ImportError:
+    from precise_timing import (timer_resolution, high_resolution_sleep, wait_until,
+                                SPIN_THRESHOLD_NS)
 
 try:
     from src.vjoy_input import VJoyInput, VJOY_AVAILABLE
@@ -40,6 +70,156 @@ except ImportError:
         VJOY_AVAILABLE = False
 
 
+# Events due within this window (ns) of now are dispatched without waiting
+BATCH_WINDOW_NS = 500_000
+
+# pyautogui pulls in Pillow and pyscreeze, it is only imported once the
+# pyautogui fallback is selected
+pyautogui = None
+
+
+def _load_pyautogui():
+    """Import pyautogui on first use."""
+    global pyautogui
+    if pyautogui is None:
+        import pyautogui as module
+        pyautogui = module
+    return pyautogui
+
+
+# Game window titles, and titles of browsers and apps that merely mention the game
+_GAME_TITLE = re.compile('star citizen', re.IGNORECASE)
+_EXCLUDED_TITLE = re.compile('firefox|chrome|edge|browser|mozilla|'
+                             'github|discord|slack|teams|outlook', re.IGNORECASE)
+
+# Seconds between progress reports during playback
+PROGRESS_INTERVAL = 1.0
+
+# Consecutive mouse moves within one window of this length (ms) are replayed
+# as a single move to the last position, about one frame at 120 FPS
+COALESCE_MS = 8
+
+
+# pynput special keys by name (the part after "Key.")
+_PYNPUT_KEYS = {
+    'space': keyboard.Key.space,
+    'shift': keyboard.Key.shift,
+    'shift_l': keyboard.Key.shift_l,
+    'shift_r': keyboard.Key.shift_r,
+    'ctrl': keyboard.Key.ctrl,
+    'ctrl_l': keyboard.Key.ctrl_l,
+    'ctrl_r': keyboard.Key.ctrl_r,
+    'alt': keyboard.Key.alt,
+    'alt_l': keyboard.Key.alt_l,
+    'alt_r': keyboard.Key.alt_r,
+    'tab': keyboard.Key.tab,
+    'enter': keyboard.Key.enter,
+    'esc': keyboard.Key.esc,
+    'backspace': keyboard.Key.backspace,
+    'delete': keyboard.Key.delete,
+    'up': keyboard.Key.up,
+    'down': keyboard.Key.down,
+    'left': keyboard.Key.left,
+    'right': keyboard.Key.right,
+    'page_up': keyboard.Key.page_up,
+    'page_down': keyboard.Key.page_down,
+    'home': keyboard.Key.home,
+    'end': keyboard.Key.end,
+    'insert': keyboard.Key.insert,
+    'f1': keyboard.Key.f1,
+    'f2': keyboard.Key.f2,
+    'f3': keyboard.Key.f3,
+    'f4': keyboard.Key.f4,
+    'f5': keyboard.Key.f5,
+    'f6': keyboard.Key.f6,
+    'f7': keyboard.Key.f7,
+    'f8': keyboard.Key.f8,
+    'f9': keyboard.Key.f9,
+    'f10': keyboard.Key.f10,
+    'f11': keyboard.Key.f11,
+    'f12': keyboard.Key.f12,
+}
+
+# pyautogui key names by pynput special key name
+_PYAUTOGUI_KEYS = {
+    'space': 'space',
+    'shift': 'shift',
+    'shift_l': 'shiftleft',
+    'shift_r': 'shiftright',
+    'ctrl': 'ctrl',
+    'ctrl_l': 'ctrlleft',
+    'ctrl_r': 'ctrlright',
+    'alt': 'alt',
+    'alt_l': 'altleft',
+    'alt_r': 'altright',
+    'tab': 'tab',
+    'enter': 'enter',
+    'esc': 'esc',
+    'backspace': 'backspace',
+    'delete': 'delete',
+    'up': 'up',
+    'down': 'down',
+    'left': 'left',
+    'right': 'right',
+    'page_up': 'pageup',
+    'page_down': 'pagedown',
+    'home': 'home',
+    'end': 'end',
+    'insert': 'insert',
+    'f1': 'f1',
+    'f2': 'f2',
+    'f3': 'f3',
+    'f4': 'f4',
+    'f5': 'f5',
+    'f6': 'f6',
+    'f7': 'f7',
+    'f8': 'f8',
+    'f9': 'f9',
+    'f10': 'f10',
+    'f11': 'f11',
+    'f12': 'f12',
+}
+
+@functools.lru_cache(maxsize=512)
+def parse_key(key_str: str):
+    """
+    Parse key string to pynput key object.
+
+    Args:
+        key_str: String representation of key (e.g., "Key.w", "a")
+
+    Returns:
+        pynput key object
+    """
+    # Special keys
+    if key_str.startswith('Key.'):
+        key_name = key_str.split('.')[1]
+        return _PYNPUT_KEYS.get(key_name.lower(), keyboard.KeyCode.from_char(key_name[0]))
+
+    # Regular character
+    return keyboard.KeyCode.from_char(key_str)
+
+
+@functools.lru_cache(maxsize=512)
+def key_to_pyautogui(key_str: str) -> str:
+    """
+    Convert pynput key string to pyautogui key name.
+
+    Args:
+        key_str: String representation of key (e.g., "Key.w", "a")
+
+    Returns:
+        pyautogui key name
+    """
+    # Special keys mapping
+    if key_str.startswith('Key.'):
+        key_name = key_str.split('.')[1].lower()
+        return _PYAUTOGUI_KEYS.get(key_name, key_name)
+
+    # Regular character - return as is
+    return key_str.lower()
+
+
 class SessionReplay:
     """Replays recorded keyboard and mouse inputs."""
 
@@ -56,8 +236,14 @@ class SessionReplay:
         if not self.session_path.exists():
             raise ValueError(f"Session path does not exist: {session_path}")
 
-        # Load input events
-        self.events = self._load_events()
+        # Load input events as columns (one row per event, see event_log)
+        columns = self._load_events()
+        self.timestamps: np.ndarray = columns['timestamps']
+        self.types: np.ndarray = columns['types']
+        self.args: np.ndarray = columns['args']
+        self.key_ids: List[str] = columns['key_ids'].tolist()
+        self.buttons: List[str] = [button.lower() for button in columns['buttons'].tolist()]
+        self.num_events = len(self.timestamps)
 
         # Platform detection
         self.is_windows = platform.system() == 'Windows'
@@ -83,26 +269,71 @@ class SessionReplay:
         if self.input_handler is None:
             print("[SessionReplay] Using pyautogui input (fallback)")
             self.input_method = 'pyautogui'
-            # Controllers for pyautogui fallback
-            self.keyboard_controller = keyboard.Controller()
-            self.mouse_controller = mouse.Controller()
             # Configure pyautogui
+            _load_pyautogui()
             pyautogui.PAUSE = 0  # No pause between commands
             pyautogui.FAILSAFE = False  # Disable failsafe
+            # Resolve every recorded key up front, playback indexes this list
+            self._pyautogui_keys = [key_to_pyautogui(key_id) for key_id in self.key_ids]
+            # On Windows, keys with a virtual key code are sent with prebuilt
+            # (down, up) SendInput structures instead of through pyautogui
+            self._key_inputs = [None] * len(self.key_ids)
+            if self.is_windows and WINDOWS_INPUT_AVAILABLE:
+                self._send_input = user32.SendInput
+                for key, key_id in enumerate(self.key_ids):
+                    # Resolved from the recorded key_id ("'z'", "Key.shift"),
+                    # pyautogui names of character keys are not VK_CODE names
+                    vk_code = VK_BY_KEY_STR.get(key_id) or parse_vk_code(key_id)
+                    if vk_code:
+                        self._key_inputs[key] = (make_key_input(vk_code),
+                                                 make_key_input(vk_code, KEYEVENTF_KEYUP))
+
+        # Event handlers indexed by type code, called with the row arguments
+        if self.input_handler:
+            handlers = {
+                KEY_PRESS: self._handler_key_press,
+                KEY_RELEASE: self._handler_key_release,
+                MOUSE_MOVE: self._handler_mouse_move,
+                MOUSE_PRESS: self._handler_mouse_press,
+                MOUSE_RELEASE: self._handler_mouse_release,
+                MOUSE_SCROLL: self._handler_mouse_scroll,
+            }
+        else:
+            handlers = {
+                KEY_PRESS: self._pyautogui_key_press,
+                KEY_RELEASE: self._pyautogui_key_release,
+                MOUSE_MOVE: self._pyautogui_mouse_move,
+                MOUSE_PRESS: self._pyautogui_mouse_press,
+                MOUSE_RELEASE: self._pyautogui_mouse_release,
+                MOUSE_SCROLL: self._pyautogui_mouse_scroll,
+            }
+        self._handlers: List[Callable[[int, int, int, int], None]] = [
+            handlers[code] for code in range(len(EVENT_TYPES))]
+
+        # Plain SendInput can inject several due events at once and vJoy can
+        # send them in one report per stick; humanized input must keep its
+        # pauses between them
+        self._batch = (self.input_handler.batch if self.input_method in ('native', 'vjoy')
+                       else None)
 
         # State tracking
         self.replaying = False
+        self._stop_event = threading.Event()  # Set by stop() to end playback
         self._current_event_idx = 0
-        self._start_time = None
-        self._pressed_keys = {}  # Map key_id to key object/vk code
-        self._last_mouse_pos = None  # Track last mouse position for relative movement
+        self._start_time = None  # perf_counter_ns at the start of playback
+        # Held flag per recorded key index, set and cleared without allocating
+        self._pressed_keys = np.zeros(len(self.key_ids), dtype=np.uint8)
 
         self.game_window = None
+        self._hwnd = None  # Handle of the game window found by _find_game_window
 
     def _find_game_window(self) -> bool:
         """
         Find and activate the Star Citizen game window.
 
+        The window found by a previous call is reused while it still exists,
+        so repeated replays do not enumerate every window again.
+
         Returns:
             True if window found and activated, False otherwise
         """
@@ -110,24 +341,30 @@ class SessionReplay:
             print("[SessionReplay] Warning: pygetwindow not available, cannot activate game window")
             return False
 
+        if self._hwnd and self.is_windows and ctypes.windll.user32.IsWindow(self._hwnd):
+            # Handles are recycled, only reuse it while it is still the game
+            window = gw.Win32Window(self._hwnd)
+            if _GAME_TITLE.search(window.title):
+                self.game_window = window
+                print(f"[SessionReplay] Reusing game window: '{window.title}'")
+                return self._activate_game_window()
+        self._hwnd = None
+
         try:
             # Get all windows
             all_windows = gw.getAllWindows()
 
             # Filter for Star Citizen, excluding browsers and common false positives
-            excluded_keywords = ['firefox', 'chrome', 'edge', 'browser', 'mozilla',
-                                'github', 'discord', 'slack', 'teams', 'outlook']
-
+            sc_windows = []
             game_windows = []
             for window in all_windows:
-                title_lower = window.title.lower()
-
                 # Must contain "star citizen"
-                if 'star citizen' not in title_lower:
+                if not _GAME_TITLE.search(window.title):
                     continue
+                sc_windows.append(window)
 
                 # Exclude browsers and other apps
-                if any(excluded in title_lower for excluded in excluded_keywords):
+                if _EXCLUDED_TITLE.search(window.title):
                     continue
 
                 # Exclude very long titles (likely web pages)
@@ -139,6 +376,7 @@ class SessionReplay:
             if game_windows:
                 # Prefer the first match
                 self.game_window = game_windows[0]
+                self._hwnd = getattr(self.game_window, '_hWnd', None)
                 print(f"[SessionReplay] Found game window: '{self.game_window.title}'")
 
                 # Show all found windows for debugging
@@ -148,36 +386,11 @@ class SessionReplay:
                         print(f"  {i+1}. {w.title[:80]}")
                     print(f"[SessionReplay] Using the first one.")
 
-                # Activate the window
-                try:
-                    self.game_window.activate()
-                    time.sleep(0.5)  # Give time for window to activate
-                    print(f"[SessionReplay] Game window activated successfully")
-                    return True
-                except Exception as e:
-                    # Sometimes activate() throws an error even when it succeeds
-                    # Check the error message
-                    error_msg = str(e).lower()
-                    if 'réussi' in error_msg or 'succeed' in error_msg or 'error code from windows: 0' in error_msg:
-                        print(f"[SessionReplay] Game window activated (Windows reported success)")
-                        return True
-
-                    print(f"[SessionReplay] Warning: Could not activate window: {e}")
-                    # Try to bring to front anyway
-                    try:
-                        self.game_window.restore()
-                        self.game_window.show()
-                        time.sleep(0.5)
-                        print(f"[SessionReplay] Game window restored and shown")
-                        return True
-                    except Exception as e2:
-                        print(f"[SessionReplay] Warning: Could not restore window: {e2}")
-                        pass
+                return self._activate_game_window()
             else:
                 print("[SessionReplay] Warning: Could not find Star Citizen window")
                 print("[SessionReplay] Make sure the game is running and visible")
                 print("[SessionReplay] Windows with 'star citizen' in title:")
-                sc_windows = [w for w in all_windows if 'star citizen' in w.title.lower()]
                 if sc_windows:
                     for w in sc_windows[:5]:
                         print(f"  - {w.title[:80]}")
@@ -187,167 +400,97 @@ class SessionReplay:
             print(f"[SessionReplay] Error finding game window: {e}")
             return False
 
-    def _load_events(self) -> List[Dict[str, Any]]:
-        """Load input events from JSON file."""
-        inputs_path = self.session_path / "inputs.json"
-
-        if not inputs_path.exists():
-            raise FileNotFoundError(f"Inputs file not found: {inputs_path}")
-
-        with open(inputs_path, 'r') as f:
-            data = json.load(f)
-
-        return data.get('events', [])
-
-    def _parse_key(self, key_str: str):
+    def _activate_game_window(self) -> bool:
         """
-        Parse key string to pynput key object.
-
-        Args:
-            key_str: String representation of key (e.g., "Key.w", "a")
+        Bring self.game_window to the foreground.
 
         Returns:
-            pynput key object
+            True if the window was activated or shown, False otherwise
         """
-        # Special keys
-        if key_str.startswith('Key.'):
-            key_name = key_str.split('.')[1]
-
-            # Map common special keys
-            key_map = {
-                'space': keyboard.Key.space,
-                'shift': keyboard.Key.shift,
-                'shift_l': keyboard.Key.shift_l,
-                'shift_r': keyboard.Key.shift_r,
-                'ctrl': keyboard.Key.ctrl,
-                'ctrl_l': keyboard.Key.ctrl_l,
-                'ctrl_r': keyboard.Key.ctrl_r,
-                'alt': keyboard.Key.alt,
-                'alt_l': keyboard.Key.alt_l,
-                'alt_r': keyboard.Key.alt_r,
-                'tab': keyboard.Key.tab,
-                'enter': keyboard.Key.enter,
-                'esc': keyboard.Key.esc,
-                'backspace': keyboard.Key.backspace,
-                'delete': keyboard.Key.delete,
-                'up': keyboard.Key.up,
-                'down': keyboard.Key.down,
-                'left': keyboard.Key.left,
-                'right': keyboard.Key.right,
-                'page_up': keyboard.Key.page_up,
-                'page_down': keyboard.Key.page_down,
-                'home': keyboard.Key.home,
-                'end': keyboard.Key.end,
-                'insert': keyboard.Key.insert,
-                'f1': keyboard.Key.f1,
-                'f2': keyboard.Key.f2,
-                'f3': keyboard.Key.f3,
-                'f4': keyboard.Key.f4,
-                'f5': keyboard.Key.f5,
-                'f6': keyboard.Key.f6,
-                'f7': keyboard.Key.f7,
-                'f8': keyboard.Key.f8,
-                'f9': keyboard.Key.f9,
-                'f10': keyboard.Key.f10,
-                'f11': keyboard.Key.f11,
-                'f12': keyboard.Key.f12,
-            }
-
-            return key_map.get(key_name.lower(), keyboard.KeyCode.from_char(key_name[0]))
-
-        # Regular character
-        return keyboard.KeyCode.from_char(key_str)
-
-    def _parse_mouse_button(self, button_str: str):
-        """
-        Parse mouse button string to pynput button object.
+        try:
+            self.game_window.activate()
+            time.sleep(0.5)  # Give time for window to activate
+            print(f"[SessionReplay] Game window activated successfully")
+            return True
+        except Exception as e:
+            # Sometimes activate() throws an error even when it succeeds
+            # Check the error message
+            error_msg = str(e).lower()
+            if 'réussi' in error_msg or 'succeed' in error_msg or 'error code from windows: 0' in error_msg:
+                print(f"[SessionReplay] Game window activated (Windows reported success)")
+                return True
+
+            print(f"[SessionReplay] Warning: Could not activate window: {e}")
+            # Try to bring to front anyway
+            try:
+                self.game_window.restore()
+                self.game_window.show()
+                time.sleep(0.5)
+                print(f"[SessionReplay] Game window restored and shown")
+                return True
+            except Exception as e2:
+                print(f"[SessionReplay] Warning: Could not restore window: {e2}")
+                return False
 
-        Args:
-            button_str: String representation of button (e.g., "left", "right")
+    def _load_events(self) -> Dict[str, np.ndarray]:
+        """Load input events from the session's event log as columns."""
+        return read_event_columns(self.session_path)
 
-        Returns:
-            pynput mouse button object
+    def _coalesce_moves(self, offsets_ns: np.ndarray, coalesce_ns: int) -> np.ndarray:
         """
-        button_map = {
-            'left': mouse.Button.left,
-            'right': mouse.Button.right,
-            'middle': mouse.Button.middle,
-        }
+        Mark the events to replay, dropping mouse moves superseded within a window.
 
-        return button_map.get(button_str.lower(), mouse.Button.left)
-
-    def _key_to_pyautogui(self, key_str: str) -> str:
-        """
-        Convert pynput key string to pyautogui key name.
+        A mouse move is dropped when it does not change the position, or
+        when the next event is also a mouse move in the same coalesce_ns
+        window, so each run of moves sends only its last position per
+        window. Relative moves stay exact since play() computes deltas
+        between the moves that are kept. Key and button events are always kept.
 
         Args:
-            key_str: String representation of key (e.g., "Key.w", "a")
+            offsets_ns: Event offsets from the start of playback (ns)
+            coalesce_ns: Window length (ns), 0 only drops zero-delta moves
 
         Returns:
-            pyautogui key name
+            Boolean mask of the events to replay
         """
-        # Special keys mapping
-        if key_str.startswith('Key.'):
-            key_name = key_str.split('.')[1]
-
-            # Map to pyautogui key names
-            key_map = {
-                'space': 'space',
-                'shift': 'shift',
-                'shift_l': 'shiftleft',
-                'shift_r': 'shiftright',
-                'ctrl': 'ctrl',
-                'ctrl_l': 'ctrlleft',
-                'ctrl_r': 'ctrlright',
-                'alt': 'alt',
-                'alt_l': 'altleft',
-                'alt_r': 'altright',
-                'tab': 'tab',
-                'enter': 'enter',
-                'esc': 'esc',
-                'backspace': 'backspace',
-                'delete': 'delete',
-                'up': 'up',
-                'down': 'down',
-                'left': 'left',
-                'right': 'right',
-                'page_up': 'pageup',
-                'page_down': 'pagedown',
-                'home': 'home',
-                'end': 'end',
-                'insert': 'insert',
-                'f1': 'f1',
-                'f2': 'f2',
-                'f3': 'f3',
-                'f4': 'f4',
-                'f5': 'f5',
-                'f6': 'f6',
-                'f7': 'f7',
-                'f8': 'f8',
-                'f9': 'f9',
-                'f10': 'f10',
-                'f11': 'f11',
-                'f12': 'f12',
-            }
+        keep = np.ones(self.num_events, dtype=bool)
+        is_move = self.types == MOUSE_MOVE
+
+        # Moves to the position of the previous move have a zero delta
+        move_rows = np.flatnonzero(is_move)
+        if len(move_rows) > 1:
+            xy = self.args[move_rows, :2]
+            keep[move_rows[1:]] = (xy[1:] != xy[:-1]).any(axis=1)
 
-            return key_map.get(key_name.lower(), key_name.lower())
+        if coalesce_ns <= 0 or self.num_events < 2:
+            return keep
 
-        # Regular character - return as is
-        return key_str.lower()
+        window = offsets_ns // coalesce_ns
+        keep[:-1] &= ~(is_move[:-1] & is_move[1:] & (window[:-1] == window[1:]))
+        return keep
 
-    def play(self, speed: float = 1.0, start_delay: int = 3):
+    def play(self, speed: float = 1.0, start_delay: int = 3,
+             coalesce_ms: float = COALESCE_MS, start_offset_s: float = 0.0,
+             precise: bool = True):
         """
         Play the recorded session.
 
         Args:
             speed: Playback speed multiplier (1.0 = normal, 2.0 = 2x speed, etc.)
             start_delay: Delay in seconds before starting playback
+            coalesce_ms: Window in which consecutive mouse moves are replayed
+                as one move (ms of playback time, 0 = no coalescing)
+            start_offset_s: Recording time (seconds) to start playback from,
+                earlier events are skipped
+            precise: Spin for the last SPIN_THRESHOLD_NS before each event.
+                Accurate to microseconds but keeps a CPU core busy; False
+                only sleeps, accurate to the timer resolution (~1 ms)
         """
-        if not self.events:
+        if not self.num_events:
             print("[SessionReplay] No events to replay!")
             return
 
-        print(f"[SessionReplay] Loaded {len(self.events)} events")
+        print(f"[SessionReplay] Loaded {self.num_events} events")
         print(f"[SessionReplay] Playback speed: {speed}x")
         print(f"[SessionReplay] Starting in {start_delay} seconds...")
         print()
@@ -374,118 +517,255 @@ class SessionReplay:
         print()
 
         self.replaying = True
+        self._stop_event.clear()
         self._current_event_idx = 0
-        self._start_time = time.time()
-        self._pressed_keys = {}
-        self._last_mouse_pos = None  # Reset mouse position tracking
-
+        self._pressed_keys[:] = 0
+
+        # Event offsets in integer nanoseconds at this speed, computed once
+        offsets_ns = (self.timestamps * (1e9 / speed)).astype(np.int64)
+
+        # Only the events that survive mouse move coalescing are scheduled
+        keep = self._coalesce_moves(offsets_ns, int(coalesce_ms * 1_000_000))
+        offsets_ns = offsets_ns[keep]
+        num_events = len(offsets_ns)
+        if num_events < self.num_events:
+            print(f"[SessionReplay] Skipping {self.num_events - num_events} redundant mouse moves")
+
+        # Resume at the first event at or after the start offset, events
+        # are in time order so a binary search finds it
+        start_ns = int(start_offset_s * 1e9 / speed)
+        self._current_event_idx = int(np.searchsorted(offsets_ns, start_ns))
+        if start_offset_s > 0:
+            print(f"[SessionReplay] Starting at {start_offset_s:.1f}s "
+                  f"(event {self._current_event_idx}/{num_events})")
+
+        types = self.types[keep]
+        args = self.args[keep]
+        if self.input_handler is not None:
+            # Relative input: store each replayed move's delta from the
+            # previous replayed move in its a, b arguments. The first move
+            # replayed only sets the reference position.
+            move_rows = np.flatnonzero(types == MOUSE_MOVE)
+            args[move_rows[1:], 2:] = np.diff(args[move_rows, :2], axis=0)
+            first = np.searchsorted(move_rows, self._current_event_idx)
+            if first < len(move_rows):
+                args[move_rows[first], 2:] = 0
+
+        # Plain lists: indexing them is cheaper than reading NumPy scalars
+        types = types.tolist()
+        args = args.tolist()
+        # Handler of every event, resolved once instead of per dispatch
+        handlers = self._handlers
+        calls = [handlers[event_type] for event_type in types]
+
+        # Progress is printed from another thread, off the scheduling loop
+        done = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(num_events, done),
+                                    daemon=True)
+        reporter.start()
+
+        # Events are scheduled and injected on a dedicated high-priority
+        # thread; this one only waits for it and handles Ctrl+C
+        errors = []
+        player = threading.Thread(target=self._run_playback,
+                                  args=(errors, offsets_ns, start_ns, calls, types, args, precise),
+                                  daemon=True)
         try:
-            while self.replaying and self._current_event_idx < len(self.events):
-                event = self.events[self._current_event_idx]
-
-                # Calculate when this event should occur
-                event_time = event['timestamp'] / speed
-                current_elapsed = time.time() - self._start_time
-
-                # Wait until it's time for this event
-                wait_time = event_time - current_elapsed
-                if wait_time > 0:
-                    time.sleep(wait_time)
-
-                # Execute event
-                self._execute_event(event)
-
-                # Progress indicator every 5 seconds
-                if self._current_event_idx % 100 == 0:
-                    progress = (self._current_event_idx / len(self.events)) * 100
-                    print(f"[SessionReplay] Progress: {progress:.1f}% "
-                          f"({self._current_event_idx}/{len(self.events)} events)")
-
-                self._current_event_idx += 1
-
+            player.start()
+            while player.is_alive():
+                player.join(0.1)
         except KeyboardInterrupt:
             print("\n[SessionReplay] Interrupted by user")
+            self._stop_event.set()
+            player.join()
         finally:
+            done.set()
             # Release all pressed keys
             self._release_all_keys()
             self.replaying = False
 
-        print(f"[SessionReplay] Replay complete!")
+        if errors:
+            # Raised here so the caller sees playback failed
+            raise errors[0]
 
-    def _execute_event(self, event: Dict[str, Any]):
-        """Execute a single input event."""
-        event_type = event['type']
-        data = event['data']
+        print(f"[SessionReplay] Replay complete!")
 
+    def _run_playback(self, errors: List[BaseException], *args):
+        """Run _playback_loop, storing the exception that ends it in errors."""
         try:
-            if self.input_handler:
-                # Use a unified input handler (WindowsInput or HumanizedWindowsInput)
-                if event_type == 'key_press':
-                    key_str = data['key_id']
-                    self._pressed_keys[key_str] = True
-                    self.input_handler.key_down(key_str)
-
-                elif event_type == 'key_release':
-                    key_str = data['key_id']
-                    if key_str in self._pressed_keys:
-                        self.input_handler.key_up(key_str)
-                        del self._pressed_keys[key_str]
-
-                elif event_type == 'mouse_move':
-                    # Use relative mouse movement for games
-                    x, y = data['x'], data['y']
-                    if self._last_mouse_pos is not None:
-                        dx = x - self._last_mouse_pos[0]
-                        dy = y - self._last_mouse_pos[1]
-                        self.input_handler.mouse_move_relative(dx, dy)
-                    self._last_mouse_pos = (x, y)
-
-                elif event_type == 'mouse_press':
-                    button = data['button'].lower()
-                    self.input_handler.mouse_down(button)
-
-                elif event_type == 'mouse_release':
-                    button = data['button'].lower()
-                    self.input_handler.mouse_up(button)
-
-                elif event_type == 'mouse_scroll':
-                    if data['dy'] != 0:
-                        # Convert scroll delta to clicks
-                        clicks = data['dy'] / 120.0  # Standard wheel delta
-                        self.input_handler.mouse_scroll(clicks)
+            self._playback_loop(*args)
+        except BaseException as e:
+            print(f"[SessionReplay] Playback stopped at event {self._current_event_idx}: {e}")
+            errors.append(e)
+
+    def _playback_loop(self, offsets_ns: np.ndarray, start_ns: int,
+                       calls: List[Callable[[int, int, int, int], None]],
+                       types: List[int], args: List[List[int]], precise: bool):
+        """
+        Dispatch events at their deadlines until done or stopped.
+
+        Runs on its own thread at raised priority, pinned to the last core,
+        so the game and the main thread do not delay injected inputs.
 
+        Args:
+            offsets_ns: Event offsets from the start of the recording (ns)
+            start_ns: Offset playback starts from (ns)
+            calls: Handler of each event
+            types: Type code of each event
+            args: Integer arguments of each event
+            precise: Spin for the last SPIN_THRESHOLD_NS before each event
+        """
+        boost_thread(priority=THREAD_PRIORITY_HIGHEST, core=last_core())
+
+        # Loop-invariant lookups bound to locals once, off the per-event path
+        perf_counter_ns = time.perf_counter_ns
+        execute_due = self._execute_due
+        batch = self._batch
+        stop_event = self._stop_event
+        stopped = stop_event.is_set
+        spin_ns = SPIN_THRESHOLD_NS if precise else 0
+        num_events = len(calls)
+
+        with timer_resolution(), high_resolution_sleep() as sleep:
+            # Each event is due at an absolute deadline from the start, so
+            # time spent dispatching does not accumulate as drift
+            self._start_time = perf_counter_ns()
+            deadlines = (offsets_ns + (self._start_time - start_ns)).tolist()
+
+            idx = self._current_event_idx
+            while idx < num_events:
+                # Wait until it's time for this event. stop() is only checked
+                # after a wait, not between events dispatched back to back.
+                deadline = deadlines[idx]
+                if deadline - perf_counter_ns() > BATCH_WINDOW_NS:
+                    wait_until(deadline, spin_ns, sleep, stop_event)
+                    if stopped():
+                        break
+
+                # Every event already due is dispatched in this round
+                due = perf_counter_ns() + BATCH_WINDOW_NS
+                end = idx + 1
+                while end < num_events and deadlines[end] <= due:
+                    end += 1
+
+                # Execute events, injected with one SendInput call when
+                # the handler supports it
+                if batch is not None and end - idx > 1:
+                    with batch():
+                        execute_due(calls, types, args, idx, end)
+                else:
+                    execute_due(calls, types, args, idx, end)
+
+                self._current_event_idx = idx = end
+
+    def _report_progress(self, num_events: int, done: threading.Event):
+        """Print the playback position every PROGRESS_INTERVAL until done is set."""
+        while not done.wait(PROGRESS_INTERVAL):
+            idx = self._current_event_idx
+            progress = (idx / num_events) * 100
+            print(f"[SessionReplay] Progress: {progress:.1f}% ({idx}/{num_events} events)")
+
+    def _execute_due(self, calls: List[Callable[[int, int, int, int], None]],
+                     types: List[int], args: List[List[int]], start: int, end: int):
+        """
+        Execute the events in [start, end), all of which are due.
+
+        With absolute positioning (pyautogui), a move followed by another
+        due move is skipped: only the last position needs to be sent.
+        Relative moves each carry their own delta and are all sent.
+
+        Args:
+            calls: Handler of each event
+            types: Type code of each event
+            args: Integer arguments of each event
+            start, end: Range of events to execute
+        """
+        skip_moves = self.input_handler is None
+        for i in range(start, end):
+            if (skip_moves and types[i] == MOUSE_MOVE
+                    and i + 1 < end and types[i + 1] == MOUSE_MOVE):
+                continue
+            calls[i](*args[i])
+
+    # Unified input handler (WindowsInput, HumanizedWindowsInput or VJoyInput)
+
+    def _handler_key_press(self, x: int, y: int, key: int, _: int):
+        """Press a recorded key, unless it is already held (auto-repeat)."""
+        if self._pressed_keys[key]:
+            return
+        self._pressed_keys[key] = 1
+        self.input_handler.key_down(self.key_ids[key])
+
+    def _handler_key_release(self, x: int, y: int, key: int, _: int):
+        """Release a recorded key if it is held."""
+        if self._pressed_keys[key]:
+            self.input_handler.key_up(self.key_ids[key])
+            self._pressed_keys[key] = 0
+
+    def _handler_mouse_move(self, x: int, y: int, dx: int, dy: int):
+        """Move the mouse by the delta from the previous replayed move (set by play)."""
+        # Use relative mouse movement for games
+        if dx or dy:
+            self.input_handler.mouse_move_relative(dx, dy)
+
+    def _handler_mouse_press(self, x: int, y: int, button: int, _: int):
+        """Press a mouse button."""
+        self.input_handler.mouse_down(self.buttons[button])
+
+    def _handler_mouse_release(self, x: int, y: int, button: int, _: int):
+        """Release a mouse button."""
+        self.input_handler.mouse_up(self.buttons[button])
+
+    def _handler_mouse_scroll(self, x: int, y: int, dx: int, dy: int):
+        """Scroll the mouse wheel."""
+        if dy != 0:
+            # Convert scroll delta to clicks
+            clicks = dy / 120.0  # Standard wheel delta
+            self.input_handler.mouse_scroll(clicks)
+
+    # pyautogui fallback
+
+    def _pyautogui_key_press(self, x: int, y: int, key: int, _: int):
+        """Press a recorded key with pyautogui, unless it is already held (auto-repeat)."""
+        if self._pressed_keys[key]:
+            return
+        self._pressed_keys[key] = 1
+        inputs = self._key_inputs[key]
+        if inputs:
+            self._send_input(1, ctypes.byref(inputs[0]), INPUT_SIZE)
+        else:
+            pyautogui.keyDown(self._pyautogui_keys[key])
+
+    def _pyautogui_key_release(self, x: int, y: int, key: int, _: int):
+        """Release a recorded key with pyautogui if it is held."""
+        if self._pressed_keys[key]:
+            inputs = self._key_inputs[key]
+            if inputs:
+                self._send_input(1, ctypes.byref(inputs[1]), INPUT_SIZE)
             else:
-                # Fallback to pyautogui
-                if event_type == 'key_press':
-                    key_str = data['key_id']
-                    pyautogui_key = self._key_to_pyautogui(key_str)
-                    self._pressed_keys[key_str] = pyautogui_key
-                    pyautogui.keyDown(pyautogui_key)
-
-                elif event_type == 'key_release':
-                    key_str = data['key_id']
-                    if key_str in self._pressed_keys:
-                        pyautogui_key = self._pressed_keys[key_str]
-                        pyautogui.keyUp(pyautogui_key)
-                        del self._pressed_keys[key_str]
-
-                elif event_type == 'mouse_move':
-                    pyautogui.moveTo(data['x'], data['y'], duration=0)
-
-                elif event_type == 'mouse_press':
-                    button = data['button'].lower()
-                    pyautogui.mouseDown(button=button)
-
-                elif event_type == 'mouse_release':
-                    button = data['button'].lower()
-                    pyautogui.mouseUp(button=button)
-
-                elif event_type == 'mouse_scroll':
-                    if data['dy'] != 0:
-                        pyautogui.scroll(int(data['dy']))
+                pyautogui.keyUp(self._pyautogui_keys[key])
+            self._pressed_keys[key] = 0
+
+    def _pyautogui_mouse_move(self, x: int, y: int, _a: int, _b: int):
+        """Move the cursor to the recorded absolute position."""
+        if self.is_windows and user32:
+            # Direct prototyped call, skips pyautogui's argument handling
+            user32.SetCursorPos(x, y)
+        else:
+            pyautogui.moveTo(x, y, duration=0)
 
-        except Exception as e:
-            print(f"[SessionReplay] Error executing event {event_type}: {e}")
+    def _pyautogui_mouse_press(self, x: int, y: int, button: int, _: int):
+        """Press a mouse button with pyautogui."""
+        pyautogui.mouseDown(button=self.buttons[button])
+
+    def _pyautogui_mouse_release(self, x: int, y: int, button: int, _: int):
+        """Release a mouse button with pyautogui."""
+        pyautogui.mouseUp(button=self.buttons[button])
+
+    def _pyautogui_mouse_scroll(self, x: int, y: int, dx: int, dy: int):
+        """Scroll the mouse wheel with pyautogui."""
+        if dy != 0:
+            pyautogui.scroll(dy)
 
     def _release_all_keys(self):
         """Release all currently pressed keys."""
@@ -495,34 +775,43 @@ class SessionReplay:
             else:
                 self.input_handler.release_all_keys()
         else:
-            # Pyautogui fallback
-            for key_id, pyautogui_key in list(self._pressed_keys.items()):
+            # Pyautogui fallback, keys pressed with SendInput are released with it
+            for key in np.flatnonzero(self._pressed_keys).tolist():
                 try:
-                    pyautogui.keyUp(pyautogui_key)
+                    inputs = self._key_inputs[key]
+                    if inputs:
+                        self._send_input(1, ctypes.byref(inputs[1]), INPUT_SIZE)
+                    else:
+                        pyautogui.keyUp(self._pyautogui_keys[key])
                 except:
                     pass
-        self._pressed_keys.clear()
+        self._pressed_keys[:] = 0
 
     def stop(self):
         """Stop replay."""
         self.replaying = False
+        self._stop_event.set()
         self._release_all_keys()
 
+    def close(self):
+        """Release the input handler (ends the vJoy recenter thread)."""
+        if self.input_method == 'vjoy' and self.input_handler is not None:
+            self.input_handler.close()
+
     def get_info(self) -> dict:
         """Get information about the session."""
-        if not self.events:
+        if not self.num_events:
             return {}
 
         # Calculate statistics
-        duration = self.events[-1]['timestamp'] if self.events else 0
+        duration = float(self.timestamps[-1])
 
-        event_counts = {}
-        for event in self.events:
-            event_type = event['type']
-            event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        counts = np.bincount(self.types, minlength=len(EVENT_TYPES))
+        event_counts = {event_type: int(count)
+                        for event_type, count in zip(EVENT_TYPES, counts) if count}
 
         return {
-            'total_events': len(self.events),
+            'total_events': self.num_events,
             'duration': duration,
             'event_counts': event_counts,
             'session_path': str(self.session_path)
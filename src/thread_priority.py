@@ -0,0 +1,58 @@
+"""
+Thread scheduling helpers for the recording threads.
+Raises the priority of latency-sensitive threads and pins them to a core so
+they are not preempted by the game. No-ops outside Windows.
+"""
+
+import ctypes
+import os
+import sys
+from typing import Optional
+
+THREAD_PRIORITY_ABOVE_NORMAL = 1
+THREAD_PRIORITY_HIGHEST = 2
+
+THREAD_SET_INFORMATION = 0x0020
+THREAD_QUERY_INFORMATION = 0x0040
+
+
+def last_core() -> int:
+    """Index of the highest-numbered CPU core, least likely to run the game's main thread."""
+    return (os.cpu_count() or 1) - 1
+
+
+def boost_thread(native_id: Optional[int] = None,
+                 priority: int = THREAD_PRIORITY_ABOVE_NORMAL,
+                 core: Optional[int] = None) -> bool:
+    """
+    Raise a thread's scheduling priority and optionally pin it to one core.
+
+    Args:
+        native_id: OS thread id (threading.Thread.native_id). None = calling thread
+        priority: Windows THREAD_PRIORITY_* level
+        core: CPU core to pin the thread to. None = leave affinity unchanged
+
+    Returns:
+        True if the priority was applied
+    """
+    if sys.platform != 'win32':
+        return False
+
+    kernel32 = ctypes.windll.kernel32
+    if native_id is None:
+        # Pseudo handle, does not need closing
+        handle = kernel32.GetCurrentThread()
+    else:
+        handle = kernel32.OpenThread(THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION,
+                                     False, native_id)
+        if not handle:
+            return False
+
+    try:
+        ok = bool(kernel32.SetThreadPriority(handle, priority))
+        if core is not None:
+            kernel32.SetThreadAffinityMask(handle, ctypes.c_size_t(1 << core))
+        return ok
+    finally:
+        if native_id is not None:
+            kernel32.CloseHandle(handle)
@@ -0,0 +1,194 @@
+"""
+Video encoder selection for gameplay recording.
+Detects hardware H.264 encoders available to the bundled ffmpeg binary and
+pipes raw frames to an ffmpeg process.
+"""
+
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import imageio_ffmpeg
+
+# Hardware encoders in order of preference: name -> (codec, ffmpeg output params)
+HW_ENCODERS = {
+    'nvenc': ('h264_nvenc', ['-preset', 'p1', '-tune', 'ull', '-rc', 'cbr', '-b:v', '20M',
+                             '-zerolatency', '1', '-delay', '0', '-rc-lookahead', '0']),
+    'qsv': ('h264_qsv', ['-preset', 'veryfast', '-look_ahead', '0', '-b:v', '20M']),
+    'amf': ('h264_amf', ['-usage', 'ultralowlatency', '-quality', 'speed', '-b:v', '20M']),
+    'vaapi': ('h264_vaapi', ['-vaapi_device', '/dev/dri/renderD128',
+                             '-vf', 'format=nv12,hwupload', '-pix_fmt', 'vaapi', '-b:v', '20M']),
+}
+
+# Low-latency settings for the software encoder
+SOFTWARE_PARAMS = {
+    'libx264': ['-preset', 'ultrafast', '-tune', 'zerolatency'],
+}
+
+HWACCEL_CHOICES = ['auto', 'none'] + list(HW_ENCODERS)
+
+
+def is_hardware_codec(codec: str) -> bool:
+    """Check whether a codec name is one of the hardware encoders."""
+    return any(codec == hw_codec for hw_codec, _ in HW_ENCODERS.values())
+
+
+@lru_cache(maxsize=None)
+def _encoder_works(codec: str) -> bool:
+    """Check that ffmpeg can actually open an encoder (driver and device present)."""
+    ffmpeg = imageio_ffmpeg.get_ffmpeg_exe()
+    _, params = next(v for v in HW_ENCODERS.values() if v[0] == codec)
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error',
+           '-f', 'lavfi', '-i', 'color=size=256x256:rate=30',
+           '-frames:v', '1', '-c:v', codec] + params + ['-f', 'null', '-']
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=None)
+def _listed_encoders() -> frozenset:
+    """Names of encoders compiled into the ffmpeg binary."""
+    ffmpeg = imageio_ffmpeg.get_ffmpeg_exe()
+    try:
+        result = subprocess.run([ffmpeg, '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return frozenset()
+
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith('V'):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def select_encoder(hwaccel: str = 'auto',
+                   fallback_codec: str = 'libx264') -> Tuple[str, Optional[List[str]]]:
+    """
+    Pick the video codec and ffmpeg output parameters.
+
+    Args:
+        hwaccel: 'auto' to probe every hardware encoder, a specific name from
+            HW_ENCODERS, or 'none' to always use the software codec
+        fallback_codec: Codec used when no hardware encoder is usable
+
+    Returns:
+        Tuple of (codec, output_params). output_params is None for codecs
+        without tuned settings.
+    """
+    if hwaccel == 'auto':
+        candidates = list(HW_ENCODERS)
+    elif hwaccel in HW_ENCODERS:
+        candidates = [hwaccel]
+    else:
+        candidates = []
+
+    listed = _listed_encoders() if candidates else frozenset()
+    for name in candidates:
+        codec, params = HW_ENCODERS[name]
+        if codec in listed and _encoder_works(codec):
+            return codec, list(params)
+
+    if candidates:
+        print(f"[VideoEncoder] No hardware encoder available, using {fallback_codec}")
+
+    params = SOFTWARE_PARAMS.get(fallback_codec)
+    return fallback_codec, list(params) if params else None
+
+
+class FFmpegWriter:
+    """
+    Encodes RGB frames by streaming them to an ffmpeg subprocess.
+
+    Frames are written as raw rgb24 to ffmpeg's stdin straight from the
+    numpy buffer. Encoding runs in the ffmpeg process and the GIL is
+    released while the pipe write blocks. The process is started on the
+    first frame, once the frame size is known.
+    """
+
+    def __init__(self, path: Path, fps: int, codec: str = 'libx264',
+                 output_params: Optional[List[str]] = None,
+                 quality: Optional[float] = 8):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Output video file
+            fps: Frame rate of the output video
+            codec: ffmpeg video encoder name
+            output_params: Extra ffmpeg output arguments (see select_encoder)
+            quality: Software encoder quality from 0 to 10 (higher is better),
+                None to leave rate control to output_params
+        """
+        self.path = Path(path)
+        self.fps = fps
+        self.codec = codec
+        self.output_params = list(output_params or [])
+        self.quality = quality
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._frame_size = None
+
+    def _quality_params(self) -> List[str]:
+        """Map the 0-10 quality scale to ffmpeg arguments (as imageio does)."""
+        if self.quality is None:
+            return []
+        level = 1 - self.quality / 10
+        if self.codec == 'libx264':
+            return ['-crf', str(int(level * 51))]
+        return ['-qscale:v', str(int(level * 30) + 1)]
+
+    def _start(self, width: int, height: int):
+        """Spawn the ffmpeg process for a given frame size."""
+        cmd = [
+            imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}',
+            '-r', str(self.fps), '-i', '-',
+            '-an', '-c:v', self.codec, '-pix_fmt', 'yuv420p'
+        ] + self._quality_params() + self.output_params + [str(self.path)]
+
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self._frame_size = (height, width)
+
+    def append_data(self, frame: np.ndarray):
+        """
+        Write one frame.
+
+        Args:
+            frame: RGB uint8 array of shape (height, width, 3)
+        """
+        if self._proc is None:
+            self._start(frame.shape[1], frame.shape[0])
+        elif frame.shape[:2] != self._frame_size:
+            raise ValueError(f"Frame size changed from {self._frame_size} to {frame.shape[:2]}")
+
+        # Hand ffmpeg the array's own buffer, no intermediate bytes object
+        self._proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+
+    def close(self, timeout: float = 10.0):
+        """Finish encoding and wait for ffmpeg to exit."""
+        if self._proc is None:
+            return
+
+        proc, self._proc = self._proc, None
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            print(f"[VideoEncoder] ffmpeg did not finish within {timeout:.0f}s, killed")
+            return
+
+        if proc.returncode != 0:
+            print(f"[VideoEncoder] ffmpeg exited with code {proc.returncode}")
@@ -3,14 +3,35 @@ vJoy input driver for Star Citizen session replay.
 Manages two virtual joysticks for a HoSaS setup.
 """
 
+import functools
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+
 try:
-    import pyvjoy
-    import time
-    VJOY_AVAILABLE = True
+    from src.precise_timing import high_resolution_sleep
 except ImportError:
-    VJOY_AVAILABLE = False
+    from precise_timing import high_resolution_sleep
+
+# pyvjoy loads the vJoy driver interface DLL, it is only imported by
+# VJoyInput; availability is checked without importing it
+VJOY_AVAILABLE = importlib.util.find_spec('pyvjoy') is not None
+if not VJOY_AVAILABLE:
     print("[vJoyManager] Warning: pyvjoy not installed. Install with: pip install pyvjoy")
 
+# vJoy report field of each axis name
+_AXIS_FIELDS = {
+    'x': 'wAxisX',
+    'y': 'wAxisY',
+    'z': 'wAxisZ',
+    'rx': 'wAxisXRot',
+    'ry': 'wAxisYRot',
+    'rz': 'wAxisZRot',
+}
+
+# Seconds a mouse movement keeps the aim axes deflected before recentering
+RECENTER_DELAY = 0.01
 
 class VJoyInput:
     """
@@ -19,7 +40,22 @@ class VJoyInput:
     - Stick 2 (Left): Handles strafe control (Forward/Back, Left/Right).
     """
 
-    def __init__(self, device_id1: int = 1, device_id2: int = 2):
+    # Fixed attribute set, looked up on every input event
+    __slots__ = ('stick1', 'stick2', 'axis_min', 'axis_max', 'axis_center',
+                 'buttons1', 'buttons2', 'key_to_axis', 'key_to_button',
+                 'mouse_sensitivity', 'verbose', '_pending', '_key_names',
+                 '_down_actions', '_up_actions', '_recenter_lock', '_recenter_deadline',
+                 '_recenter_wake', '_recenter_stop', '_recenter_thread')
+
+    def __init__(self, device_id1: int = 1, device_id2: int = 2, verbose: bool = False):
+        """
+        Connect to the vJoy devices.
+
+        Args:
+            device_id1: vJoy device of the right stick (required)
+            device_id2: vJoy device of the left stick
+            verbose: Print every button and axis change (slows down replay)
+        """
         if not VJOY_AVAILABLE:
             raise ImportError("pyvjoy not installed. Run: pip install pyvjoy")
 
@@ -33,8 +69,7 @@ class VJoyInput:
         self.axis_max = 0x8000
         self.axis_center = 0x4000
 
-        self.axes1 = { 'x': self.axis_center, 'y': self.axis_center, 'z': self.axis_center, 'rx': self.axis_center, 'ry': self.axis_center, 'rz': self.axis_center }
-        self.axes2 = { 'x': self.axis_center, 'y': self.axis_center, 'z': self.axis_center, 'rx': self.axis_center, 'ry': self.axis_center, 'rz': self.axis_center }
+        # Axis positions live in each stick's report (stick.data)
 
         self.buttons1 = {}
         self.buttons2 = {}
@@ -75,10 +110,58 @@ class VJoyInput:
         }
         
         self.mouse_sensitivity = 10.0
+        self.verbose = verbose
+
+        # Sticks with staged changes while batch() is open, None otherwise
+        self._pending = None
+
+        # Recorded key strings ("'a'", "Key.shift") to mapping keys, filled on first use
+        self._key_names = {}
+
+        # Actions bound once per mapped key, so key events are a single dict lookup
+        self._down_actions = {}
+        self._up_actions = {}
+        for key, (axis_name, value, stick_id) in self.key_to_axis.items():
+            stick = self.stick1 if stick_id == 1 else self.stick2
+            if not stick:
+                continue
+            # Report field resolved here, the action only writes it
+            field = _AXIS_FIELDS[axis_name]
+            self._down_actions[key] = functools.partial(self._press_axis, key, stick, field,
+                                                        value)
+            self._up_actions[key] = functools.partial(self._release_axis, key, stick, field)
+        for key, (button_id, stick_id) in self.key_to_button.items():
+            # Buttons take precedence over axes
+            self._down_actions[key] = functools.partial(self._press_button, key, stick_id,
+                                                        button_id)
+            self._up_actions[key] = functools.partial(self._release_button, key, stick_id)
+
+        # Recorded strings of the mapped keys resolved ahead of time
+        for key in self._down_actions:
+            if len(key) == 1:
+                variants = (key, f"'{key}'", key.upper(), f"'{key.upper()}'")
+            else:
+                variants = (key, f"Key.{key}")
+            for key_str in variants:
+                self._key_names[key_str] = key
+
+        # Aim axes recentering, done by a background thread once the
+        # deadline of the last mouse movement passes. The lock guards every
+        # change to the stick reports and is re-entered by the changes made
+        # inside batch(), which holds it.
+        self._recenter_lock = threading.RLock()
+        self._recenter_deadline = None
+        self._recenter_wake = threading.Event()
+        self._recenter_stop = threading.Event()  # Set by close() to end the thread
+
         self._reset_axes()
 
+        self._recenter_thread = threading.Thread(target=self._recenter_loop, daemon=True)
+        self._recenter_thread.start()
+
     def _init_stick(self, device_id):
         try:
+            import pyvjoy
             stick = pyvjoy.VJoyDevice(device_id)
             print(f"[vJoyManager] Connected to vJoy device {device_id}")
             return stick
@@ -87,108 +170,186 @@ class VJoyInput:
             return None
 
     def _reset_axes(self):
-        for stick in [self.stick1, self.stick2]:
-            if stick:
-                stick.data.wAxisX = self.axis_center
-                stick.data.wAxisY = self.axis_center
-                stick.data.wAxisZ = self.axis_center
-                stick.data.wAxisXRot = self.axis_center
-                stick.data.wAxisYRot = self.axis_center
-                stick.data.wAxisZRot = self.axis_center
-                stick.update()
+        with self._recenter_lock:
+            # Centered below, a pending recenter is no longer needed
+            self._recenter_deadline = None
+            for stick in [self.stick1, self.stick2]:
+                if stick:
+                    stick.data.wAxisX = self.axis_center
+                    stick.data.wAxisY = self.axis_center
+                    stick.data.wAxisZ = self.axis_center
+                    stick.data.wAxisXRot = self.axis_center
+                    stick.data.wAxisYRot = self.axis_center
+                    stick.data.wAxisZRot = self.axis_center
+                    stick.update()
 
     def _get_cleaned_key(self, key_str: str) -> str:
-        if key_str.startswith('\'') and key_str.endswith('\'') and len(key_str) >= 3:
-            key_str = key_str[1:-1]
-        if key_str.startswith('Key.'):
-            key_str = key_str.split('.')[1].lower()
-        return key_str.lower()
+        key = self._key_names.get(key_str)
+        if key is None:
+            key = key_str
+            if key.startswith('\'') and key.endswith('\'') and len(key) >= 3:
+                key = key[1:-1]
+            if key.startswith('Key.'):
+                key = key.split('.')[1]
+            key = self._key_names[key_str] = key.lower()
+        return key
 
-    def key_down(self, key_str: str):
-        key = self._get_cleaned_key(key_str)
-
-        if key in self.key_to_button:
-            button_id, stick_id = self.key_to_button[key]
-            stick = self.stick1 if stick_id == 1 else self.stick2
-            buttons = self.buttons1 if stick_id == 1 else self.buttons2
-            if stick:
-                stick.set_button(button_id, 1)
-                buttons[key] = button_id
+    def _press_button(self, key: str, stick_id: int, button_id: int):
+        stick = self.stick1 if stick_id == 1 else self.stick2
+        buttons = self.buttons1 if stick_id == 1 else self.buttons2
+        if stick:
+            self._set_button(stick, button_id, 1)
+            self._update(stick)
+            buttons[key] = button_id
+            if self.verbose:
                 print(f"[vJoyManager] Stick {stick_id} Button {button_id} pressed (key: {key})")
-            return
-
-        if key in self.key_to_axis:
-            axis_name, axis_value, stick_id = self.key_to_axis[key]
-            self._update_axis(stick_id, axis_name, axis_value)
-            print(f"[vJoyManager] Stick {stick_id} Axis {axis_name} = {axis_value} (key: {key})")
-
-    def key_up(self, key_str: str):
-        key = self._get_cleaned_key(key_str)
 
-        if key in self.buttons1 or key in self.buttons2:
-            stick_id = 1 if key in self.buttons1 else 2
-            stick = self.stick1 if stick_id == 1 else self.stick2
-            buttons = self.buttons1 if stick_id == 1 else self.buttons2
-            button_id = buttons.pop(key)
-            if stick:
-                stick.set_button(button_id, 0)
-                print(f"[vJoyManager] Stick {stick_id} Button {button_id} released (key: {key})")
+    def _release_button(self, key: str, stick_id: int):
+        buttons = self.buttons1 if stick_id == 1 else self.buttons2
+        button_id = buttons.pop(key, None)
+        if button_id is None:
             return
+        stick = self.stick1 if stick_id == 1 else self.stick2
+        if stick:
+            self._set_button(stick, button_id, 0)
+            self._update(stick)
+            if self.verbose:
+                print(f"[vJoyManager] Stick {stick_id} Button {button_id} released (key: {key})")
+
+    def _press_axis(self, key: str, stick, field: str, value: int):
+        setattr(stick.data, field, value)
+        self._update(stick)
+        if self.verbose:
+            axis_name, _, stick_id = self.key_to_axis[key]
+            print(f"[vJoyManager] Stick {stick_id} Axis {axis_name} = {value} (key: {key})")
 
-        if key in self.key_to_axis:
+    def _release_axis(self, key: str, stick, field: str):
+        setattr(stick.data, field, self.axis_center)
+        self._update(stick)
+        if self.verbose:
             axis_name, _, stick_id = self.key_to_axis[key]
-            self._update_axis(stick_id, axis_name, self.axis_center)
             print(f"[vJoyManager] Stick {stick_id} Axis {axis_name} centered (key: {key})")
 
+    def key_down(self, key_str: str):
+        action = self._down_actions.get(self._get_cleaned_key(key_str))
+        if action:
+            with self._recenter_lock:
+                action()
+
+    def key_up(self, key_str: str):
+        action = self._up_actions.get(self._get_cleaned_key(key_str))
+        if action:
+            with self._recenter_lock:
+                action()
+
     def mouse_move_relative(self, dx: int, dy: int):
         # Mouse movement always goes to Stick 1 (right stick for aiming)
         rx_delta = int(dx * (self.axis_max / 2) / self.mouse_sensitivity)
         ry_delta = -int(dy * (self.axis_max / 2) / self.mouse_sensitivity)
 
         if self.stick1:
-            self.stick1.data.wAxisXRot = self.axis_center + rx_delta
-            self.stick1.data.wAxisYRot = self.axis_center + ry_delta
-            self.stick1.update()
-            time.sleep(0.01)
-            self.stick1.data.wAxisXRot = self.axis_center
-            self.stick1.data.wAxisYRot = self.axis_center
-            self.stick1.update()
+            # The deflection is a pulse: the recenter thread centers the axes
+            # RECENTER_DELAY after the last movement, a movement arriving
+            # sooner replaces the deflection without recentering in between
+            with self._recenter_lock:
+                self.stick1.data.wAxisXRot = self.axis_center + rx_delta
+                self.stick1.data.wAxisYRot = self.axis_center + ry_delta
+                self._update(self.stick1)
+                self._recenter_deadline = time.monotonic() + RECENTER_DELAY
+                self._recenter_wake.set()
+
+    def _recenter_loop(self):
+        """Center the aim axes of stick 1 when the recenter deadline passes."""
+        # Waits on a high-resolution timer, a 10 ms time.sleep can last a
+        # whole 15.6 ms timer tick
+        with high_resolution_sleep() as sleep:
+            while True:
+                self._recenter_wake.wait()
+                if self._recenter_stop.is_set():
+                    return
+                with self._recenter_lock:
+                    deadline = self._recenter_deadline
+                    remaining = deadline - time.monotonic() if deadline is not None else 0
+                    if remaining <= 0:
+                        if deadline is not None:
+                            self.stick1.data.wAxisXRot = self.axis_center
+                            self.stick1.data.wAxisYRot = self.axis_center
+                            self.stick1.update()
+                            self._recenter_deadline = None
+                        self._recenter_wake.clear()
+                        continue
+                sleep(int(remaining * 1e9))
 
     def mouse_down(self, button: str = 'left'):
         # Mouse buttons go to Stick 1
         button_map = {'left': 1, 'right': 2, 'middle': 3}
         if button in button_map and self.stick1:
             button_id = button_map[button]
-            self.stick1.set_button(button_id, 1)
+            with self._recenter_lock:
+                self._set_button(self.stick1, button_id, 1)
+                self._update(self.stick1)
             self.buttons1[f'mouse_{button}'] = button_id
 
     def mouse_up(self, button: str = 'left'):
         key = f'mouse_{button}'
         if key in self.buttons1 and self.stick1:
             button_id = self.buttons1.pop(key)
-            self.stick1.set_button(button_id, 0)
+            with self._recenter_lock:
+                self._set_button(self.stick1, button_id, 0)
+                self._update(self.stick1)
 
-    def _update_axis(self, stick_id, axis_name, value):
-        stick = self.stick1 if stick_id == 1 else self.stick2
-        axes = self.axes1 if stick_id == 1 else self.axes2
-        if not stick: return
-        
-        axes[axis_name] = value
-        
-        if axis_name == 'x': stick.data.wAxisX = value
-        elif axis_name == 'y': stick.data.wAxisY = value
-        elif axis_name == 'z': stick.data.wAxisZ = value
-        elif axis_name == 'rx': stick.data.wAxisXRot = value
-        elif axis_name == 'ry': stick.data.wAxisYRot = value
-        elif axis_name == 'rz': stick.data.wAxisZRot = value
-        
-        stick.update()
+    def _update(self, stick):
+        # Send the staged report, or defer it to the end of the open batch
+        if self._pending is None:
+            stick.update()
+        else:
+            self._pending.add(stick)
+
+    @contextmanager
+    def batch(self):
+        """
+        Send the button and axis changes made inside the block with one
+        update per stick when it exits.
+
+        The recenter lock is held for the whole block, so the recenter
+        thread cannot send a stick 1 report with only part of the changes.
+        """
+        if self._pending is not None:
+            # Nested batch, the outer one sends the updates
+            yield
+            return
+
+        with self._recenter_lock:
+            self._pending = set()
+            try:
+                yield
+            finally:
+                pending, self._pending = self._pending, None
+                for stick in pending:
+                    stick.update()
+
+    def _set_button(self, stick, button_id, state):
+        # Staged in the report like the axes, so update() sends buttons and
+        # axes together instead of resetting buttons set with SetBtn
+        mask = 1 << (button_id - 1)
+        if state:
+            stick.data.lButtons |= mask
+        else:
+            stick.data.lButtons &= ~mask
 
     def release_all(self):
-        for stick, buttons in [(self.stick1, self.buttons1), (self.stick2, self.buttons2)]:
-            if stick:
-                for button_id in list(buttons.values()):
-                    stick.set_button(button_id, 0)
-        self.buttons1.clear()
-        self.buttons2.clear()
-        self._reset_axes()
\ No newline at end of file
+        with self._recenter_lock:
+            for stick in [self.stick1, self.stick2]:
+                if stick:
+                    stick.data.lButtons = 0
+            self.buttons1.clear()
+            self.buttons2.clear()
+            # Sends the cleared buttons with the centered axes, one update per stick
+            self._reset_axes()
+
+    def close(self):
+        """Release every button and axis, then stop the recenter thread."""
+        self.release_all()
+        self._recenter_stop.set()
+        self._recenter_wake.set()
+        self._recenter_thread.join()
@@ -0,0 +1,114 @@
+"""
+Windows virtual key codes shared by the SendInput and window message backends.
+Recorded key strings are resolved ahead of time so lookups are a single dict.get.
+"""
+
+# Virtual key codes for common keys, aliases (pynput names like shift_l,
+# pyautogui names like shiftleft) are real entries rather than rewrites
+VK_CODE = {
+    'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45, 'f': 0x46,
+    'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A, 'k': 0x4B, 'l': 0x4C,
+    'm': 0x4D, 'n': 0x4E, 'o': 0x4F, 'p': 0x50, 'q': 0x51, 'r': 0x52,
+    's': 0x53, 't': 0x54, 'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58,
+    'y': 0x59, 'z': 0x5A,
+
+    '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
+    '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
+
+    'space': 0x20,
+    'enter': 0x0D,
+    'return': 0x0D,  # Alias for enter
+    'tab': 0x09,
+    'esc': 0x1B,
+    'escape': 0x1B,  # Alias for esc
+    'backspace': 0x08,
+    'delete': 0x2E,
+    'del': 0x2E,  # Alias for delete
+
+    'shift': 0x10,
+    'shiftleft': 0xA0,
+    'shift_l': 0xA0,
+    'shiftright': 0xA1,
+    'shift_r': 0xA1,
+    'ctrl': 0x11,
+    'control': 0x11,
+    'ctrlleft': 0xA2,
+    'ctrl_l': 0xA2,
+    'ctrlright': 0xA3,
+    'ctrl_r': 0xA3,
+    'alt': 0x12,
+    'altleft': 0xA4,
+    'alt_l': 0xA4,
+    'altright': 0xA5,
+    'alt_r': 0xA5,
+
+    'up': 0x26,
+    'down': 0x28,
+    'left': 0x25,
+    'right': 0x27,
+
+    'pageup': 0x21,
+    'page_up': 0x21,
+    'pagedown': 0x22,
+    'page_down': 0x22,
+    'home': 0x24,
+    'end': 0x23,
+    'insert': 0x2D,
+
+    'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73,
+    'f5': 0x74, 'f6': 0x75, 'f7': 0x76, 'f8': 0x77,
+    'f9': 0x78, 'f10': 0x79, 'f11': 0x7A, 'f12': 0x7B,
+
+    # Additional symbols and numpad keys
+    'num0': 0x60, 'num1': 0x61, 'num2': 0x62, 'num3': 0x63,
+    'num4': 0x64, 'num5': 0x65, 'num6': 0x66, 'num7': 0x67,
+    'num8': 0x68, 'num9': 0x69,
+    'multiply': 0x6A, 'add': 0x6B, 'subtract': 0x6D,
+    'decimal': 0x6E, 'divide': 0x6F,
+
+    # Common symbols
+    '-': 0xBD, '=': 0xBB, '[': 0xDB, ']': 0xDD,
+    ';': 0xBA, "'": 0xDE, ',': 0xBC, '.': 0xBE,
+    '/': 0xBF, '\\': 0xDC, '`': 0xC0,
+}
+
+
+def parse_vk_code(key_str: str) -> int:
+    """
+    Parse a recorded key string into a virtual key code.
+
+    Args:
+        key_str: Key string (e.g., 'w', "'w'", 'Key.shift_l')
+
+    Returns:
+        Virtual key code, 0 if unknown
+    """
+    # Strip quotes if present (e.g., "'z'" -> "z")
+    # This happens when pynput KeyCode objects are converted to string
+    if key_str.startswith("'") and key_str.endswith("'") and len(key_str) >= 3:
+        key_str = key_str[1:-1]
+
+    # Handle escaped characters like '\x03' (Ctrl+C)
+    # These are stored as literal strings, not actual control characters
+    if key_str.startswith('\\x') and len(key_str) == 4:
+        # Ignore control characters - they're typically interrupt signals
+        return 0
+
+    # Handle Key.xxx format from pynput, its names are VK_CODE entries
+    if key_str.startswith('Key.'):
+        key_str = key_str[4:]
+
+    return VK_CODE.get(key_str.lower(), 0)
+
+
+# Key strings the recorder emits for every known key (bare names, quoted
+# characters, pynput Key.* names), parsed once at import
+VK_BY_KEY_STR = {}
+for _name in VK_CODE:
+    if len(_name) == 1:
+        _variants = (_name, f"'{_name}'", _name.upper(), f"'{_name.upper()}'")
+    else:
+        _variants = (_name, f"Key.{_name}")
+    for _key_str in _variants:
+        VK_BY_KEY_STR[_key_str] = parse_vk_code(_key_str)
+del _name, _variants, _key_str
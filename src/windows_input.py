@@ -4,9 +4,18 @@ This bypasses pyautogui limitations and works with games like Star Citizen.
 """
 
 import ctypes
+import platform
 import time
+from contextlib import contextmanager
 from ctypes import wintypes
-from typing import Dict
+from typing import Dict, List, Optional
+
+try:
+    from src.precise_timing import wait_until
+    from src.vk_codes import VK_CODE, VK_BY_KEY_STR, parse_vk_code
+except ImportError:
+    from precise_timing import wait_until
+    from vk_codes import VK_CODE, VK_BY_KEY_STR, parse_vk_code
 
 # Windows API constants
 KEYEVENTF_EXTENDEDKEY = 0x0001
@@ -27,73 +36,8 @@ MOUSEEVENTF_ABSOLUTE = 0x8000
 INPUT_MOUSE = 0
 INPUT_KEYBOARD = 1
 
-# Virtual key codes for common keys
-VK_CODE = {
-    'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45, 'f': 0x46,
-    'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A, 'k': 0x4B, 'l': 0x4C,
-    'm': 0x4D, 'n': 0x4E, 'o': 0x4F, 'p': 0x50, 'q': 0x51, 'r': 0x52,
-    's': 0x53, 't': 0x54, 'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58,
-    'y': 0x59, 'z': 0x5A,
-
-    '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
-    '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
-
-    'space': 0x20,
-    'enter': 0x0D,
-    'return': 0x0D,  # Alias for enter
-    'tab': 0x09,
-    'esc': 0x1B,
-    'escape': 0x1B,  # Alias for esc
-    'backspace': 0x08,
-    'delete': 0x2E,
-    'del': 0x2E,  # Alias for delete
-
-    'shift': 0x10,
-    'shiftleft': 0xA0,
-    'shift_l': 0xA0,
-    'shiftright': 0xA1,
-    'shift_r': 0xA1,
-    'ctrl': 0x11,
-    'control': 0x11,
-    'ctrlleft': 0xA2,
-    'ctrl_l': 0xA2,
-    'ctrlright': 0xA3,
-    'ctrl_r': 0xA3,
-    'alt': 0x12,
-    'altleft': 0xA4,
-    'alt_l': 0xA4,
-    'altright': 0xA5,
-    'alt_r': 0xA5,
-
-    'up': 0x26,
-    'down': 0x28,
-    'left': 0x25,
-    'right': 0x27,
-
-    'pageup': 0x21,
-    'page_up': 0x21,
-    'pagedown': 0x22,
-    'page_down': 0x22,
-    'home': 0x24,
-    'end': 0x23,
-    'insert': 0x2D,
-
-    'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73,
-    'f5': 0x74, 'f6': 0x75, 'f7': 0x76, 'f8': 0x77,
-    'f9': 0x78, 'f10': 0x79, 'f11': 0x7A, 'f12': 0x7B,
-
-    # Additional symbols and numpad keys
-    'num0': 0x60, 'num1': 0x61, 'num2': 0x62, 'num3': 0x63,
-    'num4': 0x64, 'num5': 0x65, 'num6': 0x66, 'num7': 0x67,
-    'num8': 0x68, 'num9': 0x69,
-    'multiply': 0x6A, 'add': 0x6B, 'subtract': 0x6D,
-    'decimal': 0x6E, 'divide': 0x6F,
-
-    # Common symbols
-    '-': 0xBD, '=': 0xBB, '[': 0xDB, ']': 0xDD,
-    ';': 0xBA, "'": 0xDE, ',': 0xBC, '.': 0xBE,
-    '/': 0xBF, '\\': 0xDC, '`': 0xC0,
-}
+# Initial capacity of the SendInput array reused by send_inputs_batch
+INPUT_BUFFER_SIZE = 32
 
 
 # C structures
@@ -141,13 +85,132 @@ class INPUT(ctypes.Structure):
     ]
 
 
+# Size passed to every SendInput call
+INPUT_SIZE = ctypes.sizeof(INPUT)
+
+# dwExtraInfo target shared by every INPUT structure, the field is unused
+_EXTRA = ctypes.c_ulong(0)
+_EXTRA_PTR = ctypes.pointer(_EXTRA)
+
+
+def make_key_input(vk_code: int, flags: int = 0) -> INPUT:
+    """
+    Build a keyboard INPUT structure for a virtual key.
+
+    Args:
+        vk_code: Virtual key code
+        flags: KEYEVENTF_* flags (0 = key down)
+
+    Returns:
+        INPUT structure ready for SendInput
+    """
+    ii_ = INPUT_UNION()
+    ii_.ki = KEYBDINPUT(
+        wVk=vk_code,
+        wScan=0,
+        dwFlags=flags,
+        time=0,
+        dwExtraInfo=_EXTRA_PTR
+    )
+    return INPUT(type=INPUT_KEYBOARD, union=ii_)
+
+
+# Private user32 instance with the prototypes of the input path declared
+# once, so ctypes does not infer argument types on every call (and other
+# ctypes.windll users are left untouched)
+if platform.system() == 'Windows':
+    user32 = ctypes.WinDLL('user32')
+    user32.SendInput.argtypes = [wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int]
+    user32.SendInput.restype = wintypes.UINT
+    user32.GetSystemMetrics.argtypes = [ctypes.c_int]
+    user32.GetSystemMetrics.restype = ctypes.c_int
+    user32.GetAsyncKeyState.argtypes = [ctypes.c_int]
+    user32.GetAsyncKeyState.restype = ctypes.c_short
+    user32.SetCursorPos.argtypes = [ctypes.c_int, ctypes.c_int]
+    user32.SetCursorPos.restype = wintypes.BOOL
+else:
+    user32 = None
+
+
 class WindowsInput:
     """Handles keyboard and mouse input using Windows SendInput API."""
 
+    # Fixed attribute set, looked up on every input event
+    __slots__ = ('user32', 'pressed_keys', '_vk_codes', '_batch', '_input_buffer',
+                 '_key_input', '_ki', '_mouse_input', '_mi',
+                 'screen_width', 'screen_height')
+
     def __init__(self):
         """Initialize Windows input handler."""
-        self.user32 = ctypes.windll.user32
+        if user32 is None:
+            raise OSError("WindowsInput requires Windows")
+        self.user32 = user32
         self.pressed_keys: Dict[str, int] = {}  # Map key name to VK code
+        self._vk_codes: Dict[str, int] = dict(VK_BY_KEY_STR)  # Key string to VK code
+        self._batch: Optional[int] = None  # Inputs queued in the buffer by batch()
+        # Reused SendInput array for batches, grown when a batch does not fit
+        self._input_buffer = (INPUT * INPUT_BUFFER_SIZE)()
+
+        # Keyboard and mouse structures filled in place for every event,
+        # _send() copies them when queuing so they can be reused right away
+        self._key_input = INPUT(type=INPUT_KEYBOARD)
+        self._ki = self._key_input.union.ki
+        self._ki.dwExtraInfo = _EXTRA_PTR
+        self._mouse_input = INPUT(type=INPUT_MOUSE)
+        self._mi = self._mouse_input.union.mi
+        self._mi.dwExtraInfo = _EXTRA_PTR
+
+        self.refresh_screen_size()
+
+    def refresh_screen_size(self):
+        """
+        Query the primary screen size used by mouse_move.
+
+        Cached rather than queried on every move, call again after a
+        display resolution change.
+        """
+        self.screen_width = self.user32.GetSystemMetrics(0)
+        self.screen_height = self.user32.GetSystemMetrics(1)
+
+    def _send(self, x: INPUT):
+        """Inject one input now, or queue it while a batch() block is open."""
+        count = self._batch
+        if count is None:
+            self.user32.SendInput(1, ctypes.byref(x), INPUT_SIZE)
+            return
+
+        buffer = self._input_buffer
+        if count == len(buffer):
+            buffer = self._grow_buffer(count + 1)
+        # Copies the structure into the array slot
+        buffer[count] = x
+        self._batch = count + 1
+
+    def _grow_buffer(self, size: int):
+        """Replace the SendInput array with a larger one, keeping its contents."""
+        old = self._input_buffer
+        buffer = self._input_buffer = (INPUT * max(size, 2 * len(old)))()
+        ctypes.memmove(buffer, old, ctypes.sizeof(old))
+        return buffer
+
+    @contextmanager
+    def batch(self):
+        """
+        Collect the inputs sent inside the block and inject them with a
+        single SendInput call when it exits.
+        """
+        if self._batch is not None:
+            # Nested batch, the outer one sends the inputs
+            yield
+            return
+
+        self._batch = 0
+        try:
+            yield
+        finally:
+            count, self._batch = self._batch, None
+            if count:
+                self.user32.SendInput(count, self._input_buffer, INPUT_SIZE)
 
     def _get_vk_code(self, key_str: str) -> int:
         """
@@ -159,43 +222,16 @@ class WindowsInput:
         Returns:
             Virtual key code
         """
-        # Strip quotes if present (e.g., "'z'" -> "z")
-        # This happens when pynput KeyCode objects are converted to string
-        if key_str.startswith("'") and key_str.endswith("'") and len(key_str) >= 3:
-            key_str = key_str[1:-1]
-
-        # Handle escaped characters like '\x03' (Ctrl+C)
-        # These are stored as literal strings, not actual control characters
-        if key_str.startswith('\\x') and len(key_str) == 4:
-            # Ignore control characters - they're typically interrupt signals
-            return 0
-
-        # Handle Key.xxx format from pynput (check BEFORE lowercasing!)
-        if key_str.startswith('Key.'):
-            key_name = key_str.split('.')[1].lower()
-            # Map pynput names to our VK codes
-            if key_name == 'shift_l':
-                key_name = 'shiftleft'
-            elif key_name == 'shift_r':
-                key_name = 'shiftright'
-            elif key_name == 'ctrl_l':
-                key_name = 'ctrlleft'
-            elif key_name == 'ctrl_r':
-                key_name = 'ctrlright'
-            elif key_name == 'alt_l':
-                key_name = 'altleft'
-            elif key_name == 'alt_r':
-                key_name = 'altright'
-            elif key_name == 'page_up':
-                key_name = 'pageup'
-            elif key_name == 'page_down':
-                key_name = 'pagedown'
-
-            return VK_CODE.get(key_name, 0)
-
-        # For regular keys, just lowercase and look up
-        key_lower = key_str.lower()
-        return VK_CODE.get(key_lower, 0)
+        vk_code = self._vk_codes.get(key_str)
+        if vk_code is None:
+            # Not a precomputed variant, parsed once and remembered, so an
+            # unknown key is reported once rather than on every event
+            vk_code = self._vk_codes[key_str] = parse_vk_code(key_str)
+            if vk_code == 0:
+                # Show both the string and hex representation for debugging
+                hex_repr = ''.join(f'\\x{ord(c):02x}' for c in key_str)
+                print(f"[WindowsInput] Warning: Unknown key '{key_str}' (hex: {hex_repr})")
+        return vk_code
 
     def key_down(self, key_str: str):
         """
@@ -206,26 +242,14 @@ class WindowsInput:
         """
         vk_code = self._get_vk_code(key_str)
         if vk_code == 0:
-            # Show both the string and hex representation for debugging
-            hex_repr = ''.join(f'\\x{ord(c):02x}' for c in key_str)
-            print(f"[WindowsInput] Warning: Unknown key '{key_str}' (hex: {hex_repr})")
             return
 
         self.pressed_keys[key_str] = vk_code
 
-        # Create input structure
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.ki = KEYBDINPUT(
-            wVk=vk_code,
-            wScan=0,
-            dwFlags=0,  # Key down
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_KEYBOARD, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        ki = self._ki
+        ki.wVk = vk_code
+        ki.dwFlags = 0  # Key down
+        self._send(self._key_input)
 
     def key_up(self, key_str: str):
         """
@@ -241,31 +265,73 @@ class WindowsInput:
         if key_str in self.pressed_keys:
             del self.pressed_keys[key_str]
 
-        # Create input structure
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.ki = KEYBDINPUT(
-            wVk=vk_code,
-            wScan=0,
-            dwFlags=KEYEVENTF_KEYUP,
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_KEYBOARD, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
-
-    def press_key(self, key_str: str, duration: float = 0.05):
+        ki = self._ki
+        ki.wVk = vk_code
+        ki.dwFlags = KEYEVENTF_KEYUP
+        self._send(self._key_input)
+
+    def type_text(self, text: str):
+        """
+        Type a string with a single SendInput call.
+
+        Every character is sent as a KEYEVENTF_UNICODE key down and up (one
+        pair per UTF-16 code unit), so the text does not depend on the
+        keyboard layout and needs no delay between characters.
+
+        Args:
+            text: Text to type
+        """
+        ki = self._ki
+        ki.wVk = 0
+        try:
+            with self.batch():
+                for code_unit in memoryview(text.encode('utf-16-le')).cast('H'):
+                    ki.wScan = code_unit
+                    ki.dwFlags = KEYEVENTF_UNICODE
+                    self._send(self._key_input)
+                    ki.dwFlags = KEYEVENTF_UNICODE | KEYEVENTF_KEYUP
+                    self._send(self._key_input)
+        finally:
+            ki.wScan = 0  # Virtual key events carry no scan code
+
+    def verify_down(self, vk_code: int) -> bool:
+        """
+        Check whether the system currently sees a virtual key as held.
+
+        Args:
+            vk_code: Virtual key code
+
+        Returns:
+            True if the key is down
+        """
+        return bool(self.user32.GetAsyncKeyState(vk_code) & 0x8000)
+
+    def press_key(self, key_str: str, duration: float = 0.05) -> bool:
         """
         Press and release a key.
 
+        Waits for the release deadline with wait_until instead of relying on
+        one sleep the OS may overshoot.
+
         Args:
             key_str: Key string
             duration: How long to hold the key (seconds)
+
+        Returns:
+            Whether the system saw the key down during the hold
         """
+        vk_code = self._get_vk_code(key_str)
+        deadline_ns = time.perf_counter_ns() + int(duration * 1e9)
         self.key_down(key_str)
-        time.sleep(duration)
+        if vk_code == 0:
+            return False
+
+        wait_until(deadline_ns)
+        # Still held, so the key state shows whether the system saw it
+        registered = self.verify_down(vk_code)
+
         self.key_up(key_str)
+        return registered
 
     def mouse_move(self, x: int, y: int):
         """
@@ -275,27 +341,28 @@ class WindowsInput:
             x: X coordinate (screen coordinates)
             y: Y coordinate (screen coordinates)
         """
-        # Get screen dimensions
-        screen_width = self.user32.GetSystemMetrics(0)
-        screen_height = self.user32.GetSystemMetrics(1)
-
         # Convert to absolute coordinates (0-65535)
-        abs_x = int(x * 65535 / screen_width)
-        abs_y = int(y * 65535 / screen_height)
-
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.mi = MOUSEINPUT(
-            dx=abs_x,
-            dy=abs_y,
-            mouseData=0,
-            dwFlags=MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE,
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_MOUSE, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        abs_x = int(x * 65535 / self.screen_width)
+        abs_y = int(y * 65535 / self.screen_height)
+
+        self._send_mouse(abs_x, abs_y, 0, MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE)
+
+    def mouse_set_cursor(self, x: int, y: int) -> bool:
+        """
+        Place the cursor at an absolute position with SetCursorPos.
+
+        A single call with no INPUT structure and no pointer acceleration,
+        for menu and HUD cursors rather than in-game aim. Not queued by
+        batch(), the cursor moves immediately.
+
+        Args:
+            x: X coordinate (screen coordinates)
+            y: Y coordinate (screen coordinates)
+
+        Returns:
+            True if the cursor was moved
+        """
+        return bool(self.user32.SetCursorPos(x, y))
 
     def mouse_move_relative(self, dx: int, dy: int):
         """
@@ -306,19 +373,44 @@ class WindowsInput:
             dx: Delta X (pixels to move horizontally, positive = right)
             dy: Delta Y (pixels to move vertically, positive = down)
         """
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.mi = MOUSEINPUT(
-            dx=int(dx),
-            dy=int(dy),
-            mouseData=0,
-            dwFlags=MOUSEEVENTF_MOVE,  # Relative movement (no ABSOLUTE flag)
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_MOUSE, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        # Relative movement (no ABSOLUTE flag)
+        self._send_mouse(int(dx), int(dy), 0, MOUSEEVENTF_MOVE)
+
+    def _send_mouse(self, dx: int, dy: int, mouse_data: int, flags: int):
+        """Fill the reused mouse structure and send it."""
+        mi = self._mi
+        mi.dx = dx
+        mi.dy = dy
+        mi.mouseData = mouse_data
+        mi.dwFlags = flags
+        self._send(self._mouse_input)
+
+    def send_inputs_batch(self, inputs: List[INPUT]) -> int:
+        """
+        Inject several input events with a single SendInput call.
+
+        Args:
+            inputs: INPUT structures, sent in order
+
+        Returns:
+            Number of events successfully inserted
+        """
+        if not inputs:
+            return 0
+
+        if self._batch is not None:
+            for x in inputs:
+                self._send(x)
+            return len(inputs)
+
+        count = len(inputs)
+        buffer = self._input_buffer
+        if count > len(buffer):
+            buffer = self._grow_buffer(count)
+        for i, x in enumerate(inputs):
+            # Copies the structure into the array slot
+            buffer[i] = x
+        return self.user32.SendInput(count, buffer, INPUT_SIZE)
 
     def mouse_down(self, button: str = 'left'):
         """
@@ -334,18 +426,7 @@ class WindowsInput:
         }
 
         flag = button_flags.get(button.lower(), MOUSEEVENTF_LEFTDOWN)
-
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.mi = MOUSEINPUT(
-            dx=0, dy=0, mouseData=0,
-            dwFlags=flag,
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_MOUSE, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        self._send_mouse(0, 0, 0, flag)
 
     def mouse_up(self, button: str = 'left'):
         """
@@ -361,18 +442,7 @@ class WindowsInput:
         }
 
         flag = button_flags.get(button.lower(), MOUSEEVENTF_LEFTUP)
-
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.mi = MOUSEINPUT(
-            dx=0, dy=0, mouseData=0,
-            dwFlags=flag,
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_MOUSE, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        self._send_mouse(0, 0, 0, flag)
 
     def mouse_scroll(self, amount: int):
         """
@@ -385,18 +455,8 @@ class WindowsInput:
         WHEEL_DELTA = 120
         scroll_amount = int(amount * WHEEL_DELTA)
 
-        extra = ctypes.c_ulong(0)
-        ii_ = INPUT_UNION()
-        ii_.mi = MOUSEINPUT(
-            dx=0, dy=0,
-            mouseData=wintypes.DWORD(scroll_amount),
-            dwFlags=MOUSEEVENTF_WHEEL,
-            time=0,
-            dwExtraInfo=ctypes.pointer(extra)
-        )
-
-        x = INPUT(type=INPUT_MOUSE, union=ii_)
-        self.user32.SendInput(1, ctypes.pointer(x), ctypes.sizeof(x))
+        # mouseData is a DWORD, negative amounts are sent as their two's complement
+        self._send_mouse(0, 0, scroll_amount & 0xFFFFFFFF, MOUSEEVENTF_WHEEL)
 
     def release_all_keys(self):
         """Release all currently pressed keys."""
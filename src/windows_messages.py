@@ -4,12 +4,14 @@ This is an alternative to SendInput that might work with anti-cheat games.
 """
 
 import ctypes
+import platform
 from ctypes import wintypes
 import time
+
 try:
-    import pygetwindow as gw
+    from src.vk_codes import VK_CODE, VK_BY_KEY_STR, parse_vk_code
 except ImportError:
-    gw = None
+    from vk_codes import VK_CODE, VK_BY_KEY_STR, parse_vk_code
 
 # Windows message constants
 WM_KEYDOWN = 0x0100
@@ -27,37 +29,30 @@ WM_MBUTTONDOWN = 0x0207
 WM_MBUTTONUP = 0x0208
 WM_MOUSEWHEEL = 0x020A
 
-# Virtual key codes (same as windows_input.py)
-VK_CODE = {
-    'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45, 'f': 0x46,
-    'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A, 'k': 0x4B, 'l': 0x4C,
-    'm': 0x4D, 'n': 0x4E, 'o': 0x4F, 'p': 0x50, 'q': 0x51, 'r': 0x52,
-    's': 0x53, 't': 0x54, 'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58,
-    'y': 0x59, 'z': 0x5A,
-
-    '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
-    '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
-
-    'space': 0x20,
-    'enter': 0x0D,
-    'tab': 0x09,
-    'esc': 0x1B,
-    'backspace': 0x08,
-    'delete': 0x2E,
+# MapVirtualKeyW translation from virtual key to scan code
+MAPVK_VK_TO_VSC = 0
 
-    'shift': 0x10,
-    'ctrl': 0x11,
-    'alt': 0x12,
+# Keys whose lParam carries the extended-key flag (bit 24): arrows and the
+# navigation block, which share scan codes with the numeric keypad, right
+# Ctrl and Alt, which share them with the left ones, and numpad divide
+EXTENDED_VKS = {0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2D, 0x2E,
+                0x6F, 0xA3, 0xA5}
 
-    'up': 0x26,
-    'down': 0x28,
-    'left': 0x25,
-    'right': 0x27,
 
-    'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73,
-    'f5': 0x74, 'f6': 0x75, 'f7': 0x76, 'f8': 0x77,
-    'f9': 0x78, 'f10': 0x79, 'f11': 0x7A, 'f12': 0x7B,
-}
+# Private user32 instance with the prototypes of the calls below declared once
+if platform.system() == 'Windows':
+    user32 = ctypes.WinDLL('user32')
+    user32.PostMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.PostMessageW.restype = wintypes.BOOL
+    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    user32.EnumWindows.argtypes = [WNDENUMPROC, wintypes.LPARAM]
+    user32.EnumWindows.restype = wintypes.BOOL
+    user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+    user32.GetWindowTextW.restype = ctypes.c_int
+    user32.MapVirtualKeyW.argtypes = [wintypes.UINT, wintypes.UINT]
+    user32.MapVirtualKeyW.restype = wintypes.UINT
+else:
+    user32 = None
 
 
 class WindowsMessages:
@@ -70,57 +65,72 @@ class WindowsMessages:
         Args:
             window_title: Partial window title to target (e.g., "Star Citizen")
         """
-        self.user32 = ctypes.windll.user32
+        if user32 is None:
+            raise OSError("WindowsMessages requires Windows")
+        self.user32 = user32
         self.window_handle = None
         self.window_title = window_title
+        self._vk_codes = dict(VK_BY_KEY_STR)  # Key string to VK code
+
+        # Key down and key up lParam of every known key, built once:
+        # repeat count 1, scan code (bits 16-23), extended flag (bit 24), and
+        # for key up the previous state (bit 30) and transition state (bit 31)
+        self._lparam_down = {}
+        self._lparam_up = {}
+        for vk_code in set(VK_CODE.values()):
+            scan_code = self.user32.MapVirtualKeyW(vk_code, MAPVK_VK_TO_VSC)
+            extended = 1 if vk_code in EXTENDED_VKS else 0
+            lparam = 1 | (scan_code << 16) | (extended << 24)
+            self._lparam_down[vk_code] = lparam
+            self._lparam_up[vk_code] = lparam | (1 << 30) | (1 << 31)
 
         if window_title:
             self._find_window(window_title)
 
     def _find_window(self, title_partial):
-        """Find window by partial title."""
-        if not gw:
-            print("[WindowsMessages] Warning: pygetwindow not available")
-            return False
+        """
+        Find the first top-level window whose title contains title_partial.
 
-        try:
-            windows = gw.getAllWindows()
-            for window in windows:
-                if title_partial.lower() in window.title.lower():
-                    # Get window handle using ctypes
-                    self.window_handle = self.user32.FindWindowW(None, window.title)
-                    print(f"[WindowsMessages] Found window: '{window.title}' (handle: {self.window_handle})")
-                    return True
-
-            print(f"[WindowsMessages] Warning: Could not find window with '{title_partial}'")
-            return False
+        Enumerates windows with EnumWindows and stops at the first match,
+        without building an object per window.
+        """
+        title_lower = title_partial.lower()
+        title = ctypes.create_unicode_buffer(256)
+
+        def check_window(hwnd, _):
+            self.user32.GetWindowTextW(hwnd, title, len(title))
+            if title_lower in title.value.lower():
+                self.window_handle = hwnd
+                return False  # Stop enumerating
+            return True
 
+        try:
+            self.window_handle = None
+            self.user32.EnumWindows(WNDENUMPROC(check_window), 0)
         except Exception as e:
             print(f"[WindowsMessages] Error finding window: {e}")
             return False
 
+        if self.window_handle:
+            print(f"[WindowsMessages] Found window: '{title.value}' (handle: {self.window_handle})")
+            return True
+
+        print(f"[WindowsMessages] Warning: Could not find window with '{title_partial}'")
+        return False
+
     def set_window_handle(self, hwnd):
         """Manually set the target window handle."""
         self.window_handle = hwnd
 
     def _get_vk_code(self, key_str: str) -> int:
         """Get virtual key code for a key string."""
-        # Strip quotes if present
-        if key_str.startswith("'") and key_str.endswith("'") and len(key_str) >= 3:
-            key_str = key_str[1:-1]
-
-        # Handle escaped characters
-        if key_str.startswith('\\x') and len(key_str) == 4:
-            return 0
-
-        # Handle Key.xxx format
-        if key_str.startswith('Key.'):
-            key_name = key_str.split('.')[1].lower()
-            return VK_CODE.get(key_name, 0)
-
-        # Regular key
-        key_lower = key_str.lower()
-        return VK_CODE.get(key_lower, 0)
+        vk_code = self._vk_codes.get(key_str)
+        if vk_code is None:
+            # Parsed once and remembered, unknown keys are reported once
+            vk_code = self._vk_codes[key_str] = parse_vk_code(key_str)
+            if vk_code == 0:
+                print(f"[WindowsMessages] Warning: Unknown key '{key_str}'")
+        return vk_code
 
     def key_down(self, key_str: str):
         """Send key down message."""
@@ -130,14 +140,10 @@ class WindowsMessages:
 
         vk_code = self._get_vk_code(key_str)
         if vk_code == 0:
-            print(f"[WindowsMessages] Warning: Unknown key '{key_str}'")
             return
 
-        # lParam encoding: repeat count (1), scan code, extended flag, context code, previous state, transition state
-        # For simplicity, we use 0x00000001 (repeat=1, everything else=0)
-        lparam = 0x00000001
-
-        self.user32.PostMessageW(self.window_handle, WM_KEYDOWN, vk_code, lparam)
+        self.user32.PostMessageW(self.window_handle, WM_KEYDOWN, vk_code,
+                                 self._lparam_down[vk_code])
 
     def key_up(self, key_str: str):
         """Send key up message."""
@@ -148,10 +154,8 @@ class WindowsMessages:
         if vk_code == 0:
             return
 
-        # lParam for key up: bit 30 = previous state (1), bit 31 = transition state (1)
-        lparam = 0xC0000001
-
-        self.user32.PostMessageW(self.window_handle, WM_KEYUP, vk_code, lparam)
+        self.user32.PostMessageW(self.window_handle, WM_KEYUP, vk_code,
+                                 self._lparam_up[vk_code])
 
     def press_key(self, key_str: str, duration: float = 0.05):
         """Press and release a key."""
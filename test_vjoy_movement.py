@@ -8,10 +8,30 @@ sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 try:
     from src.vjoy_input import VJoyInput, VJOY_AVAILABLE
+    from src.precise_timing import wait_until
 except ImportError:
     print("Error: Could not import vJoy modules.")
     sys.exit(1)
 
+def hold(handler, key: str, seconds: float) -> float:
+    """
+    Hold a key for a duration timed against a perf_counter deadline.
+
+    Args:
+        handler: Input handler with key_down/key_up
+        key: Key string to hold
+        seconds: Hold duration
+
+    Returns:
+        Measured hold duration in seconds
+    """
+    start = time.perf_counter_ns()
+    handler.key_down(key)
+    wait_until(start + int(seconds * 1e9))
+    handler.key_up(key)
+    return (time.perf_counter_ns() - start) / 1e9
+
+
 def main():
     print("=" * 60)
     print("Star Citizen vJoy Movement Test")
@@ -44,24 +64,18 @@ def main():
     for i in range(15, 0, -1):
         print(f"  Starting in {i}...")
         time.sleep(1)
-    
+
     print("\n[Test] Attempting to send FORWARD movement via vJoy...")
 
     try:
         # Initialize vJoy
         vjoy_handler = VJoyInput()
 
-        # Simulate 'W' key down (moves Y-axis to max)
-        vjoy_handler.key_down('w')
-        print("[Test] vJoy FORWARD signal sent.")
-
-        # Hold for 3 seconds
-        print("[Test] Holding for 3 seconds...")
-        time.sleep(3)
-
-        # Simulate 'W' key up (centers Y-axis)
-        vjoy_handler.key_up('w')
-        print("[Test] vJoy FORWARD signal stopped.")
+        # Simulate 'W' held for 3 seconds (Y-axis to max, then centered)
+        print("[Test] vJoy FORWARD signal sent, holding for 3 seconds...")
+        held = hold(vjoy_handler, 'w', 3.0)
+        print(f"[Test] vJoy FORWARD signal stopped after {held:.4f}s.")
+        vjoy_handler.close()
         
         print("\n[Test] Finished.")
         print("Please check if your character/ship moved forward for 3 seconds.")
@@ -0,0 +1,40 @@
+"""Tests for reading the NDJSON input event log."""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.event_log import INPUTS_JSONL, load_events
+
+
+class TruncatedLogTest(unittest.TestCase):
+    """A recording interrupted mid-write leaves a partial last line."""
+
+    def setUp(self):
+        self.session_dir = Path(tempfile.mkdtemp())
+        self.log_path = self.session_dir / INPUTS_JSONL
+        self.events = [{'timestamp': 0.0, 'type': 'key_press', 'data': {'key': 'z', 'key_id': "'z'"}},
+                       {'timestamp': 0.1, 'type': 'key_release', 'data': {'key': 'z', 'key_id': "'z'"}}]
+        self.lines = b''.join(orjson.dumps(event) + b'\n' for event in self.events)
+
+    def test_truncated_last_line_is_dropped(self):
+        self.log_path.write_bytes(self.lines + b'{"timestamp":0.2,"type":"key_pr')
+        self.assertEqual(load_events(self.session_dir), self.events)
+
+    def test_truncated_last_line_with_newline_is_dropped(self):
+        self.log_path.write_bytes(self.lines + b'{"timestamp":0.2,"ty\n')
+        self.assertEqual(load_events(self.session_dir), self.events)
+
+    def test_malformed_inner_line_raises(self):
+        self.log_path.write_bytes(b'{"timestamp":0.2,"ty\n' + self.lines)
+        with self.assertRaises(orjson.JSONDecodeError):
+            load_events(self.session_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""Tests for the shared sleep-then-spin wait."""
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.precise_timing import wait_until, STOP_WAIT_MARGIN_NS
+
+
+class WaitUntilTest(unittest.TestCase):
+    """wait_until returns at the deadline, or early once stop is set."""
+
+    def test_returns_at_deadline(self):
+        deadline = time.perf_counter_ns() + 5_000_000
+        wait_until(deadline)
+        self.assertGreaterEqual(time.perf_counter_ns(), deadline)
+
+    def test_reuses_given_sleep(self):
+        slept = []
+        deadline = time.perf_counter_ns() + 5_000_000
+        wait_until(deadline, spin_ns=1_000_000, sleep=slept.append)
+        self.assertEqual(len(slept), 1)
+        self.assertLessEqual(slept[0], 4_000_000)
+        self.assertGreaterEqual(time.perf_counter_ns(), deadline)
+
+    def test_stop_ends_wait(self):
+        stop = threading.Event()
+        threading.Timer(0.05, stop.set).start()
+        start = time.perf_counter_ns()
+        wait_until(start + 10 * STOP_WAIT_MARGIN_NS + 2_000_000_000, stop=stop)
+        self.assertLess(time.perf_counter_ns() - start, 1_000_000_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
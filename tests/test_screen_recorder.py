@@ -0,0 +1,60 @@
+"""Tests for the frame ring buffer shared by capture and encoding."""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from src.screen_recorder import FrameRingBuffer
+except ImportError:  # cv2 or mss missing
+    FrameRingBuffer = None
+
+
+def _push(ring, value):
+    """Capture one frame filled with value, returning whether it was kept."""
+    slot = ring.next_slot()
+    if slot is None:
+        return False
+    slot[...] = value
+    ring.publish(float(value))
+    return True
+
+
+@unittest.skipIf(FrameRingBuffer is None, "cv2 or mss is not installed")
+class FrameRingBufferTest(unittest.TestCase):
+    """A frame being written out is never overwritten by the producer."""
+
+    def test_slot_held_by_consumer_is_not_overwritten(self):
+        for policy in FrameRingBuffer.DROP_POLICIES:
+            with self.subTest(policy=policy):
+                ring = FrameRingBuffer(4, (2, 2, 3), drop_policy=policy)
+                _push(ring, 1)
+                frames = ring.drain()
+                timestamp, frame = next(frames)
+
+                # The consumer stalls on this frame while capture continues
+                for value in range(2, 10):
+                    _push(ring, value)
+                self.assertTrue((frame == 1).all())
+                self.assertGreater(ring.dropped_newest, 0)
+
+                # Once released, the consumer resumes on frames not overwritten
+                rest = [(t, f.copy()) for t, f in frames]
+                for t, f in rest:
+                    self.assertTrue((f == t).all())
+
+    def test_drop_oldest_skips_to_recent_frames(self):
+        ring = FrameRingBuffer(8, (1, 1, 1))
+        for value in range(1, 8):
+            _push(ring, value)
+        timestamps = [t for t, _ in ring.drain()]
+        self.assertEqual(timestamps, [2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+        self.assertEqual(ring.dropped, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
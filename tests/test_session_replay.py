@@ -0,0 +1,103 @@
+"""Tests for SessionReplay key resolution and playback error handling."""
+
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from src import session_replay
+except ImportError:  # pynput missing
+    session_replay = None
+
+
+def _write_session(lines):
+    """Create a session directory holding the given inputs.jsonl lines."""
+    session_dir = tempfile.mkdtemp()
+    (Path(session_dir) / 'inputs.jsonl').write_text('\n'.join(lines) + '\n')
+    return session_dir
+
+
+def _fake_pyautogui():
+    """pyautogui stand-in recording the calls made to it."""
+    fake = types.SimpleNamespace(PAUSE=0.1, FAILSAFE=True, calls=[])
+    for name in ('keyDown', 'keyUp', 'moveTo', 'mouseDown', 'mouseUp', 'scroll'):
+        setattr(fake, name, lambda *args, _name=name, **kwargs: fake.calls.append((_name, args)))
+    return fake
+
+
+@unittest.skipIf(session_replay is None, "pynput is not installed")
+class PyautoguiFallbackTest(unittest.TestCase):
+    """The pyautogui fallback sends keys with known VK codes through SendInput."""
+
+    def setUp(self):
+        session_dir = _write_session([
+            '{"timestamp":0.0,"type":"key_press","data":{"key":"z","key_id":"\'z\'"}}',
+            '{"timestamp":0.1,"type":"key_release","data":{"key":"z","key_id":"\'z\'"}}',
+            '{"timestamp":0.2,"type":"key_press","data":{"key":null,"key_id":"Key.shift"}}',
+        ])
+        self.send_input = mock.Mock(return_value=1)
+        self.pyautogui = _fake_pyautogui()
+        patches = [
+            mock.patch.object(session_replay.platform, 'system', return_value='Windows'),
+            mock.patch.object(session_replay, 'WINDOWS_INPUT_AVAILABLE', True),
+            mock.patch.object(session_replay, 'user32',
+                              types.SimpleNamespace(SendInput=self.send_input)),
+            mock.patch.object(session_replay, 'pyautogui', self.pyautogui),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.replay = session_replay.SessionReplay(session_dir, input_method='pyautogui')
+
+    def test_character_key_gets_prebuilt_input(self):
+        replay = self.replay
+        z = replay.key_ids.index("'z'")
+        self.assertIsNotNone(replay._key_inputs[z])
+        down, up = replay._key_inputs[z]
+        self.assertEqual(down.union.ki.wVk, ord('Z'))
+        self.assertEqual(up.union.ki.dwFlags, session_replay.KEYEVENTF_KEYUP)
+        self.assertIsNotNone(replay._key_inputs[replay.key_ids.index('Key.shift')])
+
+    def test_stop_releases_character_key(self):
+        replay = self.replay
+        z = replay.key_ids.index("'z'")
+        replay._pyautogui_key_press(0, 0, z, 0)
+        self.send_input.reset_mock()
+
+        replay.stop()
+
+        self.send_input.assert_called_once()
+        sent = self.send_input.call_args[0][1]._obj
+        self.assertEqual(sent.union.ki.wVk, ord('Z'))
+        self.assertEqual(sent.union.ki.dwFlags, session_replay.KEYEVENTF_KEYUP)
+        self.assertEqual(self.pyautogui.calls, [])
+        self.assertFalse(replay._pressed_keys.any())
+
+
+@unittest.skipIf(session_replay is None, "pynput is not installed")
+class PlaybackErrorTest(unittest.TestCase):
+    """An exception on the player thread is raised again by play()."""
+
+    def test_handler_error_is_raised(self):
+        session_dir = _write_session([
+            '{"timestamp":0.0,"type":"key_press","data":{"key":"z","key_id":"\'z\'"}}',
+            '{"timestamp":0.01,"type":"key_release","data":{"key":"z","key_id":"\'z\'"}}',
+        ])
+        fake = _fake_pyautogui()
+        fake.keyDown = mock.Mock(side_effect=RuntimeError("injection failed"))
+        with mock.patch.object(session_replay.platform, 'system', return_value='Linux'), \
+                mock.patch.object(session_replay, 'pyautogui', fake):
+            replay = session_replay.SessionReplay(session_dir, input_method='pyautogui')
+            replay._find_game_window = lambda: True
+            with self.assertRaisesRegex(RuntimeError, "injection failed"):
+                replay.play(start_delay=0)
+        self.assertFalse(replay.replaying)
+
+
+if __name__ == '__main__':
+    unittest.main()
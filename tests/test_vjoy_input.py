@@ -0,0 +1,69 @@
+"""Tests for the stick reports VJoyInput sends."""
+
+import sys
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import vjoy_input
+
+REPORT_FIELDS = ('wAxisX', 'wAxisY', 'wAxisZ', 'wAxisXRot', 'wAxisYRot', 'wAxisZRot', 'lButtons')
+
+
+class FakeDevice:
+    """pyvjoy.VJoyDevice stand-in recording every report sent."""
+
+    def __init__(self, device_id):
+        self.data = types.SimpleNamespace(lButtons=0)
+        self.sent = []
+
+    def update(self):
+        self.sent.append({field: getattr(self.data, field, None) for field in REPORT_FIELDS})
+
+
+class BatchTest(unittest.TestCase):
+    """Changes made inside batch() reach the device in a single report."""
+
+    def setUp(self):
+        fake_pyvjoy = types.SimpleNamespace(VJoyDevice=FakeDevice)
+        with mock.patch.dict(sys.modules, {'pyvjoy': fake_pyvjoy}), \
+                mock.patch.object(vjoy_input, 'VJOY_AVAILABLE', True):
+            self.vjoy = vjoy_input.VJoyInput()
+        self.addCleanup(self.vjoy.close)
+        self.stick1 = self.vjoy.stick1
+        self.stick1.sent.clear()
+
+    def test_recenter_waits_for_batch(self):
+        with self.vjoy.batch():
+            self.vjoy.mouse_move_relative(1, 0)
+            # Past the recenter deadline: the recenter thread must not send
+            # the moved axis and the staged button before the batch ends
+            time.sleep(vjoy_input.RECENTER_DELAY * 5)
+            self.vjoy.key_down('Key.space')
+            self.assertEqual(self.stick1.sent, [])
+
+        report = self.stick1.sent[0]
+        self.assertNotEqual(report['wAxisXRot'], self.vjoy.axis_center)
+        self.assertEqual(report['lButtons'], 1)
+
+        # Recentered once the batch released the lock
+        deadline = time.monotonic() + 1
+        while len(self.stick1.sent) < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(self.stick1.sent[1]['wAxisXRot'], self.vjoy.axis_center)
+        self.assertEqual(self.stick1.sent[1]['lButtons'], 1)
+
+
+    def test_close_stops_recenter_thread(self):
+        self.vjoy.mouse_move_relative(1, 0)
+        self.vjoy.close()
+        self.assertFalse(self.vjoy._recenter_thread.is_alive())
+        self.assertEqual(self.stick1.sent[-1]['wAxisXRot'], self.vjoy.axis_center)
+
+
+if __name__ == '__main__':
+    unittest.main()
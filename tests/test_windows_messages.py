@@ -0,0 +1,57 @@
+"""Tests for the lParam of posted key messages."""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import windows_messages
+
+# Scan codes MapVirtualKeyW returns on a US layout
+SCAN_CODES = {0x41: 0x1E, 0xA2: 0x1D, 0xA3: 0x1D, 0x6F: 0x35}
+
+
+class FakeUser32:
+    """user32 stand-in recording posted messages."""
+
+    def __init__(self):
+        self.posted = []
+
+    def MapVirtualKeyW(self, vk_code, map_type):
+        return SCAN_CODES.get(vk_code, 0)
+
+    def PostMessageW(self, hwnd, msg, wparam, lparam):
+        self.posted.append((msg, wparam, lparam))
+        return 1
+
+
+class KeyLParamTest(unittest.TestCase):
+    """Key messages carry the scan code and, for extended keys, bit 24."""
+
+    def setUp(self):
+        self.user32 = FakeUser32()
+        with mock.patch.object(windows_messages, 'user32', self.user32):
+            self.messages = windows_messages.WindowsMessages()
+        self.messages.window_handle = 1
+
+    def test_right_ctrl_is_extended(self):
+        self.messages.key_down('Key.ctrl_r')
+        msg, wparam, lparam = self.user32.posted[-1]
+        self.assertEqual((msg, wparam), (windows_messages.WM_KEYDOWN, 0xA3))
+        self.assertEqual(lparam, 1 | (0x1D << 16) | (1 << 24))
+
+    def test_left_ctrl_is_not_extended(self):
+        self.messages.key_down('Key.ctrl_l')
+        self.assertEqual(self.user32.posted[-1][2], 1 | (0x1D << 16))
+
+    def test_character_key_up(self):
+        self.messages.key_up("'a'")
+        msg, wparam, lparam = self.user32.posted[-1]
+        self.assertEqual((msg, wparam), (windows_messages.WM_KEYUP, 0x41))
+        self.assertEqual(lparam, 1 | (0x1E << 16) | (1 << 30) | (1 << 31))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Convert the frame-aligned JSON inputs of recorded sessions to the columnar
+inputs_frame_aligned.npz layout.
+
+Sessions recorded before the .npz was written only have
+inputs_frame_aligned.json(.zst); TrainingDataLoader converts them on every
+load, running this once per session stores the columns instead.
+
+Usage: python utils/convert_inputs.py <session_path> [<session_path> ...]
+"""
+
+import sys
+
+import numpy as np
+
+try:
+    from utils.load_data import FRAME_ALIGNED_NPZ, TrainingDataLoader, frames_to_columns
+except ImportError:
+    from load_data import FRAME_ALIGNED_NPZ, TrainingDataLoader, frames_to_columns
+
+
+def convert_session(session_path: str) -> bool:
+    """
+    Write inputs_frame_aligned.npz for a session from its JSON inputs.
+
+    Args:
+        session_path: Path to recorded session directory
+
+    Returns:
+        True if the file was written, False if the session already has it
+    """
+    loader = TrainingDataLoader(session_path)
+    npz_path = loader.session_path / FRAME_ALIGNED_NPZ
+    if npz_path.exists():
+        print(f"[ConvertInputs] {npz_path} already exists, skipped")
+        return False
+
+    columns = frames_to_columns(loader.load_inputs())
+    np.savez_compressed(npz_path, **columns)
+    print(f"[ConvertInputs] Wrote {npz_path} ({len(columns['timestamps'])} frames)")
+    return True
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python utils/convert_inputs.py <session_path> [<session_path> ...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        convert_session(path)
@@ -3,31 +3,208 @@ Utility functions for loading recorded training data.
 Use these functions in your AI training pipeline.
 """
 
-import json
+import mmap
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional, Union
 import numpy as np
 import imageio
+import imageio_ffmpeg
+import orjson
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+try:
+    import decord
+    DECORD_AVAILABLE = True
+except ImportError:
+    DECORD_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Columnar frame-aligned inputs written by DataRecorder (layout in
+# metadata.json 'frame_aligned_format')
+FRAME_ALIGNED_NPZ = "inputs_frame_aligned.npz"
+
+# Decoded RGB frames of gameplay.mp4, written by TrainingDataLoader(cache_frames=True)
+FRAME_CACHE_NPY = "gameplay_cache.npy"
+
+
+# Frame color layouts: RGB, the decoder's YUV 4:2:0 planes stacked as
+# (height * 3 / 2, width), or the luma (Y) plane alone
+FRAME_COLORS = ('rgb', 'yuv420p', 'gray')
+
+
+def frames_to_columns(frames: List[dict]) -> Dict[str, np.ndarray]:
+    """
+    Convert frame-aligned input states to the inputs_frame_aligned.npz layout.
+
+    Args:
+        frames: Input states, one per frame, as in inputs_frame_aligned.json
+
+    Returns:
+        Dictionary of column arrays (timestamps, keys, pressed, mouse_xy,
+        buttons, mouse_buttons), key and button states packed into bitmaps
+    """
+    keys = sorted({key for frame in frames for key in frame['pressed_keys']})
+    buttons = sorted({button for frame in frames for button in frame['mouse_buttons']})
+    key_index = {key: i for i, key in enumerate(keys)}
+    button_index = {button: i for i, button in enumerate(buttons)}
+
+    pressed = np.zeros((len(frames), len(keys)), dtype=bool)
+    mouse_buttons = np.zeros((len(frames), len(buttons)), dtype=bool)
+    for i, frame in enumerate(frames):
+        for key in frame['pressed_keys']:
+            pressed[i, key_index[key]] = True
+        for button in frame['mouse_buttons']:
+            mouse_buttons[i, button_index[button]] = True
+
+    return {
+        'timestamps': np.array([frame['timestamp'] for frame in frames], dtype=np.float64),
+        'keys': np.array(keys, dtype=str),
+        'pressed': np.packbits(pressed, axis=1),
+        'mouse_xy': np.array([(frame['mouse_x'], frame['mouse_y']) for frame in frames],
+                             dtype=np.int16).reshape(-1, 2),
+        'buttons': np.array(buttons, dtype=str),
+        'mouse_buttons': np.packbits(mouse_buttons, axis=1)
+    }
+
+
+def to_float01(frames: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert uint8 frames to float32 in [0, 1] in a single pass.
+
+    Args:
+        frames: uint8 frames, e.g. from TrainingDataLoader.get_batch
+        out: Optional float32 array of the same shape to write into
+
+    Returns:
+        float32 array of frames scaled to [0, 1]
+    """
+    return np.multiply(frames, np.float32(1 / 255), out=out, dtype=np.float32)
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _preprocess_kernel(frames, scale, offset, out):
+        """Scale, shift and transpose to channels-first in one pass, frames in parallel."""
+        num_frames, height, width, channels = frames.shape
+        for i in prange(num_frames):
+            for c in range(channels):
+                for y in range(height):
+                    for x in range(width):
+                        out[i, c, y, x] = frames[i, y, x, c] * scale[c] + offset[c]
+
+
+def preprocess_batch(frames: np.ndarray, mean, std,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Normalize uint8 frames for a network input.
+
+    Scales to [0, 1], subtracts mean, divides by std and transposes to
+    channels-first, as one multiply-add per value. With numba installed
+    this is a single parallel loop over the batch, NumPy otherwise.
+
+    Args:
+        frames: uint8 frames of shape (num_frames, height, width, channels)
+        mean: Per-channel mean, in [0, 1] units (scalar or sequence)
+        std: Per-channel standard deviation, in [0, 1] units (scalar or sequence)
+        out: Optional float32 array of shape (num_frames, channels, height, width) to write into
+
+    Returns:
+        float32 array of shape (num_frames, channels, height, width)
+    """
+    num_frames, height, width, channels = frames.shape
+    mean = np.broadcast_to(np.asarray(mean, dtype=np.float32), (channels,))
+    std = np.broadcast_to(np.asarray(std, dtype=np.float32), (channels,))
+    scale = (1 / (255 * std)).astype(np.float32)
+    offset = (-mean / std).astype(np.float32)
+
+    if out is None:
+        out = np.empty((num_frames, channels, height, width), dtype=np.float32)
+
+    if NUMBA_AVAILABLE:
+        _preprocess_kernel(frames, scale, offset, out)
+    else:
+        np.multiply(frames.transpose(0, 3, 1, 2), scale[:, None, None], out=out)
+        out += offset[:, None, None]
+    return out
 
 
 class TrainingDataLoader:
     """Load and process recorded training data."""
 
-    def __init__(self, session_path: str):
+    def __init__(self, session_path: str, cache_frames: bool = False):
         """
         Initialize data loader.
 
         Args:
             session_path: Path to recorded session directory
+            cache_frames: Decode the video once into gameplay_cache.npy and
+                serve RGB frames from it (about width * height * 3 bytes per
+                frame on disk), so later epochs skip decoding
         """
         self.session_path = Path(session_path)
+        self.cache_frames = cache_frames
 
         if not self.session_path.exists():
             raise ValueError(f"Session path does not exist: {session_path}")
 
         self.metadata = self._load_metadata()
         self.video_path = self.session_path / "gameplay.mp4"
-        self.inputs_path = self.session_path / "inputs_frame_aligned.json"
+        self.inputs_path = self._find_inputs_path()
+
+        # Checked once here rather than on every batch
+        self._video_found = self.video_path.is_file()
+
+        # PyAV container of the video, opened on first use and kept open.
+        # Batches may be loaded from prefetch threads, they take turns with it
+        self._container = None
+        self._container_lock = threading.Lock()
+
+        # Decoding position of the shared container: the frame generator, the
+        # frame read past the end of the last load, and the next frame index.
+        # A load starting at _next_frame continues decoding without a seek
+        self._decoded = None
+        self._pending_frame = None
+        self._next_frame = 0
+
+        # Memory-mapped frame cache, opened (and built if needed) on first use
+        self._frame_cache: Optional[np.ndarray] = None
+        self._frame_cache_lock = threading.Lock()
+
+        # Frame-aligned inputs, parsed on first use
+        self._inputs: Optional[List[dict]] = None
+        self._input_columns: Optional[Dict[str, np.ndarray]] = None
+        self._input_records: Optional[np.ndarray] = None
+        self._input_column_sources: Dict[str, Tuple[Optional[str], int]] = {}
+
+        # Video probe results, for sessions whose metadata lacks them
+        self._num_frames: Optional[int] = None
+        self._resolution: Optional[Tuple[int, int]] = None
+
+        # Background decode threads for prefetch(), started on first use
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        # decord readers decoding on each GPU (None when CUDA decoding failed)
+        self._gpu_readers: Dict[int, object] = {}
 
     def _load_metadata(self) -> dict:
         """Load session metadata."""
@@ -35,39 +212,483 @@ class TrainingDataLoader:
         if not metadata_path.exists():
             return {}
 
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
+        return orjson.loads(metadata_path.read_bytes())
+
+    def _find_inputs_path(self) -> Path:
+        """Locate the frame-aligned inputs, zstd-compressed or plain JSON."""
+        name = self.metadata.get('frame_aligned_json')
+        if name:
+            return self.session_path / name
+
+        compressed = self.session_path / "inputs_frame_aligned.json.zst"
+        if compressed.exists():
+            return compressed
+        return self.session_path / "inputs_frame_aligned.json"
 
     def load_inputs(self) -> List[dict]:
         """
         Load frame-aligned input data.
 
+        The file is parsed on the first call only, later calls (and
+        get_batch) return the same cached list, which must not be modified.
+
         Returns:
             List of input states, one per frame
         """
+        if self._inputs is not None:
+            return self._inputs
+
         if not self.inputs_path.exists():
+            if (self.session_path / FRAME_ALIGNED_NPZ).exists():
+                # Session recorded without the JSON copy
+                self._inputs = self._columns_to_frames(self.load_input_columns())
+                return self._inputs
             raise FileNotFoundError(f"Inputs file not found: {self.inputs_path}")
 
-        with open(self.inputs_path, 'r') as f:
-            return json.load(f)
+        if self.inputs_path.suffix == '.zst':
+            if not ZSTD_AVAILABLE:
+                raise ImportError("zstandard is required to read " + self.inputs_path.name)
+            data = zstandard.ZstdDecompressor().decompress(self.inputs_path.read_bytes())
+            self._inputs = orjson.loads(data)
+        else:
+            # Parsed straight from the mapped file, without copying it to a bytes object
+            with open(self.inputs_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        self._inputs = orjson.loads(view)
+        return self._inputs
+
+    def load_input_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Load frame-aligned inputs as column arrays.
 
-    def load_video_frames(self, start_frame: int = 0,
-                         end_frame: Optional[int] = None) -> np.ndarray:
+        Reads inputs_frame_aligned.npz, or converts the JSON inputs once for
+        sessions without it. Slicing the columns is free, no per-frame
+        dictionaries are built.
+
+        Returns:
+            Dictionary of column arrays in the inputs_frame_aligned.npz layout
+        """
+        if self._input_columns is None:
+            npz_path = self.session_path / FRAME_ALIGNED_NPZ
+            if npz_path.exists():
+                with np.load(npz_path) as data:
+                    self._input_columns = {name: data[name] for name in data.files}
+            else:
+                self._input_columns = frames_to_columns(self.load_inputs())
+        return self._input_columns
+
+    def load_input_records(self) -> np.ndarray:
+        """
+        Load frame-aligned inputs as a NumPy structured array, one record per frame.
+
+        Records hold the per-frame columns of load_input_columns (timestamp,
+        pressed bitmap, mouse position, mouse_buttons bitmap) without Python
+        objects, and slices of the array are views. The names of the bitmap
+        bits are the 'keys' and 'buttons' arrays of load_input_columns.
+
+        Returns:
+            Structured array with fields timestamp, pressed, mouse_x, mouse_y
+            and mouse_buttons
+        """
+        if self._input_records is None:
+            columns = self.load_input_columns()
+            dtype = np.dtype([
+                ('timestamp', np.float64),
+                ('pressed', np.uint8, (columns['pressed'].shape[1],)),
+                ('mouse_x', np.int16),
+                ('mouse_y', np.int16),
+                ('mouse_buttons', np.uint8, (columns['mouse_buttons'].shape[1],))
+            ])
+            records = np.empty(len(columns['timestamps']), dtype=dtype)
+            records['timestamp'] = columns['timestamps']
+            records['pressed'] = columns['pressed']
+            records['mouse_x'] = columns['mouse_xy'][:, 0]
+            records['mouse_y'] = columns['mouse_xy'][:, 1]
+            records['mouse_buttons'] = columns['mouse_buttons']
+            self._input_records = records
+        return self._input_records
+
+    def inputs_as_array(self, start_frame: int, num_frames: int, columns,
+                        dtype=np.float32) -> np.ndarray:
+        """
+        Get frame-aligned inputs as a 2D array with one column per named input.
+
+        Each name is resolved to its column once; values are gathered from
+        the input columns with NumPy for the whole range, without per-frame
+        Python work.
+
+        Args:
+            start_frame: Starting frame index
+            num_frames: Number of frames
+            columns: Input names: keys as recorded ("'z'", "Key.shift") or
+                plain ('z', 'shift'), 'mouse_x', 'mouse_y', and mouse
+                buttons as 'mouse_left', 'mouse_right', 'mouse_middle'.
+                Keys and buttons never pressed in the session are all 0
+            dtype: Type of the returned array
+
+        Returns:
+            Array of shape (num_frames, len(columns)): 1 or 0 for keys and
+            buttons, cursor position for mouse_x and mouse_y
+        """
+        data = self.load_input_columns()
+        end_frame = start_frame + num_frames
+        out = np.zeros((len(data['timestamps'][start_frame:end_frame]), len(columns)), dtype=dtype)
+
+        for j, name in enumerate(columns):
+            source, index = self._input_column_source(name)
+            if source == 'mouse_xy':
+                out[:, j] = data['mouse_xy'][start_frame:end_frame, index]
+            elif source is not None:
+                # Bit index of a np.packbits row: byte index // 8, most significant bit first
+                packed = data[source][start_frame:end_frame, index >> 3]
+                out[:, j] = (packed >> (7 - (index & 7))) & 1
+        return out
+
+    def _input_column_source(self, name: str) -> Tuple[Optional[str], int]:
+        """Resolve an inputs_as_array column name to (column array, index), cached."""
+        source = self._input_column_sources.get(name)
+        if source is None:
+            data = self.load_input_columns()
+            keys = data['keys'].tolist()
+            buttons = data['buttons'].tolist()
+            if name in ('mouse_x', 'mouse_y'):
+                source = ('mouse_xy', 0 if name == 'mouse_x' else 1)
+            elif name.startswith('mouse_') and name[6:] in buttons:
+                source = ('mouse_buttons', buttons.index(name[6:]))
+            else:
+                source = (None, 0)  # Never pressed in this session
+                for key_str in (name, f"'{name}'", f"Key.{name}"):
+                    if key_str in keys:
+                        source = ('pressed', keys.index(key_str))
+                        break
+            self._input_column_sources[name] = source
+        return source
+
+    @staticmethod
+    def _columns_to_frames(columns: Dict[str, np.ndarray]) -> List[dict]:
+        """Rebuild per-frame input states from column arrays."""
+        keys = columns['keys'].tolist()
+        buttons = columns['buttons'].tolist()
+        pressed = np.unpackbits(columns['pressed'], axis=1, count=len(keys))
+        mouse_buttons = np.unpackbits(columns['mouse_buttons'], axis=1, count=len(buttons))
+        return [
+            {
+                'timestamp': timestamp,
+                'pressed_keys': [keys[k] for k in np.flatnonzero(key_row)],
+                'mouse_x': x,
+                'mouse_y': y,
+                'mouse_buttons': [buttons[b] for b in np.flatnonzero(button_row)]
+            }
+            for timestamp, key_row, (x, y), button_row in zip(
+                columns['timestamps'].tolist(), pressed, columns['mouse_xy'].tolist(),
+                mouse_buttons)
+        ]
+
+    def iter_video_frames(self, start_frame: int = 0, end_frame: Optional[int] = None,
+                          target_size: Optional[Tuple[int, int]] = None,
+                          color: str = 'rgb') -> Iterator[np.ndarray]:
+        """
+        Iterate over video frames one at a time.
+
+        Only the current frame is held in memory, use this rather than
+        load_video_frames to stream through long ranges.
+
+        Args:
+            start_frame: First frame to load
+            end_frame: Last frame to load (None = all)
+            target_size: (height, width) to scale frames to while decoding (None = recorded size)
+            color: 'rgb', 'yuv420p' or 'gray' (see load_video_frames)
+
+        Yields:
+            uint8 array for each frame, shaped as in load_video_frames
+
+        Raises:
+            FileNotFoundError: If the video is missing (on first iteration)
+        """
+        if not self._video_found:
+            raise FileNotFoundError(f"Video file not found: {self.video_path}")
+
+        self._check_color(color)
+        if not AV_AVAILABLE:
+            yield from self._iter_video_frames_imageio(start_frame, end_frame, target_size)
+            return
+
+        # A container of its own: the shared one cannot be held between yields
+        with av.open(str(self.video_path)) as container:
+            container.streams.video[0].thread_type = 'AUTO'  # Decode on several threads
+            for _, frame in self._decode(container, start_frame, end_frame):
+                yield self._to_array(frame, target_size, color)
+
+    def load_video_frames(self, start_frame: int = 0, end_frame: Optional[int] = None,
+                          target_size: Optional[Tuple[int, int]] = None,
+                          color: str = 'rgb') -> np.ndarray:
         """
         Load video frames.
 
+        Frames scaled with target_size are resized by libswscale as part of
+        the RGB conversion, the full-size frame is never copied to NumPy.
+        'yuv420p' and 'gray' frames are copied from the decoder planes
+        without any RGB conversion ('gray' reads the Y plane only).
+
         Args:
             start_frame: First frame to load
             end_frame: Last frame to load (None = all)
+            target_size: (height, width) to scale frames to while decoding (None = recorded size)
+            color: 'rgb', 'yuv420p' (PyAV only) or 'gray' (PyAV only)
 
         Returns:
-            Numpy array of shape (num_frames, height, width, channels)
+            uint8 array of shape (num_frames, height, width, 3) for 'rgb',
+            (num_frames, height * 3 / 2, width) for 'yuv420p', or
+            (num_frames, height, width) for 'gray'. With cache_frames, RGB
+            frames at the recorded size are a read-only view of the cache
         """
-        if not self.video_path.exists():
+        if not self._video_found:
             raise FileNotFoundError(f"Video file not found: {self.video_path}")
 
-        reader = imageio.get_reader(str(self.video_path))
-        frames = []
+        self._check_color(color)
+        if self.cache_frames and target_size is None and color == 'rgb':
+            cache = self._load_frame_cache()
+            # The slice is a view, pages are read when the frames are used:
+            # start reading them now, in the background
+            self._advise_frames(getattr(mmap, 'MADV_WILLNEED', None), start_frame, end_frame)
+            return cache[start_frame:end_frame]
+        if not AV_AVAILABLE:
+            return np.array(list(self._iter_video_frames_imageio(start_frame, end_frame,
+                                                                 target_size)))
+
+        with self._container_lock:
+            stream = self._open_container().streams.video[0]
+
+            # Frames are decoded straight into one preallocated array, sized
+            # from the container frame count when end_frame is not given
+            stop = end_frame if end_frame is not None else stream.frames
+            if not stop:
+                # Frame count unknown
+                return np.array([self._to_array(frame, target_size, color)
+                                 for frame in self._decode_shared(start_frame, end_frame)])
+
+            if target_size is None:
+                height = stream.codec_context.height
+                width = stream.codec_context.width
+            else:
+                height, width = target_size
+            if color == 'rgb':
+                frame_shape = (height, width, 3)
+            elif color == 'yuv420p':
+                frame_shape = (height * 3 // 2, width)
+            else:
+                frame_shape = (height, width)
+            frames = np.empty((max(stop - start_frame, 0),) + frame_shape, dtype=np.uint8)
+            count = 0
+            for frame in self._decode_shared(start_frame, stop):
+                frames[count] = self._to_array(frame, target_size, color)
+                count += 1
+
+        return frames[:count]
+
+    def _load_frame_cache(self) -> np.ndarray:
+        """Memory-map the frame cache, decoding the video into it first if missing or stale."""
+        with self._frame_cache_lock:
+            if self._frame_cache is None:
+                cache_path = self.session_path / FRAME_CACHE_NPY
+                if (not cache_path.exists()
+                        or cache_path.stat().st_mtime < self.video_path.stat().st_mtime):
+                    self._build_frame_cache(cache_path)
+                self._frame_cache = np.load(cache_path, mmap_mode='r')
+                # Training reads the cache front to back: larger readahead
+                self._advise_frames(getattr(mmap, 'MADV_SEQUENTIAL', None), 0, None)
+            return self._frame_cache
+
+    def _advise_frames(self, advice: Optional[int], start_frame: int, end_frame: Optional[int]):
+        """
+        Give the OS a madvise hint for the cache pages of frames [start_frame, end_frame).
+
+        Does nothing where mmap.madvise or the advice is unavailable (Windows).
+        """
+        cache_map = getattr(self._frame_cache, '_mmap', None)
+        if advice is None or cache_map is None or not hasattr(cache_map, 'madvise'):
+            return
+
+        # The map starts at the allocation boundary before the .npy header end
+        data_start = self._frame_cache.offset % mmap.ALLOCATIONGRANULARITY
+        frame_bytes = self._frame_cache[0].nbytes
+        num_frames = len(self._frame_cache)
+        end_frame = num_frames if end_frame is None else min(end_frame, num_frames)
+        if start_frame >= end_frame:
+            return
+
+        start = data_start + start_frame * frame_bytes
+        start -= start % mmap.PAGESIZE
+        stop = data_start + end_frame * frame_bytes
+        cache_map.madvise(advice, start, stop - start)
+
+    def _build_frame_cache(self, cache_path: Path):
+        """Decode every frame of the video into a .npy file."""
+        print(f"[TrainingDataLoader] Decoding {self.video_path.name} into {cache_path.name}...")
+        frames = self.iter_video_frames()
+        first = next(frames, None)
+        if first is None:
+            raise ValueError(f"No frames in {self.video_path}")
+
+        # Written under a temporary name, an interrupted build leaves no cache
+        partial_path = cache_path.with_suffix('.partial.npy')
+        num_frames = self._probe_num_frames()
+        cache = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint8,
+                                          shape=(num_frames,) + first.shape)
+        cache[0] = first
+        count = 1
+        for frame in frames:
+            if count == num_frames:
+                break  # More frames than the container reported
+            cache[count] = frame
+            count += 1
+        cache.flush()
+
+        if count < num_frames:
+            # Fewer frames than the container reported
+            trimmed = np.array(cache[:count])
+            del cache
+            np.save(partial_path, trimmed)
+        else:
+            del cache
+        os.replace(partial_path, cache_path)
+
+    @staticmethod
+    def _check_color(color: str):
+        """Validate a frame color layout, non-RGB layouts need PyAV."""
+        if color not in FRAME_COLORS:
+            raise ValueError(f"Unknown frame color: {color}")
+        if color != 'rgb' and not AV_AVAILABLE:
+            raise ImportError(f"av is required to load '{color}' frames")
+
+    @staticmethod
+    def _to_array(frame, target_size: Optional[Tuple[int, int]], color: str) -> np.ndarray:
+        """Convert a decoded PyAV frame to an array, scaled to target_size."""
+        if color == 'rgb':
+            if target_size is None:
+                return frame.to_ndarray(format='rgb24')
+            height, width = target_size
+            return frame.to_ndarray(format='rgb24', width=width, height=height,
+                                    interpolation='FAST_BILINEAR')
+
+        if target_size is not None:
+            height, width = target_size
+            frame = frame.reformat(width=width, height=height, format='yuv420p',
+                                   interpolation='FAST_BILINEAR')
+        elif frame.format.name != 'yuv420p':
+            frame = frame.reformat(format='yuv420p')
+
+        if color == 'gray':
+            # View of the Y plane, rows padded to line_size are trimmed
+            plane = frame.planes[0]
+            return np.frombuffer(plane, dtype=np.uint8).reshape(
+                plane.height, plane.line_size)[:, :plane.width]
+        return frame.to_ndarray()
+
+    def _open_container(self):
+        """Get the shared PyAV container of the video, opening it on first use."""
+        if self._container is None:
+            self._container = av.open(str(self.video_path))
+            self._container.streams.video[0].thread_type = 'AUTO'  # Decode on several threads
+        return self._container
+
+    def _decode_shared(self, start_frame: int, end_frame: Optional[int]):
+        """
+        Decode frames [start_frame, end_frame) with the shared container.
+
+        Consecutive loads (start_frame following the end of the previous
+        one) continue from the current decoder position; any other start
+        seeks. The caller holds _container_lock.
+        """
+        if self._decoded is None or start_frame != self._next_frame:
+            self._decoded = self._decode(self._open_container(), start_frame, None)
+            self._pending_frame = None
+
+        while True:
+            item = self._pending_frame or next(self._decoded, None)
+            self._pending_frame = None
+            if item is None:
+                self._decoded = None  # End of the video
+                return
+
+            index, frame = item
+            if end_frame is not None and index >= end_frame:
+                # Kept for the next load, which starts at end_frame
+                self._pending_frame = item
+                self._next_frame = end_frame
+                return
+
+            self._next_frame = index + 1
+            yield frame
+
+    def _decode(self, container, start_frame: int, end_frame: Optional[int]):
+        """Decode the (index, frame) pairs of a PyAV container in [start_frame, end_frame)."""
+        stream = container.streams.video[0]
+        rate = stream.average_rate or stream.guessed_rate
+        time_base = stream.time_base
+        start_pts = stream.start_time or 0
+
+        # Jump to the keyframe at or before start_frame instead of decoding
+        # every frame before it (also rewinds a container that already decoded)
+        container.seek(start_pts + int(start_frame / rate / time_base),
+                       stream=stream, backward=True, any_frame=False)
+
+        for frame in container.decode(stream):
+            # Recordings are constant frame rate, pts gives the frame index
+            index = round((frame.pts - start_pts) * time_base * rate)
+            if index < start_frame:
+                continue
+            if end_frame is not None and index >= end_frame:
+                break
+            yield index, frame
+
+    def load_video_frames_gpu(self, start_frame: int = 0, end_frame: Optional[int] = None,
+                              device_id: int = 0):
+        """
+        Load video frames decoded on the GPU with NVDEC.
+
+        The frames stay in GPU memory, no copy from the CPU is needed before
+        training. Requires torch, and decord built with CUDA; otherwise the
+        frames are decoded on the CPU by load_video_frames.
+
+        Args:
+            start_frame: First frame to load
+            end_frame: Last frame to load (None = all)
+            device_id: CUDA device to decode on
+
+        Returns:
+            uint8 torch tensor of shape (num_frames, height, width, channels),
+            on the GPU, or on the CPU when GPU decoding is unavailable
+        """
+        import torch
+
+        if DECORD_AVAILABLE:
+            if device_id not in self._gpu_readers:
+                try:
+                    decord.bridge.set_bridge('torch')
+                    self._gpu_readers[device_id] = decord.VideoReader(
+                        str(self.video_path), ctx=decord.gpu(device_id))
+                except Exception as e:
+                    print(f"[TrainingDataLoader] GPU decoding unavailable, using CPU: {e}")
+                    self._gpu_readers[device_id] = None
+
+            reader = self._gpu_readers[device_id]
+            if reader is not None:
+                stop = len(reader) if end_frame is None else min(end_frame, len(reader))
+                return reader.get_batch(list(range(start_frame, stop)))
+
+        return torch.from_numpy(self.load_video_frames(start_frame, end_frame))
+
+    def _iter_video_frames_imageio(self, start_frame: int, end_frame: Optional[int],
+                                   target_size: Optional[Tuple[int, int]]) -> Iterator[np.ndarray]:
+        """Iterate over video frames with imageio, decoding every frame from the start."""
+        if target_size is None:
+            reader = imageio.get_reader(str(self.video_path))
+        else:
+            # Scaled by ffmpeg before the frames are read
+            height, width = target_size
+            reader = imageio.get_reader(str(self.video_path), size=(width, height))
 
         try:
             for i, frame in enumerate(reader):
@@ -76,40 +697,123 @@ class TrainingDataLoader:
                 if end_frame is not None and i >= end_frame:
                     break
 
-                frames.append(frame)
+                yield frame
 
         finally:
             reader.close()
 
-        return np.array(frames)
-
-    def get_batch(self, start_frame: int, num_frames: int) -> Tuple[np.ndarray, List[dict]]:
+    def get_batch(self, start_frame: int, num_frames: int, dtype=np.uint8,
+                  layout: str = 'dicts', target_size: Optional[Tuple[int, int]] = None,
+                  color: str = 'rgb'
+                  ) -> Tuple[np.ndarray, Union[List[dict], Dict[str, np.ndarray], np.ndarray]]:
         """
         Get a batch of synchronized frames and inputs.
 
+        Frames stay uint8 by default, a quarter of the size of float32; pass
+        dtype=np.float32 for frames scaled to [0, 1].
+
         Args:
             start_frame: Starting frame index
             num_frames: Number of frames to load
+            dtype: np.uint8 for raw frames, or np.float32 for frames in [0, 1]
+            layout: Inputs as 'dicts' (one dictionary per frame), 'columns' (views
+                of the load_input_columns arrays) or 'records' (view of the
+                load_input_records array)
+            target_size: (height, width) to scale frames to while decoding (None = recorded size)
+            color: 'rgb', 'yuv420p' or 'gray' (see load_video_frames)
 
         Returns:
             Tuple of (video_frames, input_states)
         """
         end_frame = start_frame + num_frames
 
-        frames = self.load_video_frames(start_frame, end_frame)
-        inputs = self.load_inputs()[start_frame:end_frame]
+        if layout == 'dicts':
+            inputs = self.load_inputs()[start_frame:end_frame]
+        elif layout == 'columns':
+            inputs = {
+                name: column if name in ('keys', 'buttons') else column[start_frame:end_frame]
+                for name, column in self.load_input_columns().items()
+            }
+        elif layout == 'records':
+            inputs = self.load_input_records()[start_frame:end_frame]
+        else:
+            raise ValueError(f"Unknown inputs layout: {layout}")
+
+        frames = self.load_video_frames(start_frame, end_frame, target_size, color)
+        if np.dtype(dtype) == np.float32:
+            frames = to_float01(frames)
+        elif np.dtype(dtype) != np.uint8:
+            raise ValueError(f"Unsupported frame dtype: {dtype}")
 
         return frames, inputs
 
+    def prefetch(self, start_frame: int, num_frames: int, **kwargs) -> Future:
+        """
+        Start loading a batch in a background thread.
+
+        PyAV decodes without holding the GIL, so the next batch decodes
+        while the current one is used for training.
+
+        Args:
+            start_frame: Starting frame index
+            num_frames: Number of frames to load
+            **kwargs: get_batch options (dtype, layout, target_size, color)
+
+        Returns:
+            Future resolving to the get_batch tuple of (video_frames, input_states)
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=2)
+        return self._pool.submit(self.get_batch, start_frame, num_frames, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop the prefetch threads and close the video and frame cache."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._container_lock:
+            if self._container is not None:
+                self._decoded = None
+                self._pending_frame = None
+                self._container.close()
+                self._container = None
+        with self._frame_cache_lock:
+            self._frame_cache = None
+
     def get_num_frames(self) -> int:
         """Get total number of frames in the recording."""
         if 'screen_stats' in self.metadata:
             return self.metadata['screen_stats']['frame_count']
 
-        # Fallback: count frames in video
-        reader = imageio.get_reader(str(self.video_path))
-        count = sum(1 for _ in reader)
-        reader.close()
+        # Fallback: probe the video once
+        if self._num_frames is None:
+            self._num_frames = self._probe_num_frames()
+        return self._num_frames
+
+    def _probe_num_frames(self) -> int:
+        """Count the frames of the video without decoding it."""
+        if AV_AVAILABLE:
+            with self._container_lock:
+                container = self._open_container()
+                stream = container.streams.video[0]
+                if stream.frames:
+                    return stream.frames
+                # Recordings are constant frame rate: duration times frame rate
+                rate = stream.average_rate
+                if stream.duration and rate:
+                    return round(stream.duration * stream.time_base * rate)
+                # Neither in the header: count packets (moves the decoding position)
+                self._decoded = None
+                return sum(1 for packet in container.demux(stream) if packet.size)
+
+        # ffmpeg copies the stream to a null output, which also skips decoding
+        count, _ = imageio_ffmpeg.count_frames_and_secs(str(self.video_path))
         return count
 
     def get_fps(self) -> int:
@@ -122,13 +826,17 @@ class TrainingDataLoader:
         if resolution:
             return tuple(resolution)
 
-        # Fallback: read from first frame
-        reader = imageio.get_reader(str(self.video_path))
-        first_frame = next(iter(reader))
-        reader.close()
-
-        height, width = first_frame.shape[:2]
-        return (width, height)
+        # Fallback: read the video header once
+        if self._resolution is None:
+            if AV_AVAILABLE:
+                with self._container_lock:
+                    codec_context = self._open_container().streams.video[0].codec_context
+                    self._resolution = (codec_context.width, codec_context.height)
+            else:
+                reader = imageio.get_reader(str(self.video_path))
+                self._resolution = tuple(reader.get_meta_data()['size'])
+                reader.close()
+        return self._resolution
 
     def get_info(self) -> dict:
         """Get comprehensive information about the recording."""
@@ -141,17 +849,18 @@ class TrainingDataLoader:
         }
 
 
-def load_session(session_path: str) -> TrainingDataLoader:
+def load_session(session_path: str, cache_frames: bool = False) -> TrainingDataLoader:
     """
     Load a training session.
 
     Args:
         session_path: Path to session directory
+        cache_frames: Serve frames from a decoded gameplay_cache.npy (see TrainingDataLoader)
 
     Returns:
         TrainingDataLoader instance
     """
-    return TrainingDataLoader(session_path)
+    return TrainingDataLoader(session_path, cache_frames)
 
 
 # Example usage
@@ -182,3 +891,19 @@ if __name__ == '__main__':
     print(f"  Inputs count: {len(inputs)}")
     print(f"\nFirst input state:")
     print(f"  {inputs[0]}")
+
+    # Network input: normalized channels-first float32 (ImageNet statistics)
+    batch = preprocess_batch(frames, mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225))
+    print(f"  Preprocessed shape: {batch.shape}")
+
+    # Double buffering: decode the next batch while the current one is used
+    print(f"\nPrefetching batches of 10 frames...")
+    batch_size = 10
+    future = loader.prefetch(0, batch_size)
+    for start in range(batch_size, info['num_frames'], batch_size):
+        frames, inputs = future.result()
+        future = loader.prefetch(start, batch_size)
+        # ... train on frames, inputs ...
+    frames, inputs = future.result()
+    loader.close()
+    print(f"  Last batch shape: {frames.shape}")